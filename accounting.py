@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Contabilidad de uso por petición y presupuestos
+Tokens, llamadas al LLM, llamadas a herramientas, iteraciones del agente y
+tiempo por etapa de cada `process_message`, agregados por sesión y por tenant.
+Los presupuestos cortan los bucles del agente antes de que consuman tiempo y tokens.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Optional, Sequence
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+# Salidas de AgentExecutor cuando corta por max_iterations / max_execution_time
+AGENT_STOPPED_OUTPUTS = (
+    "Agent stopped due to iteration limit or time limit.",
+    "Agent stopped due to max iterations.",
+)
+
+class BudgetExceededError(RuntimeError):
+    """La petición superó su presupuesto de tokens o de llamadas a herramientas"""
+
+# ===============================================
+# PRESUPUESTOS (VARIABLES DE ENTORNO)
+# ===============================================
+# Límite de iteraciones por defecto de AgentExecutor: sin MCP_BUDGET_* el agente se comporta como antes
+DEFAULT_MAX_ITERATIONS = 15
+
+class Budget:
+    """Límites por petición (0 / None = sin límite); los valores por defecto son los de AgentExecutor"""
+
+    def __init__(self, max_iterations: Optional[int] = DEFAULT_MAX_ITERATIONS,
+                 max_execution_time: Optional[float] = None,
+                 max_tokens: int = 0, max_tool_calls: int = 0):
+        self.max_iterations = max_iterations
+        self.max_execution_time = max_execution_time
+        self.max_tokens = max_tokens
+        self.max_tool_calls = max_tool_calls
+
+    @classmethod
+    def from_env(cls) -> "Budget":
+        return cls(
+            max_iterations=int(os.getenv("MCP_BUDGET_MAX_ITERATIONS", str(DEFAULT_MAX_ITERATIONS))) or None,
+            max_execution_time=float(os.getenv("MCP_BUDGET_MAX_SECONDS", "0")) or None,
+            max_tokens=int(os.getenv("MCP_BUDGET_MAX_TOKENS", "0")),
+            max_tool_calls=int(os.getenv("MCP_BUDGET_MAX_TOOL_CALLS", "0")),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "max_iterations": self.max_iterations,
+            "max_execution_time": self.max_execution_time,
+            "max_tokens": self.max_tokens,
+            "max_tool_calls": self.max_tool_calls,
+        }
+
+# ===============================================
+# USO DE UNA PETICIÓN
+# ===============================================
+class RequestUsage:
+    """Contadores y tiempos (s) de una petición"""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.llm_calls = 0
+        self.tool_calls = 0
+        self.tool_errors = 0
+        self.iterations = 0
+        self.stages: Dict[str, float] = {"init": 0.0, "llm": 0.0, "tools": 0.0, "total": 0.0}
+        self.stopped: Optional[str] = None
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        stages = {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()}
+        stages["overhead"] = round(max(0.0, stages["total"] - stages["init"] - stages["llm"] - stages["tools"]), 2)
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "llm_calls": self.llm_calls,
+            "tool_calls": self.tool_calls,
+            "tool_errors": self.tool_errors,
+            "iterations": self.iterations,
+            "stages_ms": stages,
+            "stopped": self.stopped,
+        }
+
+def _token_usage(response: LLMResult) -> Dict[str, int]:
+    """Tokens de la respuesta: usage_metadata del mensaje o token_usage del proveedor"""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return {"prompt": usage.get("input_tokens", 0), "completion": usage.get("output_tokens", 0)}
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return {"prompt": usage.get("prompt_tokens", 0), "completion": usage.get("completion_tokens", 0)}
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """Callback de LangChain que rellena un RequestUsage y aplica el presupuesto.
+
+    `raise_error=True` hace que BudgetExceededError interrumpa la ejecución del agente.
+    """
+
+    raise_error = True
+    run_inline = True
+
+    def __init__(self, usage: RequestUsage, budget: Optional[Budget] = None):
+        self.usage = usage
+        self.budget = budget or Budget(max_iterations=None, max_execution_time=None)
+        self._started: Dict[UUID, float] = {}
+        self._tool_runs: set = set()
+
+    def _start(self, run_id: UUID):
+        self._started[run_id] = time.perf_counter()
+
+    def _stop(self, run_id: UUID, stage: str):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self.usage.stages[stage] += time.perf_counter() - started
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        self._stop(run_id, "llm")
+        tokens = _token_usage(response)
+        self.usage.llm_calls += 1
+        self.usage.prompt_tokens += tokens["prompt"]
+        self.usage.completion_tokens += tokens["completion"]
+        if self.budget.max_tokens and self.usage.total_tokens > self.budget.max_tokens:
+            self.usage.stopped = "max_tokens"
+            raise BudgetExceededError(
+                f"Presupuesto de tokens agotado ({self.usage.total_tokens} > {self.budget.max_tokens})"
+            )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._stop(run_id, "llm")
+
+    def on_agent_action(self, action, *, run_id: UUID, **kwargs: Any):
+        self.usage.iterations += 1
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID,
+                      parent_run_id: Optional[UUID] = None, **kwargs: Any):
+        # Las herramientas envueltas (breakers, descompresión) anidan ejecuciones: se cuenta la externa
+        nested = parent_run_id in self._tool_runs
+        self._tool_runs.add(run_id)
+        if nested:
+            return
+        if self.budget.max_tool_calls and self.usage.tool_calls >= self.budget.max_tool_calls:
+            self.usage.stopped = "max_tool_calls"
+            raise BudgetExceededError(
+                f"Presupuesto de herramientas agotado ({self.budget.max_tool_calls} llamadas)"
+            )
+        self.usage.tool_calls += 1
+        self._start(run_id)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any):
+        self._stop(run_id, "tools")
+        self._tool_runs.discard(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        if run_id in self._started:
+            self.usage.tool_errors += 1
+        self._stop(run_id, "tools")
+        self._tool_runs.discard(run_id)
+
+# ===============================================
+# AGREGACIÓN POR SESIÓN Y TENANT
+# ===============================================
+def _empty_totals() -> Dict[str, Any]:
+    return {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+            "llm_calls": 0, "tool_calls": 0, "iterations": 0, "stopped": 0, "wall_ms": 0.0}
+
+def _add(totals: Dict[str, Any], usage: Dict[str, Any]):
+    totals["requests"] += 1
+    for key in ("prompt_tokens", "completion_tokens", "total_tokens", "llm_calls", "tool_calls", "iterations"):
+        totals[key] += usage[key]
+    totals["stopped"] += 1 if usage["stopped"] else 0
+    totals["wall_ms"] = round(totals["wall_ms"] + usage["stages_ms"]["total"], 2)
+
+class UsageLedger:
+    """Totales acumulados por tenant y por sesión (las sesiones más antiguas se descartan)"""
+
+    def __init__(self, max_sessions: Optional[int] = None):
+        self.max_sessions = max_sessions or int(os.getenv("MCP_LEDGER_MAX_SESSIONS", "10000"))
+        self._tenants: Dict[str, Dict[str, Any]] = {}
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, usage: Dict[str, Any], session_id: Optional[str] = None, tenant: Optional[str] = None):
+        tenant = tenant or "default"
+        with self._lock:
+            _add(self._tenants.setdefault(tenant, _empty_totals()), usage)
+            if session_id:
+                totals = self._sessions.pop(session_id, None) or dict(_empty_totals(), tenant=tenant)
+                _add(totals, usage)
+                self._sessions[session_id] = totals
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+
+    def session(self, session_id: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._sessions.get(session_id) or _empty_totals())
+
+    def tenant(self, tenant: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._tenants.get(tenant) or _empty_totals())
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"tenants": {name: dict(t) for name, t in self._tenants.items()},
+                    "sessions": len(self._sessions)}
+
+# Libro de uso compartido del proceso
+usage_ledger = UsageLedger()
+
+# ===============================================
+# EJECUCIÓN CONTABILIZADA
+# ===============================================
+def _stopped_reason(usage: RequestUsage, budget: Budget) -> str:
+    if budget.max_iterations and usage.iterations >= budget.max_iterations:
+        return "max_iterations"
+    return "max_execution_time"
+
+def _finish(usage: RequestUsage, budget: Budget, output: Any, started: float,
+            ledger: Optional[UsageLedger], session_id: Optional[str], tenant: Optional[str]) -> Dict[str, Any]:
+    usage.stages["total"] += time.perf_counter() - started
+    if usage.stopped is None and output in AGENT_STOPPED_OUTPUTS:
+        usage.stopped = _stopped_reason(usage, budget)
+    result = usage.to_dict()
+    if ledger is not None:
+        ledger.record(result, session_id=session_id, tenant=tenant)
+    return result
+
+async def ainvoke_with_usage(executor, message: str, budget: Optional[Budget] = None,
+                             ledger: Optional[UsageLedger] = None, session_id: Optional[str] = None,
+                             tenant: Optional[str] = None, init_seconds: float = 0.0,
+                             callbacks: Sequence[BaseCallbackHandler] = ()) -> Dict[str, Any]:
+    """Ejecuta el agente con contabilidad: {"output": str, "usage": {...}}.
+
+    Si se agota el presupuesto de tokens o herramientas, la salida es el motivo del corte.
+    `callbacks` se añaden al de contabilidad (p. ej. las etapas de profiling.py).
+    """
+    budget = budget or Budget.from_env()
+    usage = RequestUsage()
+    usage.stages["init"] = usage.stages["total"] = init_seconds
+    started = time.perf_counter()
+    try:
+        response = await executor.ainvoke({"input": message},
+                                          config={"callbacks": [UsageCallbackHandler(usage, budget), *callbacks]})
+        output = response["output"]
+    except BudgetExceededError as e:
+        output = str(e)
+    except BaseException:
+        # También si se cancela por timeout: los tokens ya consumidos cuentan
+        _finish(usage, budget, None, started, ledger, session_id, tenant)
+        raise
+    return {"output": output, "usage": _finish(usage, budget, output, started, ledger, session_id, tenant)}
+
+async def astream_with_usage(executor, message: str, budget: Optional[Budget] = None,
+                             ledger: Optional[UsageLedger] = None, session_id: Optional[str] = None,
+                             tenant: Optional[str] = None, init_seconds: float = 0.0,
+                             callbacks: Sequence[BaseCallbackHandler] = ()) -> AsyncIterator[Dict[str, Any]]:
+    """`ainvoke_with_usage` con los chunks de `executor.astream` (actions / steps / output).
+
+    El último chunk es {"usage": {...}}; si se agota el presupuesto, antes llega
+    {"output": <motivo del corte>}.
+    """
+    budget = budget or Budget.from_env()
+    usage = RequestUsage()
+    usage.stages["init"] = usage.stages["total"] = init_seconds
+    started = time.perf_counter()
+    output = None
+    try:
+        async for chunk in executor.astream({"input": message},
+                                            config={"callbacks": [UsageCallbackHandler(usage, budget), *callbacks]}):
+            if "output" in chunk:
+                output = chunk["output"]
+            yield chunk
+    except BudgetExceededError as e:
+        output = str(e)
+        yield {"output": output}
+    except BaseException:
+        # Cliente desconectado o timeout: se registra lo consumido hasta el corte
+        _finish(usage, budget, None, started, ledger, session_id, tenant)
+        raise
+    yield {"usage": _finish(usage, budget, output, started, ledger, session_id, tenant)}
+
+def invoke_with_usage(executor, message: str, budget: Optional[Budget] = None,
+                      ledger: Optional[UsageLedger] = None, session_id: Optional[str] = None,
+                      tenant: Optional[str] = None,
+                      callbacks: Sequence[BaseCallbackHandler] = ()) -> Dict[str, Any]:
+    """Versión síncrona de `ainvoke_with_usage`"""
+    budget = budget or Budget.from_env()
+    usage = RequestUsage()
+    started = time.perf_counter()
+    try:
+        response = executor.invoke({"input": message},
+                                   config={"callbacks": [UsageCallbackHandler(usage, budget), *callbacks]})
+        output = response["output"]
+    except BudgetExceededError as e:
+        output = str(e)
+    except Exception:
+        _finish(usage, budget, None, started, ledger, session_id, tenant)
+        raise
+    return {"output": output, "usage": _finish(usage, budget, output, started, ledger, session_id, tenant)}
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+API HTTP/JSON sin interfaz (ASGI)
+Expone cualquier orquestador por HTTP sin pasar por Gradio:
+
+- POST /v1/chat          {"message": "..."}            -> {"output": "...", "request_id": "..."}
+- POST /v1/batch         {"messages": ["...", "..."]}  -> {"results": [...], "request_id": "..."}
+- GET  /v1/chat/stream?message=...                     -> eventos SSE (action / step / output / usage)
+- GET  /v1/usage[?session_id=...|tenant=...]            -> uso acumulado (tokens, llamadas, tiempos)
+- GET|POST /v1/admin/profiling {"enabled": true, ...}    -> estado / configuración del profiling
+                                                          (solo con API_ADMIN_TOKEN; cabecera X-Admin-Token)
+- GET  /healthz | /readyz                                 -> proceso vivo / orquestador caliente (503 hasta entonces)
+
+/v1/chat, /v1/batch y /v1/chat/stream aceptan "session_id" y "tenant" (o la cabecera
+X-Tenant-ID), pasan por la misma contabilidad y presupuesto del orquestador y
+devuelven el uso de la petición en "usage" si el orquestador lo contabiliza. El
+límite de tiempo es API_TIMEOUT o `Budget.max_execution_time` si es menor.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import hmac
+import inspect
+import logging
+import os
+import sys
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Mapping, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from serialization import dumps, loads
+from profiling import profiler
+from logging_setup import configure_logging, log_level
+from warmup import warmup_lifespan, warmup_ready
+
+logger = logging.getLogger(__name__)
+
+# ID de la petición en curso (disponible para logs y orquestadores)
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+
+REQUEST_ID_HEADER = "x-request-id"
+TENANT_HEADER = "x-tenant-id"
+ADMIN_TOKEN_HEADER = "x-admin-token"
+
+# ===============================================
+# SERIALIZACIÓN
+# ===============================================
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+# ===============================================
+# ADAPTADOR DE ORQUESTADORES
+# ===============================================
+def resolve_handler(orchestrator) -> Callable[[str], Awaitable[str]]:
+    """Devuelve la función asíncrona que procesa un mensaje en el orquestador dado"""
+    for name in ("aprocess_message", "process_message", "send_message", "process"):
+        method = getattr(orchestrator, name, None)
+        if method is None:
+            continue
+        if inspect.iscoroutinefunction(method):
+            return method
+
+        async def _offload(message: str, _method=method) -> str:
+            return await asyncio.get_running_loop().run_in_executor(None, _method, message)
+        return _offload
+    raise TypeError(f"{type(orchestrator).__name__} no expone un método para procesar mensajes")
+
+def resolve_usage_handler(orchestrator) -> Optional[Callable[..., Awaitable[Dict[str, Any]]]]:
+    """Método asíncrono que devuelve {"output", "usage"} si el orquestador contabiliza uso"""
+    for name in ("aprocess_message_with_usage", "process_message_with_usage"):
+        method = getattr(orchestrator, name, None)
+        if method is not None and inspect.iscoroutinefunction(method):
+            return method
+    return None
+
+def resolve_stream_handler(orchestrator) -> Optional[Callable[..., AsyncIterator[Dict[str, Any]]]]:
+    """Generador asíncrono de chunks del agente con contabilidad (ver accounting.astream_with_usage)"""
+    method = getattr(orchestrator, "astream_message_with_usage", None)
+    return method if method is not None and inspect.isasyncgenfunction(method) else None
+
+def time_limit(orchestrator, timeout: float) -> float:
+    """Segundos por petición: el timeout de la API o el presupuesto del orquestador si es menor"""
+    budget_seconds = getattr(getattr(orchestrator, "budget", None), "max_execution_time", None)
+    return min(timeout, budget_seconds) if budget_seconds else timeout
+
+def _sse(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+# ===============================================
+# APLICACIÓN ASGI
+# ===============================================
+def create_api(orchestrator, timeout: float = None, batch_concurrency: int = None) -> Starlette:
+    """Crea la app ASGI que envuelve al orquestador"""
+    handler = resolve_handler(orchestrator)
+    usage_handler = resolve_usage_handler(orchestrator)
+    stream_handler = resolve_stream_handler(orchestrator)
+    timeout = timeout if timeout is not None else float(os.getenv("API_TIMEOUT", "60"))
+    limit = time_limit(orchestrator, timeout)
+    batch_limit = asyncio.Semaphore(
+        batch_concurrency if batch_concurrency is not None else int(os.getenv("API_BATCH_CONCURRENCY", "16"))
+    )
+    # Sin token las rutas de administración no existen
+    admin_token = os.getenv("API_ADMIN_TOKEN", "")
+
+    def _error(status: int, message: str, request_id: str) -> FastJSONResponse:
+        return FastJSONResponse({"error": message, "request_id": request_id}, status_code=status,
+                                headers={REQUEST_ID_HEADER: request_id})
+
+    async def _process(message: str, session_id: Optional[str] = None,
+                       tenant: Optional[str] = None) -> Dict[str, Any]:
+        """{"output", "usage"} por el camino contabilizado del orquestador, con límite de tiempo"""
+        if usage_handler is not None:
+            return await asyncio.wait_for(usage_handler(message, session_id=session_id, tenant=tenant),
+                                          timeout=limit)
+        return {"output": await asyncio.wait_for(handler(message), timeout=limit)}
+
+    async def _read_json(request: Request) -> Dict[str, Any]:
+        body = await request.body()
+        data = loads(body) if body else {}
+        if not isinstance(data, dict):
+            raise ValueError("Se esperaba un objeto JSON")
+        return data
+
+    def _request_id(request: Request) -> str:
+        request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        request_id_var.set(request_id)
+        return request_id
+
+    def _tenant(request: Request, data: Mapping[str, Any]) -> Optional[str]:
+        return request.headers.get(TENANT_HEADER) or data.get("tenant")
+
+    async def chat(request: Request) -> Response:
+        request_id = _request_id(request)
+        try:
+            data = await _read_json(request)
+        except ValueError as e:
+            return _error(400, f"JSON inválido: {e}", request_id)
+        message = data.get("message")
+        if not isinstance(message, str) or not message.strip():
+            return _error(400, "El campo 'message' es obligatorio", request_id)
+        try:
+            result = await _process(message, data.get("session_id"), _tenant(request, data))
+        except asyncio.TimeoutError:
+            return _error(504, f"Timeout ({limit}s)", request_id)
+        except Exception as e:
+            logger.exception("[API] %s error procesando mensaje", request_id)
+            return _error(500, str(e), request_id)
+        result["request_id"] = request_id
+        return FastJSONResponse(result, headers={REQUEST_ID_HEADER: request_id})
+
+    async def batch(request: Request) -> Response:
+        request_id = _request_id(request)
+        try:
+            data = await _read_json(request)
+        except ValueError as e:
+            return _error(400, f"JSON inválido: {e}", request_id)
+        messages = data.get("messages")
+        if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+            return _error(400, "El campo 'messages' debe ser una lista de strings", request_id)
+
+        session_id, tenant = data.get("session_id"), _tenant(request, data)
+
+        async def _one(message: str) -> Dict[str, Any]:
+            async with batch_limit:
+                try:
+                    return await _process(message, session_id, tenant)
+                except asyncio.TimeoutError:
+                    return {"error": f"Timeout ({limit}s)"}
+                except Exception as e:
+                    return {"error": str(e)}
+
+        results = await asyncio.gather(*(_one(m) for m in messages))
+        return FastJSONResponse({"results": results, "request_id": request_id},
+                                headers={REQUEST_ID_HEADER: request_id})
+
+    async def stream(request: Request) -> Response:
+        request_id = _request_id(request)
+        message = request.query_params.get("message", "")
+        if not message.strip():
+            return _error(400, "El parámetro 'message' es obligatorio", request_id)
+
+        session_id, tenant = request.query_params.get("session_id"), _tenant(request, request.query_params)
+
+        async def _produce(queue: "asyncio.Queue[Any]"):
+            # El agente corre entero en su propia tarea: profiling, especulación y contabilidad
+            # no cruzan yields del generador SSE y el límite de tiempo puede cancelarlo
+            try:
+                if stream_handler is None:
+                    await queue.put(await _process(message, session_id, tenant))
+                else:
+                    async for chunk in stream_handler(message, session_id=session_id, tenant=tenant):
+                        await queue.put(chunk)
+            except Exception as e:
+                await queue.put(e)
+            await queue.put(None)
+
+        async def events() -> AsyncIterator[bytes]:
+            queue: "asyncio.Queue[Any]" = asyncio.Queue()
+            producer = asyncio.create_task(_produce(queue))
+            deadline = asyncio.get_running_loop().time() + limit
+            try:
+                while True:
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    try:
+                        chunk = await asyncio.wait_for(queue.get(), timeout=max(remaining, 0))
+                    except asyncio.TimeoutError:
+                        yield _sse("error", {"error": f"Timeout ({limit}s)"})
+                        return
+                    if chunk is None:
+                        return
+                    if isinstance(chunk, Exception):
+                        logger.error("[API] %s error en streaming", request_id, exc_info=chunk)
+                        yield _sse("error", {"error": str(chunk)})
+                        return
+                    for action in chunk.get("actions", []):
+                        yield _sse("action", {"tool": action.tool, "args": action.tool_input})
+                    for step in chunk.get("steps", []):
+                        yield _sse("step", {"tool": step.action.tool, "observation": step.observation})
+                    if "output" in chunk:
+                        yield _sse("output", {"output": chunk["output"]})
+                    if "usage" in chunk:
+                        yield _sse("usage", chunk["usage"])
+            finally:
+                # Timeout o cliente desconectado: se cancela el agente (el uso consumido queda registrado)
+                producer.cancel()
+
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={REQUEST_ID_HEADER: request_id, "Cache-Control": "no-cache"})
+
+    async def healthz(request: Request) -> Response:
+        return FastJSONResponse({"status": "ok"})
+
+    async def readyz(request: Request) -> Response:
+        state = getattr(orchestrator, "warmup_state", None)
+        body = state.to_dict() if state is not None else {}
+        ready = warmup_ready(lambda: orchestrator)
+        body["ready"] = ready
+        return FastJSONResponse(body, status_code=200 if ready else 503)
+
+    async def usage(request: Request) -> Response:
+        ledger = getattr(orchestrator, "ledger", None)
+        if ledger is None:
+            return FastJSONResponse({"error": "El orquestador no contabiliza uso"}, status_code=404)
+        session_id = request.query_params.get("session_id")
+        tenant = request.query_params.get("tenant")
+        if session_id:
+            return FastJSONResponse({"session_id": session_id, **ledger.session(session_id)})
+        if tenant:
+            return FastJSONResponse({"tenant": tenant, **ledger.tenant(tenant)})
+        return FastJSONResponse(ledger.snapshot())
+
+    def _admin_denied(request: Request) -> Optional[Response]:
+        if not admin_token:
+            return FastJSONResponse({"error": "Not Found"}, status_code=404)
+        if not hmac.compare_digest(request.headers.get(ADMIN_TOKEN_HEADER, "").encode(), admin_token.encode()):
+            return FastJSONResponse({"error": "Token de administración inválido"}, status_code=403)
+        return None
+
+    async def admin_profiling(request: Request) -> Response:
+        denied = _admin_denied(request)
+        if denied is not None:
+            return denied
+        if request.method == "GET":
+            return FastJSONResponse(profiler.status())
+        try:
+            return FastJSONResponse(profiler.configure_remote(await _read_json(request)))
+        except ValueError as e:
+            return FastJSONResponse({"error": str(e)}, status_code=400)
+
+    return Starlette(routes=[
+        Route("/v1/chat", chat, methods=["POST"]),
+        Route("/v1/batch", batch, methods=["POST"]),
+        Route("/v1/chat/stream", stream, methods=["GET"]),
+        Route("/v1/usage", usage, methods=["GET"]),
+        Route("/v1/admin/profiling", admin_profiling, methods=["GET", "POST"]),
+        Route("/healthz", healthz, methods=["GET"]),
+        Route("/readyz", readyz, methods=["GET"]),
+    ], lifespan=warmup_lifespan(lambda: orchestrator))
+
+# ===============================================
+# CONSTRUCCIÓN POR TOPOLOGÍA
+# ===============================================
+def build_orchestrator(topology: str):
+    """Crea el orquestador de la topología indicada"""
+    import orchestrators
+
+    if topology == "local":
+        return orchestrators.LocalOrchestrator()
+    if topology == "stdio_tools":
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        return orchestrators.MCPOrchestrator(server_path=os.path.join(base_dir, "stdio_tools", "tools_server.py"))
+    if topology == "inprocess":
+        return orchestrators.MCPOrchestratorInProcess()
+    if topology == "http_tools":
+        return orchestrators.MCPOrchestratorHTTP(server_url=os.getenv("SERVER_URL", "http://localhost:8000/sse"))
+    if topology == "stdio_full":
+        return orchestrators.SimpleMCPClient()
+    if topology == "http_full":
+        return orchestrators.SimpleMCPClientHTTP(server_url=os.getenv("SERVER_URL", "http://localhost:8001/sse"))
+    raise ValueError(f"Topología desconocida: {topology}")
+
+TOPOLOGIES = ["local", "inprocess", "stdio_tools", "http_tools", "stdio_full", "http_full"]
+
+# ===============================================
+# EJECUTAR SERVIDOR
+# ===============================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API HTTP/JSON para los orquestadores")
+    parser.add_argument("--topology", choices=TOPOLOGIES, default=os.getenv("API_TOPOLOGY", "local"))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8080")))
+    args = parser.parse_args()
+
+    configure_logging()
+    app = create_api(build_orchestrator(args.topology))
+    uvicorn.run(
+        app,
+        host=args.host,
+        port=args.port,
+        timeout_keep_alive=int(os.getenv("API_KEEP_ALIVE", "75")),
+        log_level=log_level().lower(),
+    )
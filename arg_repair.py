@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Reparación local de argumentos de herramientas
+Antes de que una llamada a herramienta se rechace (y vuelva al LLM), sus
+argumentos se corrigen guiados por el `args_schema` pydantic de la herramienta:
+números en palabras ("cinco") y decimales con coma ("3,5"), IDs como
+"user456" -> "456" y ubicaciones aproximadas contra las claves conocidas.
+"""
+
+import difflib
+import json
+import logging
+import re
+import threading
+import typing
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Type
+
+from langchain.agents.format_scratchpad.tools import format_to_tool_messages
+from langchain.agents.output_parsers.tools import ToolsAgentOutputParser
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable, RunnableLambda, RunnablePassthrough
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, ValidationError
+
+from data_access import LOCATION_ALIASES, normalize_location, strip_accents, weather_store
+from precompile import compiled_tools
+
+logger = logging.getLogger(__name__)
+
+# ===============================================
+# NÚMEROS
+# ===============================================
+NUMBER_WORDS = {
+    "cero": 0, "un": 1, "uno": 1, "una": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5,
+    "seis": 6, "siete": 7, "ocho": 8, "nueve": 9, "diez": 10, "once": 11, "doce": 12,
+    "trece": 13, "catorce": 14, "quince": 15, "dieciseis": 16, "diecisiete": 17,
+    "dieciocho": 18, "diecinueve": 19, "veinte": 20, "veintiuno": 21, "veintiun": 21,
+    "veintidos": 22, "veintitres": 23, "veinticuatro": 24, "veinticinco": 25,
+    "veintiseis": 26, "veintisiete": 27, "veintiocho": 28, "veintinueve": 29,
+    "treinta": 30, "cuarenta": 40, "cincuenta": 50, "sesenta": 60, "setenta": 70,
+    "ochenta": 80, "noventa": 90, "cien": 100, "ciento": 100, "doscientos": 200,
+    "trescientos": 300, "cuatrocientos": 400, "quinientos": 500, "seiscientos": 600,
+    "setecientos": 700, "ochocientos": 800, "novecientos": 900,
+}
+
+# Puntos de millar solo si no hay ambigüedad: dos o más grupos ('1.234.567') o junto a una coma
+# decimal ('1.234,5'); '1.234' es un decimal con punto
+SPANISH_THOUSANDS_RE = re.compile(r"^-?\d{1,3}(?:(?:\.\d{3}){2,}(?:,\d+)?|\.\d{3},\d+)$")
+COMMA_DECIMAL_RE = re.compile(r"^-?\d+,\d+$")
+
+def _words_to_number(text: str) -> Optional[float]:
+    """'tres mil doscientos cinco' -> 3205; 'tres coma cero cinco' -> 3.05; 'dos y medio' -> 2.5"""
+    words = re.split(r"[\s-]+", strip_accents(text).lower().strip())
+    if not words or words == [""]:
+        return None
+    sign = 1
+    if words[0] == "menos":
+        sign, words = -1, words[1:]
+    if "coma" in words:
+        index = words.index("coma")
+        decimal_words = words[index + 1:]
+        # Los "cero" iniciales son dígitos del decimal: 'coma cero cinco' -> 05
+        zeros = 0
+        while zeros < len(decimal_words) - 1 and decimal_words[zeros] == "cero":
+            zeros += 1
+        whole, decimals = _words_to_number(" ".join(words[:index])), _words_to_number(" ".join(decimal_words[zeros:]))
+        if whole is None or decimals is None:
+            return None
+        digits = "0" * zeros + str(int(decimals))
+        return sign * (whole + int(digits) / 10 ** len(digits))
+    total, current, half = 0, 0, 0.0
+    for word in words:
+        if word == "y":
+            continue
+        if word in ("medio", "media"):
+            half = 0.5
+        elif word in NUMBER_WORDS:
+            current += NUMBER_WORDS[word]
+        elif word == "mil":
+            total += max(current, 1) * 1000
+            current = 0
+        elif word in ("millon", "millones"):
+            total = (total + max(current, 1)) * 1_000_000
+            current = 0
+        else:
+            return None
+    return sign * (total + current + half)
+
+def parse_number(value: Any) -> Optional[float]:
+    """Convierte números, '3,5', '1.234', '1.234,5', '1.234.567' o números en palabras a float"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    text = value.strip().replace(" ", "") if any(c.isdigit() for c in value) else value.strip()
+    if SPANISH_THOUSANDS_RE.match(text):
+        text = text.replace(".", "").replace(",", ".")
+    elif COMMA_DECIMAL_RE.match(text):
+        text = text.replace(",", ".")
+    try:
+        return float(text)
+    except ValueError:
+        return _words_to_number(text)
+
+def _split_items(text: str) -> List[str]:
+    """'4, 8 y 15' -> ['4', '8', '15'] (respeta decimales con coma sin espacio: '1,5, 2,5')"""
+    return [item.strip() for item in re.split(r",\s+|;|\s+y\s+|,(?=\D)", text) if item.strip()]
+
+# ===============================================
+# REPARACIÓN POR CAMPO
+# ===============================================
+def _location_keys() -> List[str]:
+    return list(weather_store.keys()) + list(LOCATION_ALIASES)
+
+# Conjunto de claves válidas por nombre de campo (para la coincidencia aproximada)
+FIELD_KEY_SETS: Dict[str, Callable[[], Iterable[str]]] = {
+    "location": _location_keys,
+    "locations": _location_keys,
+}
+
+# Solo prefijos conocidos de identificador: 'A123' no es el usuario 123
+ID_RE = re.compile(r"^(?:(?:user|usuario|id)[\s_#-]*|#\s*)?(\d+)$", re.IGNORECASE)
+
+def normalize_id(value: Any) -> Any:
+    """'user456' / 'ID-456' / '#456' / 456 -> '456'; otros prefijos se dejan igual"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(int(value)) if float(value).is_integer() else str(value)
+    if isinstance(value, str):
+        match = ID_RE.match(value.strip())
+        if match:
+            return match.group(1)
+    return value
+
+def match_key(value: Any, keys: Iterable[str], cutoff: float = 0.75) -> Any:
+    """Sustituye una clave mal escrita por la conocida más parecida ('Madird' -> 'madrid')"""
+    if not isinstance(value, str):
+        return value
+    keys = list(keys)
+    normalized = normalize_location(value)
+    if normalized in keys:
+        return value
+    matches = difflib.get_close_matches(normalized, keys, n=1, cutoff=cutoff)
+    return matches[0] if matches else value
+
+def _coerce(value: Any, annotation: Any) -> Any:
+    """Coerción según la anotación del campo (float, int, str y List[...] de ellos)"""
+    origin = typing.get_origin(annotation)
+    if origin in (list, List, Sequence):
+        (item_type,) = typing.get_args(annotation) or (Any,)
+        if isinstance(value, str):
+            value = _split_items(value)
+        if isinstance(value, (list, tuple)):
+            return [_coerce(item, item_type) for item in value]
+        return [_coerce(value, item_type)]
+    if annotation in (float, int):
+        number = parse_number(value)
+        if number is None:
+            return value
+        return int(number) if annotation is int and number.is_integer() else number
+    if annotation is str:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(int(value)) if float(value).is_integer() else str(value)
+        return value.strip() if isinstance(value, str) else value
+    return value
+
+def _normalize_field(name: str, value: Any) -> Any:
+    if name.endswith("_id"):
+        return normalize_id(value)
+    if name.endswith("_ids") and isinstance(value, list):
+        return [normalize_id(item) for item in value]
+    if name in FIELD_KEY_SETS:
+        keys = list(FIELD_KEY_SETS[name]())
+        if isinstance(value, list):
+            return [match_key(item, keys) for item in value]
+        return match_key(value, keys)
+    return value
+
+def repair_args(schema: Type[BaseModel], args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Argumentos reparados y validados contra `schema`, o None si no se pueden reparar"""
+    repaired = dict(args)
+    for name, field in schema.model_fields.items():
+        if name in repaired:
+            repaired[name] = _normalize_field(name, _coerce(repaired[name], field.annotation))
+    try:
+        return schema.model_validate(repaired).model_dump()
+    except ValidationError:
+        return None
+
+# ===============================================
+# ETAPA DE REPARACIÓN DEL AGENTE
+# ===============================================
+def _loose_json(text: str) -> Optional[Dict[str, Any]]:
+    """Argumentos con comillas simples u otros fallos leves de JSON"""
+    for candidate in (text, text.replace("'", '"')):
+        try:
+            data = json.loads(candidate)
+            return data if isinstance(data, dict) else None
+        except (TypeError, ValueError):
+            continue
+    return None
+
+class ToolCallRepairer:
+    """Repara los tool calls del mensaje del LLM antes del parser del agente"""
+
+    def __init__(self, schemas: Mapping[str, Type[BaseModel]]):
+        self.schemas = dict(schemas)
+        self._lock = threading.Lock()
+        self.stats = {"checked": 0, "repaired": 0, "unrepairable": 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _repair_call(self, name: str, args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        schema = self.schemas.get(name)
+        if schema is None:
+            return None
+        self._count("checked")
+        repaired = repair_args(schema, args)
+        if repaired is None:
+            self._count("unrepairable")
+        elif repaired != args:
+            self._count("repaired")
+            logger.debug("[ArgRepair] %s: %s -> %s", name, args, repaired)
+        return repaired
+
+    def __call__(self, message: AIMessage) -> AIMessage:
+        if not isinstance(message, AIMessage) or not (message.tool_calls or message.invalid_tool_calls):
+            return message
+        tool_calls = []
+        for call in message.tool_calls:
+            repaired = self._repair_call(call["name"], call["args"])
+            tool_calls.append({**call, "args": repaired} if repaired is not None else call)
+        invalid = []
+        for call in message.invalid_tool_calls:
+            args = _loose_json(call.get("args") or "")
+            repaired = self._repair_call(call.get("name"), args) if args is not None else None
+            if repaired is not None:
+                tool_calls.append({"name": call["name"], "args": repaired,
+                                   "id": call.get("id") or f"call_{uuid.uuid4().hex[:12]}", "type": "tool_call"})
+            else:
+                invalid.append(call)
+        additional_kwargs = message.additional_kwargs
+        if not invalid:
+            # Sin llamadas inválidas, el parser no debe recurrir a los argumentos crudos de additional_kwargs
+            additional_kwargs = {k: v for k, v in additional_kwargs.items() if k != "tool_calls"}
+        return message.model_copy(update={
+            "tool_calls": tool_calls,
+            "invalid_tool_calls": invalid,
+            "additional_kwargs": additional_kwargs,
+        })
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+def tool_schemas(tools: Sequence[BaseTool], overrides: Optional[Mapping[str, Type[BaseModel]]] = None) -> Dict[str, Type[BaseModel]]:
+    """Esquemas pydantic por herramienta: `overrides` o el args_schema de la herramienta"""
+    overrides = overrides or {}
+    schemas = {}
+    for tool in tools:
+        schema = overrides.get(tool.name, tool.args_schema)
+        if isinstance(schema, type) and issubclass(schema, BaseModel):
+            schemas[tool.name] = schema
+    return schemas
+
+def create_repairing_agent(llm, tools: Sequence[BaseTool], prompt: ChatPromptTemplate,
+                           schemas: Optional[Mapping[str, Type[BaseModel]]] = None,
+                           repairer: Optional[ToolCallRepairer] = None) -> Runnable:
+    """Igual que `create_tool_calling_agent`, con la etapa de reparación tras el LLM"""
+    repairer = repairer or ToolCallRepairer(tool_schemas(tools, schemas))
+    agent = (
+        RunnablePassthrough.assign(agent_scratchpad=lambda x: format_to_tool_messages(x["intermediate_steps"]))
+        | prompt
+        | llm.bind_tools(compiled_tools(tools))
+        | RunnableLambda(repairer, name="ToolCallRepairer")
+        | ToolsAgentOutputParser()
+    )
+    return agent
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de las topologías
+Tráfico sintético en bucle abierto (llegadas de Poisson) con una mezcla de
+mensajes tomada de los `examples` de TOOL_DESCRIPTIONS, usando el LLM falso y
+servidores MCP locales. Registra histogramas de latencia, tasas de error y el
+punto de saturación en un informe JSON que se puede comparar con una línea base.
+
+Uso:
+    python benchmarks/loadtest.py --topology stdio_tools --rates 5,10,20,50 --duration 20
+    python benchmarks/loadtest.py --topology http_tools --mix sumar=3,getWeather=1 --output actual.json
+    python benchmarks/loadtest.py --topology local --output actual.json --baseline base.json
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Servidores HTTP locales por topología (módulo ASGI, puerto por defecto)
+LOCAL_SERVERS = {
+    "http_tools": ("http_tools.orchestrator:app", 8000),
+    "http_full": ("http_full.orchestrator:app", 8001),
+}
+
+# ===============================================
+# MEZCLA DE MENSAJES
+# ===============================================
+def parse_mix(spec: Optional[str]) -> Dict[str, float]:
+    """'sumar=3,getWeather=1' -> {'sumar': 3.0, 'getWeather': 1.0}"""
+    if not spec:
+        return {}
+    weights = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+def build_message_mix(tool_descriptions: Dict[str, Dict], weights: Dict[str, float],
+                      default_exclude: Iterable[str] = ()) -> List[Tuple[str, str, float]]:
+    """Lista (herramienta, mensaje, peso); el peso de cada herramienta se reparte entre sus ejemplos.
+
+    Sin pesos la mezcla es uniforme salvo `default_exclude` (p. ej. las herramientas lentas), que
+    solo entran si se piden en `--mix`.
+    """
+    unknown = set(weights) - set(tool_descriptions)
+    if unknown:
+        raise ValueError(f"Herramientas desconocidas en la mezcla: {sorted(unknown)}")
+    mix = []
+    for name, desc in tool_descriptions.items():
+        weight = weights.get(name, 0.0 if weights or name in default_exclude else 1.0)
+        examples = desc.get("examples") or []
+        for example in examples:
+            if weight > 0:
+                mix.append((name, example, weight / len(examples)))
+    if not mix:
+        raise ValueError("La mezcla de mensajes está vacía")
+    return mix
+
+# ===============================================
+# HISTOGRAMA DE LATENCIAS
+# ===============================================
+class LatencyHistogram:
+    """Histograma con cubetas logarítmicas (error relativo acotado por `growth`)"""
+
+    def __init__(self, min_ms: float = 0.5, max_ms: float = 120_000.0, growth: float = 1.15):
+        count = int(math.ceil(math.log(max_ms / min_ms, growth))) + 1
+        self.bounds = [min_ms * growth ** i for i in range(count)]
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.max_ms = 0.0
+        self.sum_ms = 0.0
+
+    def record(self, value_ms: float):
+        self.counts[bisect.bisect_left(self.bounds, value_ms)] += 1
+        self.total += 1
+        self.sum_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, p: float) -> float:
+        if not self.total:
+            return 0.0
+        target = max(1, math.ceil(self.total * p / 100))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.bounds[i] if i < len(self.bounds) else self.max_ms, self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "mean": round(self.sum_ms / self.total, 2) if self.total else 0.0,
+            "p50": round(self.percentile(50), 2),
+            "p90": round(self.percentile(90), 2),
+            "p99": round(self.percentile(99), 2),
+            "max": round(self.max_ms, 2),
+        }
+
+    def buckets(self) -> Dict[str, int]:
+        """Cubetas no vacías: límite superior (ms) -> cuenta"""
+        out = {}
+        for i, count in enumerate(self.counts):
+            if count:
+                label = f"{self.bounds[i]:.2f}" if i < len(self.bounds) else "inf"
+                out[label] = count
+        return out
+
+# ===============================================
+# SERVIDORES MCP LOCALES
+# ===============================================
+def _wait_for_port(port: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            sock.settimeout(0.5)
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return True
+        time.sleep(0.2)
+    return False
+
+def start_local_server(topology: str, port: Optional[int] = None,
+                       timeout: float = 30.0) -> Optional[subprocess.Popen]:
+    """Arranca el servidor HTTP de la topología (si lo tiene) y fija SERVER_URL"""
+    if topology not in LOCAL_SERVERS:
+        return None
+    module, default_port = LOCAL_SERVERS[topology]
+    port = port or default_port
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", module, "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=dict(os.environ),
+    )
+    if not _wait_for_port(port, timeout):
+        proc.kill()
+        raise RuntimeError(f"El servidor {module} no abrió el puerto {port} en {timeout}s")
+    os.environ["SERVER_URL"] = f"http://127.0.0.1:{port}/sse"
+    return proc
+
+def stop_local_server(proc: Optional[subprocess.Popen]):
+    if proc is None:
+        return
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+# ===============================================
+# GENERADOR DE TRÁFICO (BUCLE ABIERTO)
+# ===============================================
+async def run_step(handler: Callable[[str], Awaitable[Any]], mix: List[Tuple[str, str, float]],
+                   rate: float, duration: float, timeout: float, rng: random.Random) -> Dict[str, Any]:
+    """Lanza peticiones a `rate` req/s durante `duration` s sin esperar a las anteriores.
+
+    La latencia se mide desde el instante programado de llegada, de modo que
+    el tiempo en cola del sistema saturado también cuenta.
+    """
+    loop = asyncio.get_running_loop()
+    messages = [(tool, message) for tool, message, _ in mix]
+    weights = [weight for _, _, weight in mix]
+    histogram = LatencyHistogram()
+    per_tool: Dict[str, LatencyHistogram] = {}
+    errors: Dict[str, int] = {}
+
+    async def one(scheduled: float, tool: str, message: str):
+        try:
+            await asyncio.wait_for(handler(message), timeout=timeout)
+        except Exception as e:
+            name = "Timeout" if isinstance(e, asyncio.TimeoutError) else type(e).__name__
+            errors[name] = errors.get(name, 0) + 1
+            return
+        latency_ms = (loop.time() - scheduled) * 1000
+        histogram.record(latency_ms)
+        per_tool.setdefault(tool, LatencyHistogram()).record(latency_ms)
+
+    start = loop.time()
+    offset = 0.0
+    tasks = []
+    while True:
+        offset += rng.expovariate(rate)
+        if offset >= duration:
+            break
+        scheduled = start + offset
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tool, message = rng.choices(messages, weights=weights)[0]
+        tasks.append(asyncio.create_task(one(scheduled, tool, message)))
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - start
+
+    sent = len(tasks)
+    failed = sum(errors.values())
+    return {
+        "rate": rate,
+        "sent": sent,
+        "ok": histogram.total,
+        "errors": errors,
+        "error_rate": round(failed / sent, 4) if sent else 0.0,
+        "throughput": round(histogram.total / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": histogram.summary(),
+        "per_tool_ms": {tool: h.summary() for tool, h in sorted(per_tool.items())},
+        "histogram_ms": histogram.buckets(),
+    }
+
+def is_saturated(step: Dict[str, Any], slo_p99_ms: float, max_error_rate: float) -> bool:
+    """El paso supera el SLO de p99 o la tasa de error máxima.
+
+    En bucle abierto, no sostener el ritmo ofrecido se traduce en cola y, por
+    tanto, en p99 creciente (la latencia se mide desde la llegada programada).
+    """
+    return step["latency_ms"]["p99"] > slo_p99_ms or step["error_rate"] > max_error_rate
+
+async def run_load_test(topology: str, rates: List[float], duration: float, mix: List[Tuple[str, str, float]],
+                        timeout: float, slo_p99_ms: float, max_error_rate: float, seed: int,
+                        stop_at_saturation: bool = True) -> Dict[str, Any]:
+    from api_server import build_orchestrator, resolve_handler
+
+    orchestrator = build_orchestrator(topology)
+    handler = resolve_handler(orchestrator)
+
+    # Primera petición fuera de la medida: inicialización y descubrimiento de herramientas
+    init_start = time.perf_counter()
+    await handler(mix[0][1])
+    init_ms = (time.perf_counter() - init_start) * 1000
+
+    rng = random.Random(seed)
+    steps = []
+    saturation_rate = None
+    for rate in rates:
+        step = await run_step(handler, mix, rate, duration, timeout, rng)
+        step["saturated"] = is_saturated(step, slo_p99_ms, max_error_rate)
+        steps.append(step)
+        print(f"  {rate:>8.1f} req/s -> {step['throughput']:>8.1f} ok/s  p50={step['latency_ms']['p50']:.1f}ms "
+              f"p99={step['latency_ms']['p99']:.1f}ms  errores={step['error_rate']:.2%}"
+              f"{'  [SATURADO]' if step['saturated'] else ''}")
+        if step["saturated"]:
+            saturation_rate = rate
+            if stop_at_saturation:
+                break
+
+    sustained = [s["rate"] for s in steps if not s["saturated"]]
+    return {
+        "topology": topology,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "rates": rates,
+            "duration_s": duration,
+            "timeout_s": timeout,
+            "slo_p99_ms": slo_p99_ms,
+            "max_error_rate": max_error_rate,
+            "seed": seed,
+            "fake_llm": os.getenv("MCP_FAKE_LLM") == "1",
+            "fake_llm_latency_s": float(os.getenv("MCP_FAKE_LLM_LATENCY", "0")),
+            "mix": [{"tool": tool, "message": message, "weight": round(weight, 4)}
+                    for tool, message, weight in mix],
+        },
+        "init_ms": round(init_ms, 2),
+        "steps": steps,
+        "saturation_rate": saturation_rate,
+        "max_sustained_rate": max(sustained) if sustained else None,
+    }
+
+# ===============================================
+# COMPARACIÓN CON LÍNEA BASE
+# ===============================================
+def diff_reports(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.1) -> Dict[str, Any]:
+    """Compara paso a paso (mismo ritmo) p50/p99, tasa de error y capacidad sostenida"""
+    base_steps = {step["rate"]: step for step in baseline.get("steps", [])}
+    rows = []
+    regressions = []
+    for step in current.get("steps", []):
+        base = base_steps.get(step["rate"])
+        if base is None:
+            continue
+        row = {
+            "rate": step["rate"],
+            "p50_ms": [base["latency_ms"]["p50"], step["latency_ms"]["p50"]],
+            "p99_ms": [base["latency_ms"]["p99"], step["latency_ms"]["p99"]],
+            "error_rate": [base["error_rate"], step["error_rate"]],
+            "throughput": [base["throughput"], step["throughput"]],
+        }
+        rows.append(row)
+        if step["latency_ms"]["p99"] > base["latency_ms"]["p99"] * (1 + tolerance):
+            regressions.append(f"p99 a {step['rate']} req/s: {row['p99_ms'][0]} -> {row['p99_ms'][1]} ms")
+        if step["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f"errores a {step['rate']} req/s: {row['error_rate'][0]:.2%} -> {row['error_rate'][1]:.2%}")
+
+    base_capacity = baseline.get("max_sustained_rate") or 0
+    capacity = current.get("max_sustained_rate") or 0
+    if capacity < base_capacity:
+        regressions.append(f"capacidad sostenida: {base_capacity} -> {capacity} req/s")
+    return {
+        "baseline_topology": baseline.get("topology"),
+        "steps": rows,
+        "max_sustained_rate": [base_capacity, capacity],
+        "regressions": regressions,
+    }
+
+def print_diff(diff: Dict[str, Any]):
+    print("\n=== COMPARACIÓN CON LÍNEA BASE ===")
+    print(f"{'req/s':>8} {'p50 base':>10} {'p50':>10} {'p99 base':>10} {'p99':>10} {'err base':>9} {'err':>9}")
+    for row in diff["steps"]:
+        print(f"{row['rate']:>8.1f} {row['p50_ms'][0]:>10.1f} {row['p50_ms'][1]:>10.1f} "
+              f"{row['p99_ms'][0]:>10.1f} {row['p99_ms'][1]:>10.1f} "
+              f"{row['error_rate'][0]:>9.2%} {row['error_rate'][1]:>9.2%}")
+    base_capacity, capacity = diff["max_sustained_rate"]
+    print(f"Capacidad sostenida: {base_capacity} -> {capacity} req/s")
+    for regression in diff["regressions"]:
+        print(f"  ❌ Regresión: {regression}")
+    if not diff["regressions"]:
+        print("  ✅ Sin regresiones")
+
+# ===============================================
+# CLI
+# ===============================================
+def main() -> int:
+    from api_server import TOPOLOGIES
+
+    parser = argparse.ArgumentParser(description="Prueba de carga de bucle abierto para las topologías")
+    parser.add_argument("--topology", choices=TOPOLOGIES, default="local")
+    parser.add_argument("--rates", default="5,10,20,50,100", help="Ritmos de llegada (req/s) separados por comas")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos por ritmo")
+    parser.add_argument("--mix", help="Pesos por herramienta, p. ej. 'sumar=3,getWeather=1' (por defecto uniforme)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por petición (s)")
+    parser.add_argument("--slo-p99", type=float, default=2000.0, help="p99 máximo (ms) antes de considerar saturación")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--all-rates", action="store_true", help="No detenerse en el primer ritmo saturado")
+    parser.add_argument("--real-llm", action="store_true", help="Usar el LLM real en lugar del falso")
+    parser.add_argument("--llm-latency", type=float, help="Latencia simulada del LLM falso (s)")
+    parser.add_argument("--no-server", action="store_true", help="No arrancar el servidor HTTP local (usar SERVER_URL)")
+    parser.add_argument("--port", type=int, help="Puerto del servidor HTTP local")
+    parser.add_argument("--output", help="Fichero JSON del informe")
+    parser.add_argument("--baseline", help="Informe JSON de línea base para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Empeoramiento relativo de p99 tolerado")
+    args = parser.parse_args()
+
+    # Antes de importar los orquestadores y de arrancar servidores (heredan el entorno)
+    if not args.real_llm:
+        os.environ["MCP_FAKE_LLM"] = "1"
+    if args.llm_latency is not None:
+        os.environ["MCP_FAKE_LLM_LATENCY"] = str(args.llm_latency)
+
+    from orchestrators import TOOL_DESCRIPTIONS
+    from tool_registry import job_tool_names
+
+    # Los trabajos asíncronos (estadisticas_lista) no entran en la mezcla por defecto
+    mix = build_message_mix(TOOL_DESCRIPTIONS, parse_mix(args.mix), default_exclude=job_tool_names())
+    rates = [float(rate) for rate in args.rates.split(",")]
+
+    server = None if args.no_server else start_local_server(args.topology, args.port)
+    try:
+        print(f"=== PRUEBA DE CARGA: {args.topology} ===")
+        report = asyncio.run(run_load_test(
+            args.topology, rates, args.duration, mix, args.timeout,
+            args.slo_p99, args.max_error_rate, args.seed,
+            stop_at_saturation=not args.all_rates,
+        ))
+    finally:
+        stop_local_server(server)
+
+    print(f"Saturación: {report['saturation_rate']} req/s | "
+          f"capacidad sostenida: {report['max_sustained_rate']} req/s")
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            diff = diff_reports(report, json.load(f), args.tolerance)
+        report["baseline_diff"] = diff
+        print_diff(diff)
+        status = 1 if diff["regressions"] else 0
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Informe: {args.output}")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
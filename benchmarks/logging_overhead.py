@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Coste por petición de cada configuración de logging
+Ejecuta el orquestador local con el LLM falso en un subproceso por
+configuración (verbose del agente, niveles, handler síncrono / asíncrono,
+muestreo) y compara la latencia y la CPU por petición con una línea base sin logs.
+
+Uso:
+    python benchmarks/logging_overhead.py --requests 500
+    python benchmarks/logging_overhead.py --requests 200 --console   # salida real a la terminal
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MESSAGES = ["suma 5 y 3", "multiplica 4 por 5", "usuario 123", "clima en Madrid"]
+
+# Nombre -> variables de entorno (sobre MCP_FAKE_LLM=1)
+CONFIGS: Dict[str, Dict[str, str]] = {
+    "sin logs": {"MCP_LOG_LEVEL": "CRITICAL"},
+    "verbose agente (stdout)": {"MCP_LOG_LEVEL": "WARNING", "MCP_AGENT_VERBOSE": "1"},
+    "WARNING": {"MCP_LOG_LEVEL": "WARNING"},
+    "INFO síncrono": {"MCP_LOG_LEVEL": "INFO", "MCP_LOG_ASYNC": "0"},
+    "INFO asíncrono": {"MCP_LOG_LEVEL": "INFO"},
+    "DEBUG síncrono": {"MCP_LOG_LEVEL": "DEBUG", "MCP_LOG_ASYNC": "0"},
+    "DEBUG asíncrono": {"MCP_LOG_LEVEL": "DEBUG"},
+    "DEBUG asíncrono muestreo 10%": {"MCP_LOG_LEVEL": "DEBUG", "MCP_LOG_SAMPLE": "0.1"},
+    "DEBUG asíncrono buffer 64": {"MCP_LOG_LEVEL": "DEBUG", "MCP_LOG_BUFFER": "64"},
+}
+
+# ===============================================
+# PROCESO HIJO: UNA CONFIGURACIÓN
+# ===============================================
+async def _run_child(requests: int, output: str):
+    from benchmarks.loadtest import LatencyHistogram
+    from logging_setup import configure_logging, shutdown_logging
+    from orchestrators import LocalOrchestrator
+
+    configure_logging()
+    orchestrator = LocalOrchestrator()
+    for message in MESSAGES:
+        await orchestrator.aprocess_message(message)
+
+    histogram = LatencyHistogram(min_ms=0.01)
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for i in range(requests):
+        start = time.perf_counter()
+        await orchestrator.aprocess_message(MESSAGES[i % len(MESSAGES)])
+        histogram.record((time.perf_counter() - start) * 1000)
+    result = {
+        "latency_ms": histogram.summary(),
+        "cpu_ms_per_request": (time.process_time() - cpu_start) * 1000 / requests,
+        "wall_s": time.perf_counter() - wall_start,
+    }
+    # CPU del hilo de escritura incluida hasta que se vacía la cola
+    shutdown_logging()
+    result["cpu_ms_per_request_with_flush"] = (time.process_time() - cpu_start) * 1000 / requests
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+# ===============================================
+# PROCESO PADRE: TODAS LAS CONFIGURACIONES
+# ===============================================
+def run_config(name: str, requests: int, console: bool) -> Dict[str, Any]:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        output = f.name
+    env = {**os.environ, "MCP_FAKE_LLM": "1", **CONFIGS[name]}
+    for key in ("MCP_PROFILE", "MCP_RECORD", "MCP_REPLAY"):
+        env.pop(key, None)
+    sink = None if console else subprocess.DEVNULL
+    subprocess.run([sys.executable, os.path.abspath(__file__), "--child", "--requests", str(requests),
+                    "--output", output], env=env, cwd=ROOT, stdout=sink, stderr=sink, check=True)
+    with open(output, encoding="utf-8") as f:
+        result = json.load(f)
+    os.unlink(output)
+    return result
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Coste por petición de cada nivel/handler de logging")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3, help="Rondas por configuración (se toma la mediana)")
+    parser.add_argument("--configs", help="Configuraciones separadas por comas (por defecto todas)")
+    parser.add_argument("--console", action="store_true",
+                        help="Escribir los logs en la terminal (por defecto se descartan en /dev/null)")
+    parser.add_argument("--output", help="Fichero JSON del informe")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(_run_child(args.requests, args.output))
+        return 0
+
+    names = args.configs.split(",") if args.configs else list(CONFIGS)
+    # Rondas intercaladas; se queda la mediana de CPU por configuración (menos ruido entre procesos)
+    runs: Dict[str, list] = {name: [] for name in names}
+    for _ in range(args.repeat):
+        for name in names:
+            runs[name].append(run_config(name, args.requests, args.console))
+    report = {name: sorted(results, key=lambda r: r["cpu_ms_per_request_with_flush"])[len(results) // 2]
+              for name, results in runs.items()}
+    baseline = report[names[0]]
+
+    print(f"\n=== COSTE DEL LOGGING ({args.requests} peticiones x {args.repeat} rondas, LLM falso) ===")
+    print(f"{'configuración':<30} {'p50 ms':>8} {'media ms':>9} {'CPU ms':>8} {'Δ CPU ms':>9}")
+    for name, result in report.items():
+        delta = result["cpu_ms_per_request_with_flush"] - baseline["cpu_ms_per_request_with_flush"]
+        result["cpu_overhead_ms"] = round(delta, 4)
+        print(f"{name:<30} {result['latency_ms']['p50']:>8.3f} {result['latency_ms']['mean']:>9.3f} "
+              f"{result['cpu_ms_per_request_with_flush']:>8.3f} {delta:>+9.3f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Informe: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
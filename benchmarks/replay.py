@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Reproducción de tráfico grabado contra la versión actual del código
+Vuelve a lanzar los mensajes de una grabación (MCP_RECORD, ver recording.py)
+sirviendo las respuestas del LLM y de las herramientas MCP desde el log, sin
+OpenAI ni servidores. Mide latencia y CPU por petición y compara con una
+línea base para detectar regresiones del agente o del transporte.
+
+Uso:
+    MCP_RECORD=trafico.jsonl python api_server.py --topology stdio_tools   # grabar
+    python benchmarks/replay.py trafico.jsonl --topology stdio_tools --output antes.json
+    python benchmarks/replay.py trafico.jsonl --topology stdio_tools --baseline antes.json
+    python benchmarks/replay.py trafico.jsonl --speed recorded                # a la velocidad grabada
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.loadtest import LatencyHistogram
+
+async def run_replay(topology: str, inputs: List[str], repeat: int = 1) -> Dict[str, Any]:
+    from api_server import build_orchestrator, resolve_handler
+    from recording import get_traffic
+
+    orchestrator = build_orchestrator(topology)
+    handler = resolve_handler(orchestrator)
+
+    histogram = LatencyHistogram()
+    cpu = LatencyHistogram()
+    errors = 0
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for _ in range(repeat):
+        for message in inputs:
+            start, cpu_before = time.perf_counter(), time.process_time()
+            try:
+                await handler(message)
+            except Exception as e:
+                errors += 1
+                print(f"  ❌ {message!r}: {e}")
+            histogram.record((time.perf_counter() - start) * 1000)
+            cpu.record((time.process_time() - cpu_before) * 1000)
+
+    total = len(inputs) * repeat
+    return {
+        "topology": topology,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "requests": total,
+        "errors": errors,
+        "wall_s": round(time.perf_counter() - wall_start, 4),
+        "cpu_s": round(time.process_time() - cpu_start, 4),
+        "latency_ms": histogram.summary(),
+        "cpu_ms": cpu.summary(),
+        "replay": get_traffic().stats,
+    }
+
+def diff_replays(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.1) -> Dict[str, Any]:
+    """Compara p50/p99 de latencia y CPU total con la línea base"""
+    rows = {
+        "latency_p50_ms": [baseline["latency_ms"]["p50"], current["latency_ms"]["p50"]],
+        "latency_p99_ms": [baseline["latency_ms"]["p99"], current["latency_ms"]["p99"]],
+        "cpu_per_request_ms": [baseline["cpu_s"] * 1000 / max(baseline["requests"], 1),
+                               current["cpu_s"] * 1000 / max(current["requests"], 1)],
+    }
+    regressions = [
+        f"{name}: {before:.2f} -> {after:.2f}"
+        for name, (before, after) in rows.items() if after > before * (1 + tolerance)
+    ]
+    if current["errors"] > baseline["errors"]:
+        regressions.append(f"errores: {baseline['errors']} -> {current['errors']}")
+    return {"metrics": rows, "regressions": regressions}
+
+def main() -> int:
+    from api_server import TOPOLOGIES
+
+    parser = argparse.ArgumentParser(description="Reproduce tráfico grabado y mide latencia/CPU")
+    parser.add_argument("recording", help="Log JSONL grabado con MCP_RECORD")
+    parser.add_argument("--topology", choices=TOPOLOGIES, default="local")
+    parser.add_argument("--speed", default="fast", help="fast, recorded o factor sobre el tiempo grabado")
+    parser.add_argument("--repeat", type=int, default=1, help="Veces que se reproduce la grabación")
+    parser.add_argument("--output", help="Fichero JSON del informe")
+    parser.add_argument("--baseline", help="Informe JSON de línea base para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Empeoramiento relativo tolerado")
+    args = parser.parse_args()
+
+    # Antes de importar los orquestadores (el modo se decide por entorno)
+    os.environ["MCP_REPLAY"] = args.recording
+    os.environ["MCP_REPLAY_SPEED"] = args.speed
+    os.environ.pop("MCP_RECORD", None)
+
+    from recording import get_traffic
+
+    inputs = get_traffic().inputs()
+    if not inputs:
+        print("La grabación no contiene mensajes de usuario")
+        return 1
+
+    print(f"=== REPRODUCCIÓN: {args.topology} ({len(inputs)} mensajes x {args.repeat}) ===")
+    report = asyncio.run(run_replay(args.topology, inputs, args.repeat))
+    print(f"Latencia: p50={report['latency_ms']['p50']:.2f}ms p99={report['latency_ms']['p99']:.2f}ms | "
+          f"CPU: {report['cpu_s']:.3f}s | errores: {report['errors']} | {report['replay']}")
+
+    status = 1 if report["errors"] else 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            diff = diff_replays(report, json.load(f), args.tolerance)
+        report["baseline_diff"] = diff
+        print("\n=== COMPARACIÓN CON LÍNEA BASE ===")
+        for name, (before, after) in diff["metrics"].items():
+            print(f"  {name:<20} {before:>10.2f} -> {after:>10.2f}")
+        for regression in diff["regressions"]:
+            print(f"  ❌ Regresión: {regression}")
+        if not diff["regressions"]:
+            print("  ✅ Sin regresiones")
+        status = status or (1 if diff["regressions"] else 0)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Informe: {args.output}")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
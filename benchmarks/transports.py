@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Coste del transporte MCP: en proceso vs stdio vs SSE
+Mide la latencia y la CPU del cliente por llamada a herramienta sobre una
+sesión abierta de cada transporte (mismas herramientas de stdio_tools /
+http_tools) y, con --agent, por petición completa del orquestador con el LLM falso.
+La CPU de stdio y SSE no incluye la del proceso servidor.
+
+Uso:
+    python benchmarks/transports.py --calls 2000
+    python benchmarks/transports.py --calls 500 --agent --output transportes.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.loadtest import LatencyHistogram, start_local_server, stop_local_server
+
+TRANSPORTS = ["inprocess", "stdio", "sse"]
+
+# Herramienta -> argumentos (una aritmética y una con backend y resultado compacto)
+CALLS = [("sumar", {"a": 5, "b": 3}), ("getUserInfo", {"user_id": "123"})]
+MESSAGES = ["suma 5 y 3", "usuario 123", "clima en Madrid", "multiplica 4 por 5"]
+
+@contextlib.asynccontextmanager
+async def open_session(transport: str, port: int):
+    """Sesión MCP inicializada contra el servidor de herramientas por el transporte dado"""
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+
+    if transport == "inprocess":
+        from inprocess import InProcessMCPClient, load_server
+        client = InProcessMCPClient({"tools": load_server()})
+    elif transport == "stdio":
+        client = MultiServerMCPClient({"tools": {
+            "transport": "stdio",
+            "command": sys.executable,
+            "args": [os.path.join(ROOT, "stdio_tools", "tools_server.py")],
+            "env": dict(os.environ),
+        }})
+    else:
+        client = MultiServerMCPClient({"tools": {"transport": "sse", "url": f"http://127.0.0.1:{port}/sse"}})
+    async with client.session("tools") as session:
+        yield session
+
+async def bench_tool_calls(transport: str, calls: int, port: int) -> Dict[str, Any]:
+    async with open_session(transport, port) as session:
+        for name, args in CALLS:
+            await session.call_tool(name, args)
+        results = {}
+        for name, args in CALLS:
+            histogram = LatencyHistogram(min_ms=0.01)
+            cpu_start = time.process_time()
+            for _ in range(calls):
+                start = time.perf_counter()
+                await session.call_tool(name, args)
+                histogram.record((time.perf_counter() - start) * 1000)
+            results[name] = {
+                "latency_ms": histogram.summary(),
+                "client_cpu_ms_per_call": round((time.process_time() - cpu_start) * 1000 / calls, 4),
+            }
+        return results
+
+def build_orchestrator(transport: str, port: int):
+    import orchestrators
+
+    if transport == "inprocess":
+        return orchestrators.MCPOrchestratorInProcess()
+    if transport == "stdio":
+        return orchestrators.MCPOrchestrator(server_path=os.path.join(ROOT, "stdio_tools", "tools_server.py"))
+    return orchestrators.MCPOrchestratorHTTP(server_url=f"http://127.0.0.1:{port}/sse")
+
+async def bench_agent(transport: str, requests: int, port: int) -> Dict[str, Any]:
+    orchestrator = build_orchestrator(transport, port)
+    await orchestrator.initialize()
+    for message in MESSAGES:
+        await orchestrator.process_message(message)
+    histogram = LatencyHistogram(min_ms=0.01)
+    cpu_start = time.process_time()
+    for i in range(requests):
+        start = time.perf_counter()
+        await orchestrator.process_message(MESSAGES[i % len(MESSAGES)])
+        histogram.record((time.perf_counter() - start) * 1000)
+    result = {
+        "latency_ms": histogram.summary(),
+        "client_cpu_ms_per_request": round((time.process_time() - cpu_start) * 1000 / requests, 4),
+    }
+    await orchestrator.aclose()
+    return result
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Latencia y CPU por llamada de cada transporte MCP")
+    parser.add_argument("--calls", type=int, default=1000, help="Llamadas por herramienta y transporte")
+    parser.add_argument("--transports", default=",".join(TRANSPORTS))
+    parser.add_argument("--agent", action="store_true", help="Medir también peticiones completas del orquestador")
+    parser.add_argument("--requests", type=int, default=200, help="Peticiones del orquestador con --agent")
+    parser.add_argument("--port", type=int, default=8010, help="Puerto del servidor SSE local")
+    parser.add_argument("--output", help="Fichero JSON del informe")
+    args = parser.parse_args()
+
+    os.environ["MCP_FAKE_LLM"] = "1"
+    os.environ.setdefault("MCP_LOG_LEVEL", "WARNING")
+    from logging_setup import configure_logging
+    configure_logging()
+
+    transports: List[str] = [t.strip() for t in args.transports.split(",") if t.strip()]
+    server = start_local_server("http_tools", port=args.port) if "sse" in transports else None
+    report: Dict[str, Any] = {"calls": args.calls, "tools": {}, "agent": {}}
+    try:
+        for transport in transports:
+            report["tools"][transport] = asyncio.run(bench_tool_calls(transport, args.calls, args.port))
+            if args.agent:
+                report["agent"][transport] = asyncio.run(bench_agent(transport, args.requests, args.port))
+    finally:
+        stop_local_server(server)
+
+    print(f"\n=== LLAMADAS A HERRAMIENTAS ({args.calls} por herramienta) ===")
+    print(f"{'transporte':<10} {'herramienta':<12} {'p50 ms':>8} {'p99 ms':>8} {'CPU ms':>8}")
+    for transport, tools in report["tools"].items():
+        for name, data in tools.items():
+            print(f"{transport:<10} {name:<12} {data['latency_ms']['p50']:>8.3f} {data['latency_ms']['p99']:>8.3f} "
+                  f"{data['client_cpu_ms_per_call']:>8.3f}")
+    if args.agent:
+        print(f"\n=== PETICIONES DEL ORQUESTADOR ({args.requests}, LLM falso) ===")
+        for transport, data in report["agent"].items():
+            print(f"{transport:<10} p50={data['latency_ms']['p50']:.3f}ms p99={data['latency_ms']['p99']:.3f}ms "
+                  f"CPU={data['client_cpu_ms_per_request']:.3f}ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Informe: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
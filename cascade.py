@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Cascada de modelos para el enrutado de herramientas
+Un modelo pequeño (más barato o alojado localmente) hace la primera pasada; su
+respuesta se repara (arg_repair.py) y se valida contra los esquemas pydantic de
+las herramientas, y se escala al modelo grande (gpt-4o) solo si la validación
+falla o la confianza es baja.
+"""
+
+import logging
+import math
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Type
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import BaseModel, ValidationError
+
+from arg_repair import ToolCallRepairer
+
+logger = logging.getLogger(__name__)
+
+# ===============================================
+# VALIDACIÓN DE LA PRIMERA PASADA
+# ===============================================
+def _tool_schemas(tools: Sequence[Any], overrides: Mapping[str, Type[BaseModel]]) -> Dict[str, Any]:
+    """Nombre -> esquema: pydantic de `overrides`, args_schema de la herramienta o JSON schema"""
+    schemas: Dict[str, Any] = {}
+    for tool in tools:
+        if isinstance(tool, BaseTool):
+            name, schema = tool.name, tool.args_schema
+        else:
+            function = convert_to_openai_tool(tool)["function"]
+            name, schema = function["name"], function.get("parameters")
+        schemas[name] = overrides.get(name, schema)
+    return schemas
+
+def _validate_args(schema: Any, args: Dict[str, Any]) -> Optional[str]:
+    """None si los argumentos encajan en el esquema; motivo del rechazo en otro caso"""
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        try:
+            schema.model_validate(args)
+        except ValidationError as e:
+            return f"argumentos inválidos: {e.errors()[0].get('msg')}"
+        return None
+    if isinstance(schema, dict):
+        missing = [key for key in schema.get("required", []) if key not in args]
+        if missing:
+            return f"faltan argumentos: {missing}"
+        properties = schema.get("properties") or {}
+        unknown = [key for key in args if properties and key not in properties]
+        if unknown:
+            return f"argumentos desconocidos: {unknown}"
+    return None
+
+def validate_tool_calls(message: AIMessage, schemas: Mapping[str, Any]) -> Optional[str]:
+    """Comprueba que las llamadas a herramientas parsean y validan; devuelve el motivo si no"""
+    if message.invalid_tool_calls:
+        return "llamada a herramienta no parseable"
+    for call in message.tool_calls:
+        if call["name"] not in schemas:
+            return f"herramienta desconocida: {call['name']}"
+        reason = _validate_args(schemas[call["name"]], call["args"])
+        if reason:
+            return f"{call['name']}: {reason}"
+    return None
+
+def message_confidence(message: AIMessage) -> float:
+    """Confianza declarada por el modelo (`confidence`) o media geométrica de los logprobs"""
+    metadata = message.response_metadata or {}
+    if "confidence" in metadata:
+        return float(metadata["confidence"])
+    content = (metadata.get("logprobs") or {}).get("content") or []
+    logprobs = [token["logprob"] for token in content if "logprob" in token]
+    if logprobs:
+        return math.exp(sum(logprobs) / len(logprobs))
+    return 1.0
+
+def _is_routing_turn(messages: Sequence[BaseMessage]) -> bool:
+    """Primera decisión del agente (aún no hay resultados de herramientas)"""
+    return not any(isinstance(m, ToolMessage) for m in messages)
+
+# ===============================================
+# MODELO EN CASCADA
+# ===============================================
+class CascadeStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"small": 0, "escalated": 0}
+        self.reasons: Dict[str, int] = {}
+
+    def record(self, escalated_reason: Optional[str]):
+        with self._lock:
+            if escalated_reason is None:
+                self.counts["small"] += 1
+                return
+            self.counts["escalated"] += 1
+            kind = escalated_reason.split(":")[0]
+            self.reasons[kind] = self.reasons.get(kind, 0) + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.counts, "reasons": dict(self.reasons)}
+
+class CascadeChatModel(BaseChatModel):
+    """Chat model que prueba `small` y escala a `large`.
+
+    Se escala si la respuesta del pequeño no valida contra los esquemas, si su
+    confianza es menor que `min_confidence` o, en el turno de enrutado, si no
+    llama a ninguna herramienta (`escalate_on_no_tool`). Antes de validar se
+    reparan sus argumentos igual que en la etapa del agente: una llamada que
+    `repair_args` corrige ("cinco" -> 5) no se escala.
+    """
+
+    small: Any
+    large: Any
+    schemas: Dict[str, Any] = {}
+    min_confidence: float = 0.0
+    escalate_on_no_tool: bool = True
+    stats: Any = None
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        if self.stats is None:
+            self.stats = CascadeStats()
+
+    @property
+    def _llm_type(self) -> str:
+        return "cascade"
+
+    def _escalation_reason(self, message: AIMessage, messages: Sequence[BaseMessage],
+                           schemas: Mapping[str, Any]) -> Optional[str]:
+        if message.tool_calls or message.invalid_tool_calls:
+            reason = validate_tool_calls(message, schemas)
+            if reason:
+                return f"validation: {reason}"
+        elif self.escalate_on_no_tool and schemas and _is_routing_turn(messages):
+            return "no_tool: el modelo pequeño no eligió herramienta"
+        confidence = message_confidence(message)
+        if confidence < self.min_confidence:
+            return f"low_confidence: {confidence:.2f}"
+        return None
+
+    def _decide(self, message: AIMessage, messages: Sequence[BaseMessage],
+                schemas: Mapping[str, Any]) -> Optional[str]:
+        reason = self._escalation_reason(message, messages, schemas)
+        self.stats.record(reason)
+        if reason:
+            logger.info("[Cascade] escalando a modelo grande (%s)", reason)
+        return reason
+
+    # --- Sin herramientas: mismo criterio de confianza ---
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        message = self.small.invoke(messages, stop=stop, **kwargs)
+        if self._decide(message, messages, {}):
+            message = self.large.invoke(messages, stop=stop, **kwargs)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        message = await self.small.ainvoke(messages, stop=stop, **kwargs)
+        if self._decide(message, messages, {}):
+            message = await self.large.ainvoke(messages, stop=stop, **kwargs)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    # --- Con herramientas: lo que usa create_tool_calling_agent ---
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable:
+        small = self.small.bind_tools(tools, **kwargs)
+        large = self.large.bind_tools(tools, **kwargs)
+        schemas = _tool_schemas(tools, self.schemas)
+        repair = ToolCallRepairer({name: schema for name, schema in schemas.items()
+                                   if isinstance(schema, type) and issubclass(schema, BaseModel)})
+
+        def _messages(value: Any) -> List[BaseMessage]:
+            return value.to_messages() if isinstance(value, PromptValue) else list(value)
+
+        def _route(value: Any, config: RunnableConfig) -> AIMessage:
+            message = repair(small.invoke(value, config))
+            if self._decide(message, _messages(value), schemas):
+                message = large.invoke(value, config)
+            return message
+
+        async def _aroute(value: Any, config: RunnableConfig) -> AIMessage:
+            message = repair(await small.ainvoke(value, config))
+            if self._decide(message, _messages(value), schemas):
+                message = await large.ainvoke(value, config)
+            return message
+
+        return RunnableLambda(_route, afunc=_aroute, name="CascadeChatModel")
+
+    def metrics(self) -> Dict[str, Any]:
+        return self.stats.to_dict()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Concurrencia: ejecución de herramientas síncronas fuera del event loop
+Pool de hilos acotado compartido por los orquestadores asíncronos
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """Pool de hilos acotado para herramientas síncronas (LOCAL_TOOL_WORKERS)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("LOCAL_TOOL_WORKERS", "16")),
+                thread_name_prefix="local-tool",
+            )
+        return _executor
+
+def offload_tool(tool: BaseTool, executor: Optional[ThreadPoolExecutor] = None) -> BaseTool:
+    """Añade a una herramienta síncrona una corrutina que corre en el pool acotado.
+
+    Las herramientas que ya son asíncronas se devuelven sin cambios.
+    """
+    func = getattr(tool, "func", None)
+    if func is None or getattr(tool, "coroutine", None) is not None:
+        return tool
+    pool = executor or get_tool_executor()
+
+    async def _coroutine(**kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, functools.partial(func, **kwargs))
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        func=func,
+        coroutine=_coroutine,
+        return_direct=tool.return_direct,
+        metadata=tool.metadata,
+    )
+
+def offload_tools(tools: Iterable[BaseTool], executor: Optional[ThreadPoolExecutor] = None) -> List[BaseTool]:
+    return [offload_tool(tool, executor) for tool in tools]
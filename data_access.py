@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Capa de acceso a datos para las herramientas de consulta
+Índices cargados una sola vez con backend intercambiable (memoria, SQLite,
+fichero mapeado en memoria), consultas en bloque y refresco en segundo plano.
+"""
+
+import contextlib
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# ===============================================
+# DATOS DE EJEMPLO
+# ===============================================
+USERS_SEED = {
+    "123": {"name": "Juan Pérez", "email": "juan@example.com", "active": True},
+    "456": {"name": "María García", "email": "maria@example.com", "active": False},
+}
+
+WEATHER_SEED = {
+    "nueva york": {"temp": "22°C", "condition": "Soleado"},
+    "madrid": {"temp": "18°C", "condition": "Nublado"},
+    "londres": {"temp": "15°C", "condition": "Lluvioso"},
+}
+
+USER_NOT_FOUND = {"error": "Usuario no encontrado"}
+LOCATION_NOT_FOUND = {"error": "Ubicación no encontrada"}
+
+# ===============================================
+# NORMALIZACIÓN DE CLAVES
+# ===============================================
+LOCATION_ALIASES = {
+    "nyc": "nueva york",
+    "ny": "nueva york",
+    "new york": "nueva york",
+    "new york city": "nueva york",
+    "london": "londres",
+    "mad": "madrid",
+}
+
+def strip_accents(text: str) -> str:
+    return "".join(
+        ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch)
+    )
+
+def normalize_location(location: str) -> str:
+    """Minúsculas, sin acentos ni espacios sobrantes, resolviendo alias ("NYC" -> "nueva york")"""
+    key = " ".join(strip_accents(location).lower().replace(",", " ").split())
+    return LOCATION_ALIASES.get(key, key)
+
+def normalize_user_id(user_id: str) -> str:
+    return str(user_id).strip()
+
+# ===============================================
+# BACKENDS
+# ===============================================
+class InMemoryBackend:
+    """Índice en memoria (dict) construido una sola vez"""
+
+    def __init__(self, records: Mapping[str, Dict[str, Any]]):
+        self.records = records
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        return dict(self.records)
+
+class SQLiteBackend:
+    """Tabla SQLite `(key TEXT PRIMARY KEY, value TEXT)` con el registro en JSON.
+
+    Al cargar solo se leen las claves; cada registro se consulta por clave
+    (`WHERE key = ?`) y los más recientes se guardan en una caché LRU pequeña.
+    """
+
+    def __init__(self, path: str, table: str, cache_size: int = 256):
+        self.path = path
+        self.table = table
+        self.cache_size = cache_size
+
+    def load(self) -> "SQLiteIndex":
+        # Una conexión de solo lectura por índice; la del índice anterior se cierra con el GC
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        keys = [key for (key,) in conn.execute(f"SELECT key FROM {self.table}")]
+        return SQLiteIndex(conn, self.table, {key: key for key in keys}, self.cache_size)
+
+    @staticmethod
+    def write(path: str, table: str, records: Mapping[str, Dict[str, Any]]):
+        """Crea/actualiza la tabla con los registros dados"""
+        with contextlib.closing(sqlite3.connect(path)) as conn, conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT)")
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {table} (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value, ensure_ascii=False)) for key, value in records.items()],
+            )
+
+class SQLiteIndex(Mapping):
+    """Vista de solo lectura sobre una tabla SQLite: consulta por clave con caché LRU"""
+
+    def __init__(self, conn: sqlite3.Connection, table: str, keys: Dict[str, str], cache_size: int):
+        self._conn = conn
+        self._table = table
+        # Clave normalizada -> clave tal cual está en la tabla
+        self._keys = keys
+        self._cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # La conexión y la caché se comparten entre el bucle de eventos y los hilos del pool
+        self._lock = threading.Lock()
+        self.queries = 0
+
+    def with_keys(self, normalize: Callable[[str], str]) -> "SQLiteIndex":
+        """Misma tabla con las claves normalizadas"""
+        keys = {normalize(key): stored for key, stored in self._keys.items()}
+        return SQLiteIndex(self._conn, self._table, keys, self._cache_size)
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        stored = self._keys[key]
+        with self._lock:
+            if stored in self._cache:
+                self._cache.move_to_end(stored)
+                return self._cache[stored]
+            row = self._conn.execute(f"SELECT value FROM {self._table} WHERE key = ?", (stored,)).fetchone()
+            self.queries += 1
+        if row is None:
+            # Borrado después de cargar las claves: se comporta como no encontrado
+            raise KeyError(key)
+        value = json.loads(row[0])
+        with self._lock:
+            self._cache[stored] = value
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+class MmapJSONLBackend:
+    """Fichero JSONL (`{"key": ..., "value": {...}}` por línea) mapeado en memoria.
+
+    Solo se indexan los offsets de cada línea; el registro se decodifica al
+    consultarlo, así que la memoria del proceso no crece con el tamaño de la tabla
+    y las páginas del fichero se comparten entre procesos. `write` deja la clave
+    al principio de la línea (`{"key": "...", "value": `) y al indexar solo se
+    decodifica ese prefijo; las líneas con otro orden se decodifican enteras.
+    """
+
+    KEY_PREFIX = b'{"key": '
+    VALUE_SEPARATOR = b', "value": '
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> "MmapIndex":
+        # El mapa anterior sigue vivo mientras algún lector lo use; se libera con el GC
+        with open(self.path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        offsets: Dict[str, tuple] = {}
+        start = 0
+        size = len(mapped)
+        while start < size:
+            end = mapped.find(b"\n", start)
+            if end == -1:
+                end = size
+            if mapped[start:end].strip():
+                offsets[self._line_key(mapped, start, end)] = (start, end)
+            start = end + 1
+        return MmapIndex(mapped, offsets)
+
+    @classmethod
+    def _line_key(cls, mapped: mmap.mmap, start: int, end: int) -> str:
+        if mapped[start:start + len(cls.KEY_PREFIX)] == cls.KEY_PREFIX:
+            # Las comillas de la clave van escapadas, así que el primer separador sin escapar cierra la clave
+            separator = mapped.find(cls.VALUE_SEPARATOR, start + len(cls.KEY_PREFIX), end)
+            if separator != -1:
+                key = json.loads(mapped[start + len(cls.KEY_PREFIX):separator])
+                if isinstance(key, str):
+                    return key
+        return json.loads(mapped[start:end])["key"]
+
+    @staticmethod
+    def write(path: str, records: Mapping[str, Dict[str, Any]]):
+        with open(path, "w", encoding="utf-8") as f:
+            for key, value in records.items():
+                f.write(json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n")
+
+class MmapIndex(Mapping):
+    """Vista de solo lectura sobre un JSONL mapeado en memoria"""
+
+    def __init__(self, mapped: mmap.mmap, offsets: Dict[str, tuple]):
+        self._mapped = mapped
+        self._offsets = offsets
+
+    def with_keys(self, normalize: Callable[[str], str]) -> "MmapIndex":
+        """Misma vista con las claves normalizadas"""
+        return MmapIndex(self._mapped, {normalize(key): span for key, span in self._offsets.items()})
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        start, end = self._offsets[key]
+        return json.loads(self._mapped[start:end])["value"]
+
+    def __iter__(self):
+        return iter(self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+# ===============================================
+# ALMACÉN CON REFRESCO EN SEGUNDO PLANO
+# ===============================================
+class DataStore:
+    """Almacén de búsqueda por clave sobre un backend intercambiable.
+
+    El índice se carga una vez; `refresh()` construye uno nuevo y lo sustituye
+    con una sola asignación, de modo que las lecturas nunca se bloquean.
+    Las consultas devuelven copias: quien modifique el resultado no altera el
+    índice compartido ni el registro de "no encontrado".
+    """
+
+    def __init__(self, name: str, backend, normalize: Callable[[str], str], not_found: Dict[str, Any]):
+        self.name = name
+        self.backend = backend
+        self.normalize = normalize
+        self.not_found = not_found
+        self._index: Mapping[str, Dict[str, Any]] = {}
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _ensure_loaded(self) -> Mapping[str, Dict[str, Any]]:
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    self._index = self._build_index()
+                    self._loaded = True
+        return self._index
+
+    def _build_index(self) -> Mapping[str, Dict[str, Any]]:
+        data = self.backend.load()
+        if isinstance(data, (MmapIndex, SQLiteIndex)):
+            return data.with_keys(self.normalize)
+        return {self.normalize(key): value for key, value in data.items()}
+
+    def get(self, key: str) -> Dict[str, Any]:
+        return dict(self._ensure_loaded().get(self.normalize(key), self.not_found))
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        index = self._ensure_loaded()
+        return {key: dict(index.get(self.normalize(key), self.not_found)) for key in keys}
+
+    def keys(self) -> List[str]:
+        return list(self._ensure_loaded().keys())
+
+    def refresh(self):
+        """Recarga el índice desde el backend y lo sustituye atómicamente"""
+        new_index = self._build_index()
+        self._index = new_index
+        self._loaded = True
+        logger.info("[DataStore] %s recargado (%d registros)", self.name, len(new_index))
+
+    def start_background_refresh(self, interval: float):
+        """Recarga periódica en un hilo daemon"""
+        if self._refresh_thread is not None:
+            return
+
+        def _loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception:
+                    logger.exception("[DataStore] %s: error recargando", self.name)
+
+        self._refresh_thread = threading.Thread(target=_loop, name=f"refresh-{self.name}", daemon=True)
+        self._refresh_thread.start()
+
+    def stop_background_refresh(self):
+        self._stop.set()
+
+# ===============================================
+# CONFIGURACIÓN DE BACKENDS
+# ===============================================
+def backend_from_env(prefix: str, seed: Mapping[str, Dict[str, Any]], table: str):
+    """Backend según `{prefix}_BACKEND` = memory | sqlite | mmap y `{prefix}_PATH`"""
+    kind = os.getenv(f"{prefix}_BACKEND", "memory")
+    path = os.getenv(f"{prefix}_PATH")
+    if kind == "sqlite" and path:
+        return SQLiteBackend(path, table)
+    if kind == "mmap" and path:
+        return MmapJSONLBackend(path)
+    return InMemoryBackend(seed)
+
+def _make_store(name: str, prefix: str, seed, normalize, not_found) -> DataStore:
+    store = DataStore(name, backend_from_env(prefix, seed, name), normalize, not_found)
+    interval = float(os.getenv(f"{prefix}_REFRESH_SECONDS", "0"))
+    if interval > 0:
+        store.start_background_refresh(interval)
+    return store
+
+# Almacenes compartidos por todas las topologías
+users_store = _make_store("users", "USERS", USERS_SEED, normalize_user_id, USER_NOT_FOUND)
+weather_store = _make_store("weather", "WEATHER", WEATHER_SEED, normalize_location, LOCATION_NOT_FOUND)
+
+def get_user(user_id: str) -> Dict[str, Any]:
+    return users_store.get(user_id)
+
+def get_weather(location: str) -> Dict[str, Any]:
+    return weather_store.get(location)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Respuestas directas de herramientas (sin segunda llamada al LLM)
+Las herramientas cuyo resultado no necesita interpretación se marcan como
+`return_direct` y su salida se convierte en respuesta con una plantilla local
+("El resultado es 8"). Si en el paso solo se ejecutó esa herramienta,
+AgentExecutor devuelve la respuesta sin volver a llamar al LLM.
+
+Es opcional (MCP_DIRECT_TOOLS=none por defecto): una herramienta `return_direct`
+corta el agente tras su primer paso, así que en preguntas encadenadas
+("(5+3)*2") la respuesta sería el resultado intermedio ("El resultado es 8").
+Solo conviene activarlo para tráfico de una sola herramienta por pregunta.
+"""
+
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from serialization import decode_tool_result
+
+# ===============================================
+# PLANTILLAS
+# ===============================================
+# Renderer(salida decodificada, argumentos de la llamada) -> texto de respuesta
+Renderer = Callable[[Any, Dict[str, Any]], str]
+
+def format_number(value: Any) -> str:
+    """8.0 -> '8', 2.50 -> '2.5'"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    if number.is_integer() and abs(number) < 1e15:
+        return str(int(number))
+    return repr(round(number, 10))
+
+def render_number(output: Any, args: Dict[str, Any]) -> str:
+    return f"El resultado es {format_number(output)}"
+
+def render_user(data: Dict[str, Any], args: Dict[str, Any]) -> str:
+    if "error" in data:
+        return data["error"]
+    estado = "activo" if data.get("active") else "inactivo"
+    return f"{data.get('name')} ({data.get('email')}), usuario {estado}"
+
+def render_weather(data: Dict[str, Any], args: Dict[str, Any]) -> str:
+    if "error" in data:
+        return data["error"]
+    location = args.get("location")
+    prefix = f"En {location}: " if location else ""
+    return f"{prefix}{data.get('temp')}, {data.get('condition')}"
+
+def render_many(render_one: Renderer) -> Renderer:
+    """Una línea por clave para las herramientas en bloque"""
+    def _render(data: Dict[str, Any], args: Dict[str, Any]) -> str:
+        return "\n".join(f"- {key}: {render_one(value, {})}" for key, value in data.items())
+    return _render
+
+# Herramientas con respuesta directa y su plantilla
+DIRECT_RENDERERS: Dict[str, Renderer] = {
+    "sumar": render_number,
+    "multiplicar": render_number,
+    "sumar_lista": render_number,
+    "getUserInfo": render_user,
+    "getWeather": render_weather,
+    "getUsersInfo": render_many(render_user),
+    "getWeatherMany": render_many(render_weather),
+}
+
+def direct_tool_names() -> Set[str]:
+    """Herramientas habilitadas (MCP_DIRECT_TOOLS: 'none' por defecto, 'all' o lista separada por comas)"""
+    value = os.getenv("MCP_DIRECT_TOOLS", "none").strip()
+    if value == "all":
+        return set(DIRECT_RENDERERS)
+    if value in ("", "none"):
+        return set()
+    return {name.strip() for name in value.split(",")} & set(DIRECT_RENDERERS)
+
+def _base_name(name: str) -> str:
+    """Las herramientas internas de stdio_full llevan el sufijo `_interno`"""
+    return name[:-len("_interno")] if name.endswith("_interno") else name
+
+def render_result(tool_name: str, output: Any, args: Dict[str, Any]) -> Any:
+    """Aplica la plantilla de la herramienta; si la salida no encaja, se devuelve tal cual"""
+    data = decode_tool_result(output)
+    try:
+        return DIRECT_RENDERERS[_base_name(tool_name)](data, args)
+    except (AttributeError, KeyError, TypeError):
+        return output
+
+# ===============================================
+# ENVOLTORIO
+# ===============================================
+def direct_tool(tool: BaseTool) -> StructuredTool:
+    """Copia de la herramienta con `return_direct=True` y salida renderizada"""
+    func = None
+    if getattr(tool, "func", None) is not None:
+        def func(**kwargs):
+            return render_result(tool.name, tool.invoke(kwargs), kwargs)
+
+    async def _coroutine(**kwargs):
+        return render_result(tool.name, await tool.ainvoke(kwargs), kwargs)
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        func=func,
+        coroutine=_coroutine,
+        return_direct=True,
+        metadata=tool.metadata,
+    )
+
+def direct_tools(tools: Iterable[BaseTool], enabled: Optional[Set[str]] = None) -> List[BaseTool]:
+    """Marca como directas las herramientas habilitadas; el resto se devuelve sin cambios"""
+    enabled = direct_tool_names() if enabled is None else enabled
+    return [direct_tool(tool) if _base_name(tool.name) in enabled else tool for tool in tools]
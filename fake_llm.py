@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+LLM falso con tool calling para pruebas sin red
+Enruta el mensaje a una herramienta con reglas de palabras clave (como lo haría
+gpt-4o con estos ejemplos) y, tras recibir el resultado, responde con él.
+Permite simular la latencia del LLM real.
+"""
+
+import asyncio
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+NUMBER_RE = re.compile(r"-?\d+(?:[.,]\d+)?")
+LOCATION_RE = re.compile(r"\b(?:en|de)\s+([a-záéíóúñ ,]+?)\s*[?.!]*$", re.IGNORECASE)
+
+def _numbers(text: str) -> List[float]:
+    return [float(n.replace(",", ".")) for n in NUMBER_RE.findall(text)]
+
+def _split_list(text: str) -> List[str]:
+    parts = re.split(r",|\by\b", text)
+    return [p.strip() for p in parts if p.strip()]
+
+def route_message(text: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Decide (herramienta, argumentos) para un mensaje; None si no aplica ninguna"""
+    lowered = text.lower()
+    if re.search(r"clima|temperatura|tiempo hace", lowered):
+        match = LOCATION_RE.search(lowered)
+        locations = _split_list(match.group(1)) if match else []
+        if len(locations) > 1:
+            return "getWeatherMany", {"locations": locations}
+        if locations:
+            return "getWeather", {"location": locations[0]}
+        return None
+    if re.search(r"usuario|user", lowered):
+        ids = re.findall(r"\d+", lowered)
+        if len(ids) > 1:
+            return "getUsersInfo", {"user_ids": ids}
+        if ids:
+            return "getUserInfo", {"user_id": ids[0]}
+        return None
+    job = re.search(r"trabajo\s+([0-9a-f]{16})", lowered)
+    if job:
+        return "job_result", {"job_id": job.group(1)}
+    numbers = _numbers(lowered)
+    if re.search(r"estad[ií]stica|analiza", lowered) and numbers:
+        return "estadisticas_lista", {"numeros": numbers}
+    if re.search(r"multiplica|\bpor\b|\bx\b|\*", lowered) and len(numbers) >= 2:
+        return "multiplicar", {"a": numbers[0], "b": numbers[1]}
+    if re.search(r"suma|\+|total|cifras", lowered) and numbers:
+        if len(numbers) == 2:
+            return "sumar", {"a": numbers[0], "b": numbers[1]}
+        return "sumar_lista", {"numeros": numbers}
+    return None
+
+def _resolve_name(name: str, available: Sequence[str]) -> Optional[str]:
+    """Nombre real de la herramienta (p. ej. 'sumar' -> 'sumar_interno' en stdio_full)"""
+    if not available or name in available:
+        return name
+    if f"{name}_interno" in available:
+        return f"{name}_interno"
+    return None
+
+def _estimate_tokens(messages: Sequence[BaseMessage]) -> int:
+    return sum(len(str(m.content)) for m in messages) // 4 + 1
+
+class FakeToolCallingLLM(BaseChatModel):
+    """Chat model determinista compatible con `bind_tools` y AgentExecutor"""
+
+    latency: float = 0.0
+    # Confianza declarada en response_metadata (para probar la cascada)
+    confidence: Optional[float] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-tool-calling"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        names = [convert_to_openai_tool(t)["function"]["name"] for t in tools]
+        return self.bind(tool_names=names, **kwargs)
+
+    def _respond(self, messages: List[BaseMessage], tool_names: Sequence[str]) -> AIMessage:
+        # Tras ejecutar herramientas: responder con sus resultados
+        if messages and isinstance(messages[-1], ToolMessage):
+            results = []
+            for message in reversed(messages):
+                if not isinstance(message, ToolMessage):
+                    break
+                results.append(str(message.content))
+            content = "Resultado: " + " | ".join(reversed(results))
+            return self._with_usage(AIMessage(content=content), messages, content)
+
+        human = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+        decision = route_message(str(human.content)) if human is not None else None
+        if decision is not None:
+            name = _resolve_name(decision[0], tool_names)
+            if name is not None:
+                tool_call = {"name": name, "args": decision[1], "id": f"call_{uuid.uuid4().hex[:12]}"}
+                return self._with_usage(AIMessage(content="", tool_calls=[tool_call]), messages, str(decision))
+        content = "No tengo una herramienta para eso."
+        return self._with_usage(AIMessage(content=content), messages, content)
+
+    def _with_usage(self, message: AIMessage, messages: Sequence[BaseMessage], output: str) -> AIMessage:
+        input_tokens = _estimate_tokens(messages)
+        output_tokens = len(output) // 4 + 1
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        if self.confidence is not None:
+            message.response_metadata = {"confidence": self.confidence}
+        return message
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        message = self._respond(messages, kwargs.get("tool_names", []))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        message = self._respond(messages, kwargs.get("tool_names", []))
+        return ChatResult(generations=[ChatGeneration(message=message)])
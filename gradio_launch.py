@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Lanzador común de las interfaces Gradio
+Cola configurable, rechazo rápido con cola llena, endpoints de salud/readiness
+y arranque en caliente del orquestador (lifespan, ver warmup.py)
+"""
+
+import os
+from typing import Any, Callable, Optional
+
+import gradio as gr
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from logging_setup import configure_logging
+
+# ===============================================
+# CONFIGURACIÓN (VARIABLES DE ENTORNO)
+# ===============================================
+def queue_settings_from_env(default_concurrency: int = 64) -> dict:
+    """Concurrencia y tamaño de cola de Gradio.
+
+    GRADIO_CONCURRENCY: eventos atendidos en paralelo por handler.
+    GRADIO_MAX_QUEUE: peticiones en espera; con la cola llena Gradio rechaza al instante.
+    """
+    return {
+        "default_concurrency_limit": int(os.getenv("GRADIO_CONCURRENCY", str(default_concurrency))),
+        "max_size": int(os.getenv("GRADIO_MAX_QUEUE", "512")),
+    }
+
+# ===============================================
+# APLICACIÓN ASGI CON SALUD Y READINESS
+# ===============================================
+def create_app(
+    interface: gr.Blocks,
+    ready_check: Optional[Callable[[], bool]] = None,
+    metrics: Optional[Callable[[], str]] = None,
+    default_concurrency: int = 64,
+    show_error: bool = True,
+    lifespan: Optional[Callable[[Any], Any]] = None,
+) -> FastAPI:
+    """Monta la interfaz en una app FastAPI con /healthz, /readyz y /metrics"""
+    interface.queue(api_open=False, **queue_settings_from_env(default_concurrency))
+
+    # mount_gradio_app encadena su propio lifespan con este
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/healthz")
+    async def healthz():
+        return {"status": "ok"}
+
+    @app.get("/readyz")
+    async def readyz():
+        ready = ready_check() if ready_check is not None else True
+        return JSONResponse({"ready": ready}, status_code=200 if ready else 503)
+
+    if metrics is not None:
+        @app.get("/metrics")
+        async def metrics_endpoint():
+            return PlainTextResponse(metrics())
+
+    return gr.mount_gradio_app(app, interface, path="/", show_error=show_error)
+
+def launch_interface(
+    interface: gr.Blocks,
+    server_port: int,
+    server_name: str = "0.0.0.0",
+    ready_check: Optional[Callable[[], bool]] = None,
+    metrics: Optional[Callable[[], str]] = None,
+    default_concurrency: int = 64,
+    show_error: bool = True,
+    lifespan: Optional[Callable[[Any], Any]] = None,
+):
+    """Lanza la interfaz con uvicorn (bloqueante)"""
+    configure_logging()
+    app = create_app(
+        interface,
+        ready_check=ready_check,
+        metrics=metrics,
+        default_concurrency=default_concurrency,
+        show_error=show_error,
+        lifespan=lifespan,
+    )
+    uvicorn.run(
+        app,
+        host=server_name,
+        port=server_port,
+        timeout_keep_alive=int(os.getenv("GRADIO_KEEP_ALIVE", "30")),
+        log_level=os.getenv("GRADIO_LOG_LEVEL", "info"),
+    )
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Peticiones cubiertas (hedging) contra réplicas del servidor de herramientas
+Si la réplica primaria no responde en el percentil p de la latencia observada
+de la herramienta, la misma llamada se lanza a otra réplica: gana la primera
+respuesta correcta y la otra se cancela. Solo herramientas idempotentes y con
+un tope de tasa de hedges, así que la carga extra está acotada.
+
+Variables de entorno:
+    MCP_HEDGE                  1 = activa el hedging (requiere varias réplicas)
+    SERVER_URLS                URLs SSE de las réplicas separadas por comas (si no, SERVER_URL)
+    MCP_HEDGE_TOOLS            herramientas idempotentes a cubrir (por defecto las de HEDGEABLE_TOOLS)
+    MCP_HEDGE_PERCENTILE       percentil de latencia tras el que se lanza el hedge (95)
+    MCP_HEDGE_INITIAL_DELAY_MS retardo mientras no hay muestras suficientes (100)
+    MCP_HEDGE_MIN_DELAY_MS     retardo mínimo (5)
+    MCP_HEDGE_MAX_RATE         fracción máxima de llamadas con hedge (0.1)
+    MCP_HEDGE_EJECT_SECONDS    segundos que una réplica que ha fallado deja de ser primaria (10)
+
+Si la primaria falla se reintenta al momento en otra réplica, fuera del tope
+de hedges; la réplica que falló mientras otra respondía deja de ser primaria
+durante MCP_HEDGE_EJECT_SECONDS.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Sequence
+
+from langchain_core.tools import BaseTool
+
+from tool_registry import read_only_tools
+from tool_wrappers import wrap_tool
+
+logger = logging.getLogger(__name__)
+
+# Herramientas sin efectos secundarios (read_only en tool_registry): repetirlas en otra réplica es seguro
+HEDGEABLE_TOOLS = read_only_tools()
+
+# ===============================================
+# CONFIGURACIÓN (VARIABLES DE ENTORNO)
+# ===============================================
+def hedging_enabled() -> bool:
+    return os.getenv("MCP_HEDGE") == "1"
+
+def replica_urls(default: str) -> List[str]:
+    """Réplicas de SERVER_URLS; sin ella, solo `default`"""
+    raw = os.getenv("SERVER_URLS", "")
+    urls = [url.strip() for url in raw.split(",") if url.strip()]
+    return urls or [default]
+
+def hedge_settings_from_env() -> Dict[str, Any]:
+    tools = os.getenv("MCP_HEDGE_TOOLS")
+    return {
+        "tools": [t.strip() for t in tools.split(",") if t.strip()] if tools else HEDGEABLE_TOOLS,
+        "percentile": float(os.getenv("MCP_HEDGE_PERCENTILE", "95")),
+        "initial_delay": float(os.getenv("MCP_HEDGE_INITIAL_DELAY_MS", "100")) / 1000,
+        "min_delay": float(os.getenv("MCP_HEDGE_MIN_DELAY_MS", "5")) / 1000,
+        "max_rate": float(os.getenv("MCP_HEDGE_MAX_RATE", "0.1")),
+        "eject_seconds": float(os.getenv("MCP_HEDGE_EJECT_SECONDS", "10")),
+    }
+
+# ===============================================
+# LATENCIA POR HERRAMIENTA Y PRESUPUESTO DE HEDGES
+# ===============================================
+class LatencyWindow:
+    """Últimas `size` latencias (s) de una herramienta"""
+
+    def __init__(self, size: int = 256, min_samples: int = 20):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+class HedgeBudget:
+    """Cubo de fichas: cada llamada suma `rate` fichas (hasta `burst`) y cada hedge gasta una"""
+
+    def __init__(self, rate: float, burst: float = 10.0):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = 1.0 if rate > 0 else 0.0
+
+    def deposit(self):
+        self.tokens = min(self.burst, self.tokens + self.rate)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+# ===============================================
+# LLAMADAS CUBIERTAS
+# ===============================================
+def _consume_exception(task: asyncio.Task):
+    if not task.cancelled():
+        task.exception()
+
+class HedgedToolCaller:
+    """Reparte las llamadas entre réplicas y cubre las lentas con una segunda réplica.
+
+    `loaders` son las funciones get_tools de cada réplica (la primera es la que
+    se usa para el descubrimiento). `attach()` carga las herramientas del resto.
+    """
+
+    def __init__(self, loaders: Sequence[Callable[[], Awaitable[List[BaseTool]]]],
+                 tools: Iterable[str] = HEDGEABLE_TOOLS, percentile: float = 95.0,
+                 initial_delay: float = 0.1, min_delay: float = 0.005, max_rate: float = 0.1,
+                 eject_seconds: float = 10.0):
+        self.loaders = list(loaders)
+        self.hedgeable = set(tools)
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.budget = HedgeBudget(max_rate)
+        self.eject_seconds = eject_seconds
+        self._replicas: List[Dict[str, BaseTool]] = []
+        self._windows: Dict[str, LatencyWindow] = {}
+        self._next = 0
+        # Réplica -> instante (monotonic) hasta el que no se usa como primaria
+        self._ejected: Dict[int, float] = {}
+        self.stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0,
+                      "failovers": 0, "ejections": 0, "cancelled": 0, "errors": 0}
+        self.replica_stats: List[Dict[str, int]] = []
+
+    @classmethod
+    def from_env(cls, loaders: Sequence[Callable[[], Awaitable[List[BaseTool]]]]) -> "HedgedToolCaller":
+        return cls(loaders, **hedge_settings_from_env())
+
+    async def attach(self, tools: Iterable[BaseTool]) -> List[BaseTool]:
+        """Envuelve las herramientas idempotentes; las réplicas que no responden se omiten"""
+        tools = list(tools)
+        replicas = [{t.name: t for t in tools}]
+        for i, loader in enumerate(self.loaders[1:], start=1):
+            try:
+                replicas.append({t.name: t for t in await loader()})
+            except Exception as e:
+                logger.warning("[Hedging] réplica %d sin herramientas (%s); se omite", i, e)
+        self._replicas = replicas
+        self.replica_stats = [{"calls": 0, "wins": 0, "errors": 0} for _ in replicas]
+        if len(replicas) < 2:
+            return tools
+        return [wrap_tool(t, self) if t.name in self.hedgeable else t for t in tools]
+
+    def delay(self, tool_name: str) -> float:
+        """Espera antes del hedge: percentil p de la latencia observada de la herramienta"""
+        window = self._windows.get(tool_name)
+        observed = window.percentile(self.percentile) if window is not None else None
+        return max(self.min_delay, observed if observed is not None else self.initial_delay)
+
+    def _pick(self, tool_name: str) -> List[int]:
+        """Réplicas con la herramienta, empezando por la siguiente en turno rotatorio.
+
+        Las expulsadas van al final: solo se usan si fallan las demás.
+        """
+        count = len(self._replicas)
+        start, self._next = self._next, (self._next + 1) % count
+        order = [i % count for i in range(start, start + count) if tool_name in self._replicas[i % count]]
+        now = time.monotonic()
+        healthy = [i for i in order if self._ejected.get(i, 0.0) <= now]
+        return healthy + [i for i in order if i not in healthy]
+
+    def _eject(self, replica: int):
+        if self._ejected.get(replica, 0.0) <= time.monotonic():
+            self.stats["ejections"] += 1
+            logger.warning("[Hedging] réplica %d falla; fuera del turno %.0f s", replica, self.eject_seconds)
+        self._ejected[replica] = time.monotonic() + self.eject_seconds
+
+    def _launch(self, replica: int, tool_name: str, args: Dict[str, Any]) -> asyncio.Task:
+        self.replica_stats[replica]["calls"] += 1
+        task = asyncio.create_task(self._replicas[replica][tool_name].ainvoke(args))
+        task.add_done_callback(_consume_exception)
+        return task
+
+    async def __call__(self, tool: BaseTool, args: Dict[str, Any]) -> Any:
+        self.stats["calls"] += 1
+        self.budget.deposit()
+        spare = self._pick(tool.name)
+        primary = spare[0]
+        window = self._windows.setdefault(tool.name, LatencyWindow())
+        started = time.monotonic()
+        hedge_at = started + self.delay(tool.name)
+        tasks: Dict[asyncio.Task, int] = {}
+
+        def launch() -> asyncio.Task:
+            replica = spare.pop(0)
+            task = self._launch(replica, tool.name, args)
+            tasks[task] = replica
+            return task
+
+        pending = {launch()}
+        failed: List[int] = []
+        error: Optional[BaseException] = None
+        can_hedge = True
+        try:
+            while pending:
+                timeout = max(0.0, hedge_at - time.monotonic()) if can_hedge and spare else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # La primaria tarda más que el percentil: hedge si el presupuesto lo permite
+                    can_hedge = False
+                    if self.budget.withdraw():
+                        self.stats["hedged"] += 1
+                        pending.add(launch())
+                    else:
+                        self.stats["budget_denied"] += 1
+                    continue
+                # Gana la primera respuesta correcta; si una réplica falla se espera a la otra
+                for task in done:
+                    replica = tasks[task]
+                    if task.exception() is not None:
+                        error = task.exception()
+                        failed.append(replica)
+                        self.replica_stats[replica]["errors"] += 1
+                        continue
+                    self.replica_stats[replica]["wins"] += 1
+                    if replica != primary:
+                        self.stats["hedge_wins"] += 1
+                    window.record(time.monotonic() - started)
+                    # Otra réplica respondió: el fallo era de la réplica, no de la llamada
+                    for bad in failed:
+                        self._eject(bad)
+                    self._ejected.pop(replica, None)
+                    return task.result()
+                if not pending and spare:
+                    # Fallo sin otra llamada en curso: reintento inmediato, fuera del tope de hedges
+                    self.stats["failovers"] += 1
+                    pending.add(launch())
+            self.stats["errors"] += 1
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                    self.stats["cancelled"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        calls = self.stats["calls"]
+        return {
+            **self.stats,
+            "hedge_rate": round(self.stats["hedged"] / calls, 4) if calls else 0.0,
+            "delay_ms": {name: round(self.delay(name) * 1000, 2) for name in self._windows},
+            "replicas": self.replica_stats,
+            "ejected": sorted(i for i, until in self._ejected.items() if until > time.monotonic()),
+        }
+
+    def to_prometheus(self) -> str:
+        """Métricas en formato de texto de Prometheus"""
+        data = self.metrics()
+        lines = [f"mcp_hedge_{key}_total {data[key]}"
+                 for key in ("calls", "hedged", "hedge_wins", "budget_denied", "failovers", "ejections",
+                             "cancelled", "errors")]
+        lines.append(f"mcp_hedge_rate {data['hedge_rate']}")
+        for i, replica in enumerate(data["replicas"]):
+            label = f'{{replica="{i}"}}'
+            lines.append(f"mcp_hedge_replica_calls_total{label} {replica['calls']}")
+            lines.append(f"mcp_hedge_replica_wins_total{label} {replica['wins']}")
+            lines.append(f"mcp_hedge_replica_errors_total{label} {replica['errors']}")
+        return "\n".join(lines) + "\n"
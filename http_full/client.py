@@ -3,13 +3,14 @@
 Interfaz Gradio para Cliente HTTP Full
 Punto Full HTTP: UI para cliente que envía/recibe al orquestador HTTP completo
 """
-import asyncio
 import gradio as gr
 import sys, os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from typing import List, Tuple
 from dotenv import load_dotenv
 from ..orchestrators import SimpleMCPClientHTTP
+from gradio_launch import launch_interface
+from warmup import warmup_lifespan, warmup_ready
 
 # Cargar .env
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
@@ -17,7 +18,7 @@ load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 # Cliente HTTP
 client = SimpleMCPClientHTTP(server_url=os.getenv('SERVER_URL', 'http://localhost:8001/sse'))
 
-async def process_chat_async(message: str, history: List[Tuple[str,str]]) -> Tuple[List[Tuple[str,str]], str]:
+async def process_chat(message: str, history: List[Tuple[str,str]]) -> Tuple[List[Tuple[str,str]], str]:
     if not message.strip(): return history, ""
     try:
         response = await client.send_message(message)
@@ -28,9 +29,6 @@ async def process_chat_async(message: str, history: List[Tuple[str,str]]) -> Tup
         history.append((message, msg))
         return history, ""
 
-def process_chat(message, history):
-    return asyncio.run(process_chat_async(message, history))
-
 def clear_chat(): return [], ""
 
 # Interfaz Gradio
@@ -45,4 +43,5 @@ def create_interface():
     return iface
 
 if __name__ == "__main__":
-    create_interface().launch(server_name="0.0.0.0", server_port=7862, debug=False, inbrowser=False)
+    launch_interface(create_interface(), server_name="0.0.0.0", server_port=7862,
+                     lifespan=warmup_lifespan(lambda: client), ready_check=lambda: warmup_ready(lambda: client))
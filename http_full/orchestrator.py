@@ -3,18 +3,25 @@
 Servidor MCP con Orquestador Completo HTTP
 Punto Full HTTP: Orquestador y herramientas en servidor MCP HTTP
 """
+import logging
 import os
+import sys
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
-from typing import Dict
-from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
+from typing import Optional
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.tools import tool
-from langchain.agents import create_tool_calling_agent, AgentExecutor
+from langchain.agents import AgentExecutor
 import uvicorn
 
 from .prompt import TOOL_DESCRIPTIONS, ORCHESTRATOR_PROMPT
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_factory import build_llm
+from arg_repair import create_repairing_agent
+from direct_results import direct_tools
+from profiling import profiler, register_profiling_tool
+from logging_setup import agent_callbacks, agent_verbose, configure_logging, log_level
+from tool_registry import format_tool_descriptions, langchain_tools
+from tenancy import DEFAULT_TENANT, FairScheduler, OrchestratorRegistry, TenantConfig, register_tenancy_tool
 
 # Cargar variables de entorno
 dotenv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
@@ -25,76 +32,55 @@ mcp_server = FastMCP("OrchestratorServerHTTP")
 app = mcp_server.sse_app()
 
 # ===============================================
-# ESQUEMAS PYDANTIC PARA HERRAMIENTAS INTERNAS
+# ORQUESTADOR INTERNO (herramientas en tool_registry.py)
 # ===============================================
-class SumarSchema(BaseModel):
-    a: float = Field(description="Primer número a sumar")
-    b: float = Field(description="Segundo número a sumar")
+SERVER_TOOLS = langchain_tools()
 
-class MultiplicarSchema(BaseModel):
-    a: float = Field(description="Primer número a multiplicar")
-    b: float = Field(description="Segundo número a multiplicar")
-
-class GetUserSchema(BaseModel):
-    user_id: str = Field(description="ID del usuario a buscar")
-
-class GetWeatherSchema(BaseModel):
-    location: str = Field(description="Ubicación para consultar el clima")
-
-# ===============================================
-# HERRAMIENTAS EN EL SERVIDOR
-# ===============================================
-@tool(args_schema=SumarSchema, description="Suma dos números")
-def sumar(a: float, b: float) -> float:
-    return a + b
-
-@tool(args_schema=MultiplicarSchema, description="Multiplica dos números")
-def multiplicar(a: float, b: float) -> float:
-    return a * b
-
-@tool(args_schema=GetUserSchema, description="Obtiene información de un usuario")
-def getUserInfo(user_id: str) -> Dict:
-    users = {"123": {"name": "Juan Pérez", "email": "juan@example.com"}}
-    return users.get(user_id, {"error": "Usuario no encontrado"})
-
-@tool(args_schema=GetWeatherSchema, description="Obtiene el clima de una ubicación")
-def getWeather(location: str) -> Dict:
-    weather_db = {"madrid": {"temp": "18°C", "condition": "Nublado"}}
-    return weather_db.get(location.lower(), {"error": "Ubicación no encontrada"})
-
-# ===============================================
-# ORQUESTADOR INTERNO
-# ===============================================
 class ServerOrchestratorHTTP:
-    def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o", temperature=0, api_key=os.getenv("OPENAI_API_KEY"))
-        tools = [sumar, multiplicar, getUserInfo, getWeather]
-        desc = "\n".join([f"- {n}: {d['description']}" for n, d in TOOL_DESCRIPTIONS.items()])
+    def __init__(self, config: Optional[TenantConfig] = None, llm=None):
+        config = config or TenantConfig()
+        # LLM compartido entre tenants del mismo modelo (ver tenancy.py)
+        self.llm = llm or build_llm(model=config.model)
+        tools = direct_tools([t for t in SERVER_TOOLS if config.tools is None or t.name in config.tools])
+        desc = format_tool_descriptions(TOOL_DESCRIPTIONS, config.tools)
         prompt = ChatPromptTemplate.from_messages([
-            ("system", ORCHESTRATOR_PROMPT.format(tool_descriptions=desc)),
+            ("system", (config.prompt or ORCHESTRATOR_PROMPT).format(tool_descriptions=desc)),
             ("human", "{input}"),
             ("placeholder", "{agent_scratchpad}")
         ])
-        agent = create_tool_calling_agent(self.llm, tools, prompt)
-        self.executor = AgentExecutor(agent=agent, tools=tools, verbose=True, handle_parsing_errors=True)
+        agent = create_repairing_agent(self.llm, tools, prompt)
+        self.executor = AgentExecutor(agent=agent, tools=tools, verbose=agent_verbose(), callbacks=agent_callbacks(),
+                                      handle_parsing_errors=True)
 
     async def process(self, message: str) -> str:
-        result = await self.executor.ainvoke({"input": message})
+        async with profiler.aprofile("ServerOrchestratorHTTP") as capture:
+            result = await self.executor.ainvoke({"input": message}, config={"callbacks": capture.callbacks})
         return result["output"]
 
-_orchestrator = ServerOrchestratorHTTP()
+# Orquestadores por tenant (LLM compartido por modelo) y reparto justo de la concurrencia
+registry = OrchestratorRegistry(ServerOrchestratorHTTP)
+scheduler = FairScheduler.for_registry(registry)
+# El tenant por defecto se construye al importar, como el antiguo orquestador global
+registry.get(DEFAULT_TENANT)
 
 # ===============================================
 # ENDPOINT MCP: process_message expuesto como tool
 # ===============================================
 @mcp_server.tool()
-async def process_message(message: str) -> str:
-    return await _orchestrator.process(message)
+async def process_message(message: str, tenant: str = DEFAULT_TENANT) -> str:
+    async with scheduler.slot(tenant):
+        return await registry.get(tenant).process(message)
+
+# Administración: profiling en caliente (admin_profiling) y estado por tenant (admin_tenants)
+register_profiling_tool(mcp_server)
+register_tenancy_tool(mcp_server, registry, scheduler)
 
 # ===============================================
 # EJECUTAR SERVIDOR
 # ===============================================
 if __name__ == "__main__":
-    print("🚀 Iniciando Full HTTP MCP Server...")
-    print("📡 SSE en http://0.0.0.0:8001/sse")
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    configure_logging()
+    logger = logging.getLogger(__name__)
+    logger.info("🚀 Iniciando Full HTTP MCP Server...")
+    logger.info("📡 SSE en http://0.0.0.0:8001/sse")
+    uvicorn.run(app, host="0.0.0.0", port=8001, log_level=log_level().lower())
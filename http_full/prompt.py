@@ -1,12 +1,12 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tool_registry import tool_descriptions
+
 # ===============================================
 # DESCRIPCIONES DE HERRAMIENTAS (JSON)
 # ===============================================
-TOOL_DESCRIPTIONS = {
-    "sumar": {"description": "Suma dos números", "examples": ["suma 5 y 3"]},
-    "multiplicar": {"description": "Multiplica dos números", "examples": ["multiplica 4 por 5"]},
-    "getUserInfo": {"description": "Obtiene información de un usuario", "examples": ["usuario 123"]},
-    "getWeather": {"description": "Obtiene el clima de una ubicación", "examples": ["clima en Madrid"]},
-}
+TOOL_DESCRIPTIONS = tool_descriptions()
 
 ORCHESTRATOR_PROMPT = """Eres un orquestador inteligente.
 
@@ -5,17 +5,22 @@ Punto 2 (Remoto): UI para orquestador en cliente, herramientas en servidor MCP H
 """
 
 import asyncio
+import logging
 import gradio as gr
 from typing import List, Tuple
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from ..orchestrators import MCPOrchestratorHTTP
+from gradio_launch import launch_interface
+from warmup import warmup_lifespan, warmup_ready
 from dotenv import load_dotenv
 
 # Cargar variables de entorno (para modo dummy si se desea)
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Modo diagnóstico HTTP
 DUMMY_HTTP = os.getenv("MCP_DUMMY_HTTP") == "1"
 
@@ -32,12 +37,12 @@ orchestrator = MCPOrchestratorHTTP(server_url=SERVER_URL)
 # ===============================================
 # FUNCIONES PARA GRADIO
 # ===============================================
-async def process_chat_async(message: str, history: List[List[str]]) -> Tuple[List[List[str]], str]:
+async def process_chat(message: str, history: List[List[str]]) -> Tuple[List[List[str]], str]:
     """Procesa un mensaje de forma asíncrona con timeout y logs"""
     if not message.strip():
         return history, ""
     try:
-        print(f"[HTTP] Recibido mensaje: {message}")
+        logger.debug("Recibido mensaje: %s", message)
         if DUMMY_HTTP:
             response = f"[DUMMY_HTTP] Echo: {message}"
         else:
@@ -46,15 +51,16 @@ async def process_chat_async(message: str, history: List[List[str]]) -> Tuple[Li
                 orchestrator.process_message(message),
                 timeout=25
             )
-        print("[HTTP] Respuesta lista")
+        logger.debug("Respuesta lista")
         history.append((message, response))
         return history, ""
     except asyncio.TimeoutError:
         error_msg = "❌ Timeout: el servidor HTTP no respondió a tiempo (25s)."
-        print("[HTTP] Timeout esperando respuesta")
+        logger.warning("Timeout esperando respuesta")
         history.append((message, error_msg))
         return history, ""
     except Exception as e:
+        logger.exception("Error procesando mensaje")
         # Capturar detalles de la excepción
         import traceback
         tb = traceback.format_exc()
@@ -66,10 +72,6 @@ async def process_chat_async(message: str, history: List[List[str]]) -> Tuple[Li
         history.append((message, error_msg))
         return history, ""
 
-def process_chat(message: str, history: List[List[str]]) -> Tuple[List[List[str]], str]:
-    """Wrapper síncrono para Gradio"""
-    return asyncio.run(process_chat_async(message, history))
-
 def clear_chat():
     """Limpia el historial del chat"""
     return [], ""
@@ -165,4 +167,12 @@ def create_gradio_interface():
 
 if __name__ == "__main__":
     main = create_gradio_interface()
-    main.launch(server_name="0.0.0.0", server_port=7863, share=False, debug=False, show_error=True, inbrowser=False)
+    launch_interface(
+        main,
+        server_name="0.0.0.0",
+        server_port=7863,
+        metrics=lambda: orchestrator.resilience.registry.to_prometheus() + (
+            orchestrator.hedger.to_prometheus() if orchestrator.hedger is not None else ""),
+        lifespan=None if DUMMY_HTTP else warmup_lifespan(lambda: orchestrator),
+        ready_check=None if DUMMY_HTTP else lambda: warmup_ready(lambda: orchestrator),
+    )
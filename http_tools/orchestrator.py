@@ -3,53 +3,40 @@
 Servidor MCP con Herramientas - HTTP Remoto
 Punto 2 (Remoto): Las herramientas corren en un servidor HTTP accesible remotamente
 """
+import logging
 import uvicorn  # servidor ASGI para SSE
 from mcp.server.fastmcp import FastMCP
-from typing import Dict
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from server_backends import server_lifespan
+from tool_registry import register_server_tools
+from logging_setup import configure_logging, log_level
 
 # Crear servidor MCP
-mcp_server = FastMCP("ToolsServerHTTP")  # contiene sse_app con rutas SSE
+mcp_server = FastMCP("ToolsServerHTTP", lifespan=server_lifespan)  # contiene sse_app con rutas SSE
 # Exponer ASGI app en variable de módulo para uvicorn
 app = mcp_server.sse_app()
 
 # ===============================================
-# HERRAMIENTAS EN SERVIDOR MCP
+# HERRAMIENTAS EN SERVIDOR MCP (ver tool_registry.py)
+# Las que usan backends son asíncronas y los comparten por proceso (ver server_backends.py);
+# MCP_BULK_EXECUTOR=process ejecuta sumar_lista en un pool de procesos (listas muy grandes)
 # ===============================================
-@mcp_server.tool()
-def sumar(a: float, b: float) -> float:
-    return a + b
-
-@mcp_server.tool()
-def multiplicar(a: float, b: float) -> float:
-    return a * b
-
-@mcp_server.tool()
-def getUserInfo(user_id: str) -> Dict:
-    users_db = {
-        "123": {"name": "Juan Pérez", "email": "juan@example.com", "active": True},
-        "456": {"name": "María García", "email": "maria@example.com", "active": False},
-    }
-    return users_db.get(user_id, {"error": "Usuario no encontrado"})
-
-@mcp_server.tool()
-def getWeather(location: str) -> Dict:
-    weather_db = {
-        "nueva york": {"temp": "22°C", "condition": "Soleado"},
-        "madrid": {"temp": "18°C", "condition": "Nublado"},
-        "londres": {"temp": "15°C", "condition": "Lluvioso"},
-    }
-    return weather_db.get(location.lower(), {"error": "Ubicación no encontrada"})
+register_server_tools(mcp_server)
 
 # ===============================================
 # EJECUTAR SERVIDOR HTTP
 # ===============================================
 if __name__ == "__main__":
-    print("🚀 Iniciando servidor MCP SSE con Uvicorn...")
-    print("📡 Servidor accesible en: http://0.0.0.0:8000/sse")
+    configure_logging()
+    logger = logging.getLogger(__name__)
+    logger.info("🚀 Iniciando servidor MCP SSE con Uvicorn...")
+    logger.info("📡 Servidor accesible en: http://0.0.0.0:8000/sse")
     # Ejecutar la app SSE expuesta por FastMCP en /sse
     uvicorn.run(
         mcp_server.sse_app(),
         host="0.0.0.0",
         port=8000,
-        log_level="info",
+        log_level=log_level().lower(),
     )
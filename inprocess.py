@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Transporte MCP en proceso
+Conecta el cliente MCP directamente con una instancia FastMCP del mismo
+proceso mediante memory streams de anyio: se mantiene el protocolo (initialize,
+list_tools, call_tool, validación de mensajes) pero los mensajes pasan como
+objetos, sin serializar JSON-RPC ni saltar a otro proceso.
+"""
+
+import contextlib
+import importlib.util
+import os
+from typing import AsyncIterator, Dict, List, Optional
+
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from mcp import ClientSession
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from warmup import PersistentSession
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SERVER_PATH = os.path.join(ROOT, "stdio_tools", "tools_server.py")
+
+def load_server(path: str = DEFAULT_SERVER_PATH, attr: str = "mcp_server") -> FastMCP:
+    """Importa el módulo del servidor (sin ejecutar su __main__) y devuelve su FastMCP"""
+    name = "_inprocess_" + os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, attr)
+
+class InProcessMCPClient(MultiServerMCPClient):
+    """MultiServerMCPClient cuyos servidores son instancias FastMCP del propio proceso.
+
+    Cada servidor corre en la tarea de su sesión (lifespan incluido). Las
+    herramientas quedan ligadas a una sesión persistente por servidor: abrir
+    una sesión en memoria por llamada no aportaría aislamiento y sí coste.
+    """
+
+    def __init__(self, servers: Dict[str, FastMCP]):
+        super().__init__({})
+        self.servers = dict(servers)
+        self._sessions = {name: PersistentSession(self, name) for name in self.servers}
+
+    @contextlib.asynccontextmanager
+    async def session(self, server_name: str, *, auto_initialize: bool = True) -> AsyncIterator[ClientSession]:
+        if server_name not in self.servers:
+            raise ValueError(f"Servidor en proceso desconocido '{server_name}', se esperaba uno de {list(self.servers)}")
+        # create_connected_server_and_client_session ya hace el initialize
+        async with create_connected_server_and_client_session(self.servers[server_name]) as session:
+            yield session
+
+    async def get_tools(self, *, server_name: Optional[str] = None) -> List[BaseTool]:
+        names = [server_name] if server_name is not None else list(self.servers)
+        tools: List[BaseTool] = []
+        for name in names:
+            tools.extend(await self._sessions[name].get_tools())
+        return tools
+
+    async def aclose(self):
+        for session in self._sessions.values():
+            await session.aclose()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Trabajos asíncronos para herramientas lentas
+Una herramienta marcada como `job` en tool_registry devuelve al instante un
+identificador de trabajo; el cálculo sigue en un pool de workers del servidor
+y el resultado queda en un almacén acotado. El cliente consulta `job_result`
+con espera larga (el servidor responde en cuanto el trabajo termina) y
+backoff entre consultas, así que ninguna llamada MCP individual se acerca a
+los timeouts de herramienta ni bloquea la conexión.
+
+Variables de entorno:
+    MCP_JOB_WORKERS        trabajos en ejecución a la vez por proceso (4)
+    MCP_JOB_MAX_ACTIVE     trabajos pendientes + en curso antes de rechazar (100)
+    MCP_JOB_MAX_RESULTS    resultados terminados que se conservan (1000)
+    MCP_JOB_RESULT_TTL     segundos que se conserva un resultado terminado (3600)
+    MCP_JOB_MAX_WAIT       espera larga máxima de job_result en el servidor, s (5)
+    MCP_JOB_WAIT_SECONDS   cuánto espera el cliente antes de devolver el identificador al LLM (20)
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from langchain_core.tools import BaseTool
+
+from concurrency import get_tool_executor
+from serialization import compact_result, decode_tool_result
+from tool_wrappers import wrap_tool
+
+logger = logging.getLogger(__name__)
+
+FINISHED = ("done", "error", "cancelled")
+
+class JobQueueFullError(RuntimeError):
+    """Demasiados trabajos pendientes o en curso"""
+
+# ===============================================
+# TRABAJO
+# ===============================================
+class Job:
+    def __init__(self, tool: str, args: Dict[str, Any]):
+        self.id = uuid.uuid4().hex[:16]
+        self.tool = tool
+        self.args = args
+        self.status = "pending"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.done = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in FINISHED
+
+    def handle(self) -> Dict[str, Any]:
+        """Lo que devuelve la herramienta al crear el trabajo"""
+        return {"job_id": self.id, "tool": self.tool, "status": self.status}
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {"job_id": self.id, "tool": self.tool, "status": self.status}
+        if self.started is not None:
+            data["elapsed_s"] = round((self.finished or time.time()) - self.started, 3)
+        if include_result and self.status == "done":
+            data["result"] = self.result
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+# ===============================================
+# GESTOR: POOL DE WORKERS Y ALMACÉN ACOTADO
+# ===============================================
+class JobManager:
+    """Trabajos del proceso: como mucho `workers` en curso y `max_results` terminados guardados"""
+
+    def __init__(self, workers: int = 4, max_active: int = 100, max_results: int = 1000,
+                 result_ttl: float = 3600.0, max_wait: float = 5.0):
+        self.workers = workers
+        self.max_active = max_active
+        self.max_results = max_results
+        self.result_ttl = result_ttl
+        self.max_wait = max_wait
+        self._limit = asyncio.Semaphore(workers)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.stats = {"submitted": 0, "done": 0, "errors": 0, "cancelled": 0, "rejected": 0, "evicted": 0}
+
+    @classmethod
+    def from_env(cls) -> "JobManager":
+        return cls(
+            workers=int(os.getenv("MCP_JOB_WORKERS", "4")),
+            max_active=int(os.getenv("MCP_JOB_MAX_ACTIVE", "100")),
+            max_results=int(os.getenv("MCP_JOB_MAX_RESULTS", "1000")),
+            result_ttl=float(os.getenv("MCP_JOB_RESULT_TTL", "3600")),
+            max_wait=float(os.getenv("MCP_JOB_MAX_WAIT", "5")),
+        )
+
+    def active(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job.is_finished)
+
+    def submit(self, tool: str, func: Callable[..., Any], args: Dict[str, Any]) -> Job:
+        """Crea el trabajo y lo lanza; `func(**args)` puede ser síncrona (pool de hilos) o corrutina"""
+        self._evict()
+        if self.active() >= self.max_active:
+            self.stats["rejected"] += 1
+            raise JobQueueFullError(f"Hay {self.max_active} trabajos pendientes o en curso; reinténtalo más tarde")
+        job = Job(tool, args)
+        self._jobs[job.id] = job
+        self.stats["submitted"] += 1
+        job.task = asyncio.create_task(self._run(job, func))
+        return job
+
+    async def _run(self, job: Job, func: Callable[..., Any]):
+        try:
+            async with self._limit:
+                job.status = "running"
+                job.started = time.time()
+                if asyncio.iscoroutinefunction(func):
+                    result = await func(**job.args)
+                else:
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(get_tool_executor(), functools.partial(func, **job.args))
+            job.result = result
+            self._finish(job, "done")
+        except asyncio.CancelledError:
+            self._finish(job, "cancelled")
+        except Exception as e:
+            logger.exception("[Jobs] el trabajo %s (%s) falló", job.id, job.tool)
+            self._finish(job, "error", f"{type(e).__name__}: {e}")
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None):
+        if job.is_finished:
+            return
+        job.status, job.error = status, error
+        job.finished = time.time()
+        self.stats[{"done": "done", "error": "errors", "cancelled": "cancelled"}[status]] += 1
+        job.done.set()
+
+    def _evict(self):
+        """Quita los terminados más antiguos que el TTL o que excedan `max_results`"""
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.is_finished]
+        excess = len(finished) - self.max_results
+        for job in finished:
+            if excess > 0 or now - job.finished > self.result_ttl:
+                del self._jobs[job.id]
+                self.stats["evicted"] += 1
+                excess -= 1
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """Espera (como mucho `timeout`, acotado por max_wait) a que el trabajo termine"""
+        job = self.get(job_id)
+        if job is None or job.is_finished or timeout <= 0:
+            return job
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout=min(timeout, self.max_wait))
+        except asyncio.TimeoutError:
+            pass
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if job is None or job.is_finished or job.task is None:
+            return False
+        job.task.cancel()
+        # Una tarea cancelada antes de arrancar no llega a ejecutar _run
+        if job.status == "pending":
+            self._finish(job, "cancelled")
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        statuses: Dict[str, int] = {}
+        for job in self._jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {**self.stats, "stored": len(self._jobs), "by_status": statuses, "workers": self.workers}
+
+_manager: Optional[JobManager] = None
+
+def get_job_manager() -> JobManager:
+    global _manager
+    if _manager is None:
+        _manager = JobManager.from_env()
+    return _manager
+
+def _unknown(job_id: str) -> Dict[str, Any]:
+    return {"job_id": job_id, "status": "unknown", "error": "Trabajo desconocido o resultado ya expirado"}
+
+# ===============================================
+# LADO SERVIDOR (FastMCP)
+# ===============================================
+def register_job_tools(mcp_server, manager: Optional[JobManager] = None):
+    """Registra job_status y job_result (espera larga) en un servidor FastMCP"""
+    get_manager = (lambda: manager) if manager is not None else get_job_manager
+
+    @mcp_server.tool(description="Estado de un trabajo asíncrono por su job_id")
+    @compact_result
+    async def job_status(job_id: str) -> Dict:
+        job = get_manager().get(job_id)
+        return job.to_dict(include_result=False) if job is not None else _unknown(job_id)
+
+    @mcp_server.tool(description="Resultado de un trabajo asíncrono; espera hasta `wait` segundos a que termine")
+    @compact_result
+    async def job_result(job_id: str, wait: float = 0.0) -> Dict:
+        job = await get_manager().wait(job_id, wait)
+        return job.to_dict() if job is not None else _unknown(job_id)
+
+def job_handler(name: str, func: Callable[..., Any], manager: Optional[JobManager] = None):
+    """Corrutina que lanza `func` como trabajo y devuelve su identificador"""
+    async def submit(**kwargs: Any) -> Dict:
+        return (manager or get_job_manager()).submit(name, func, kwargs).handle()
+    return submit
+
+def local_job_coroutine(name: str, func: Callable[..., Any], manager: Optional[JobManager] = None):
+    """En el propio proceso no hay timeout de transporte: se espera al trabajo sin consultar"""
+    async def run(**kwargs: Any) -> Any:
+        job = (manager or get_job_manager()).submit(name, func, kwargs)
+        await job.done.wait()
+        if job.status != "done":
+            return {"error": job.error or f"Trabajo {job.status}"}
+        return job.result
+    return run
+
+# ===============================================
+# LADO CLIENTE (orquestadores)
+# ===============================================
+def is_job_tool(tool: BaseTool) -> bool:
+    """Herramienta MCP anunciada como trabajo (meta `job` de tool_registry)"""
+    metadata = tool.metadata or {}
+    return bool((metadata.get("_meta") or {}).get("job"))
+
+class JobPoller:
+    """Espera el resultado consultando job_result con espera larga y backoff exponencial"""
+
+    def __init__(self, result_tool: BaseTool, initial: float = 0.1, factor: float = 2.0,
+                 max_interval: float = 5.0, deadline: Optional[float] = None):
+        self.result_tool = result_tool
+        self.initial = initial
+        self.factor = factor
+        self.max_interval = max_interval
+        self.deadline = deadline if deadline is not None else float(os.getenv("MCP_JOB_WAIT_SECONDS", "20"))
+        self.stats = {"jobs": 0, "polls": 0, "completed": 0, "deferred": 0}
+
+    async def __call__(self, tool: BaseTool, args: Dict[str, Any]) -> Any:
+        output = await tool.ainvoke(args)
+        handle = decode_tool_result(output)
+        if not isinstance(handle, dict) or "job_id" not in handle:
+            return output
+        self.stats["jobs"] += 1
+        job_id = handle["job_id"]
+        give_up = time.monotonic() + self.deadline
+        interval = self.initial
+        while True:
+            remaining = give_up - time.monotonic()
+            if remaining <= 0:
+                # El trabajo sigue: el LLM recibe el identificador para consultarlo después con job_result
+                self.stats["deferred"] += 1
+                return {**handle, "status": "running",
+                        "mensaje": f"El trabajo sigue en curso; consulta job_result con job_id={job_id}"}
+            self.stats["polls"] += 1
+            state = decode_tool_result(await self.result_tool.ainvoke(
+                {"job_id": job_id, "wait": round(min(interval, remaining), 3)}))
+            if not isinstance(state, dict) or state.get("status") in FINISHED + ("unknown",):
+                self.stats["completed"] += 1
+                if isinstance(state, dict) and state.get("status") == "done":
+                    return state.get("result")
+                return state
+            interval = min(self.max_interval, interval * self.factor)
+
+def job_tools(tools: Iterable[BaseTool]) -> List[BaseTool]:
+    """Las herramientas de trabajo esperan su resultado de forma transparente para el agente"""
+    tools = list(tools)
+    result_tool = next((t for t in tools if t.name == "job_result"), None)
+    if result_tool is None or not any(is_job_tool(t) for t in tools):
+        return tools
+    poller = JobPoller(result_tool)
+    return [wrap_tool(t, poller) if is_job_tool(t) else t for t in tools]
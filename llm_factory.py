@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Construcción del LLM de los orquestadores
+Con MCP_FAKE_LLM=1 se usa el LLM falso de `fake_llm` (pruebas de carga y
+validación sin red); MCP_FAKE_LLM_LATENCY simula la latencia de cada llamada.
+Con MCP_CASCADE=1 se usa una cascada modelo pequeño -> gpt-4o (ver cascade.py).
+Con MCP_RECORD / MCP_REPLAY el LLM se graba o se reproduce (ver recording.py).
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+from langchain_openai import ChatOpenAI
+
+from recording import traffic_llm
+
+def fake_llm_enabled() -> bool:
+    return os.getenv("MCP_FAKE_LLM") == "1"
+
+def cascade_enabled() -> bool:
+    return os.getenv("MCP_CASCADE") == "1"
+
+def _chat_model(model: str, temperature: float, base_url: Optional[str] = None,
+                api_key: Optional[str] = None, fake_prefix: str = "MCP_FAKE_LLM", logprobs: bool = False):
+    if fake_llm_enabled():
+        from fake_llm import FakeToolCallingLLM
+        confidence = os.getenv(f"{fake_prefix}_CONFIDENCE")
+        return FakeToolCallingLLM(
+            latency=float(os.getenv(f"{fake_prefix}_LATENCY", "0")),
+            confidence=float(confidence) if confidence else None,
+        )
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        api_key=api_key or os.getenv("OPENAI_API_KEY"),
+        base_url=base_url,
+        # Sin logprobs en la respuesta la cascada no puede medir la confianza (ver cascade.message_confidence)
+        logprobs=logprobs or None,
+    )
+
+def build_llm(model: str = "gpt-4o", temperature: float = 0, schemas: Optional[Dict[str, Any]] = None):
+    """LLM de los orquestadores (gpt-4o por defecto).
+
+    `schemas` (nombre de herramienta -> modelo pydantic) valida la primera pasada de la cascada.
+    """
+    return traffic_llm(lambda: _build_llm(model, temperature, schemas))
+
+def _build_llm(model: str, temperature: float, schemas: Optional[Dict[str, Any]]):
+    large = _chat_model(model, temperature)
+    if not cascade_enabled():
+        return large
+
+    from cascade import CascadeChatModel
+    min_confidence = float(os.getenv("MCP_CASCADE_MIN_CONFIDENCE", "0"))
+    # Modelo pequeño: otro modelo de OpenAI o un servidor compatible local (vLLM, Ollama...)
+    small = _chat_model(
+        os.getenv("MCP_SMALL_MODEL", "gpt-4o-mini"),
+        temperature,
+        base_url=os.getenv("MCP_SMALL_BASE_URL"),
+        api_key=os.getenv("MCP_SMALL_API_KEY"),
+        fake_prefix="MCP_FAKE_SMALL_LLM",
+        logprobs=min_confidence > 0,
+    )
+    return CascadeChatModel(
+        small=small,
+        large=large,
+        schemas=schemas or {},
+        min_confidence=min_confidence,
+        escalate_on_no_tool=os.getenv("MCP_CASCADE_ESCALATE_NO_TOOL", "1") == "1",
+    )
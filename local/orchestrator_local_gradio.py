@@ -10,6 +10,8 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from mcp_examples.local.orchestrator import LocalOrchestrator
+from gradio_launch import launch_interface
+from warmup import warmup_lifespan, warmup_ready
 
 # ===============================================
 # INSTANCIA GLOBAL DEL ORQUESTADOR
@@ -19,14 +21,14 @@ orchestrator = LocalOrchestrator()
 # ===============================================
 # FUNCIONES PARA GRADIO
 # ===============================================
-def process_chat(message: str, history: List[List[str]]) -> Tuple[List[List[str]], str]:
-    """Procesa un mensaje y actualiza el historial"""
+async def process_chat(message: str, history: List[List[str]]) -> Tuple[List[List[str]], str]:
+    """Procesa un mensaje y actualiza el historial (handler asíncrono)"""
     if not message.strip():
         return history, ""
     
     try:
-        # Procesar mensaje con el orquestador
-        response = orchestrator.process_message(message)
+        # Procesar mensaje con el orquestador sin bloquear un hilo de Gradio
+        response = await orchestrator.aprocess_message(message)
         
         # Actualizar historial
         history.append([message, response])
@@ -148,14 +150,14 @@ def main():
     
     interface = create_gradio_interface()
     
-    # Configuración del servidor
-    interface.launch(
+    # Configuración del servidor (handlers asíncronos: admite muchos chats simultáneos)
+    launch_interface(
+        interface,
         server_name="0.0.0.0",
         server_port=7860,
-        share=False,
-        debug=True,
-        show_error=True,
-        inbrowser=True,
+        default_concurrency=256,
+        lifespan=warmup_lifespan(lambda: orchestrator),
+        ready_check=lambda: warmup_ready(lambda: orchestrator),
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,18 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tool_registry import tool_descriptions
+
+# ===============================================
+# DESCRIPCIONES DE HERRAMIENTAS (JSON)
+# ===============================================
+TOOL_DESCRIPTIONS = tool_descriptions()
+
+ORCHESTRATOR_PROMPT = """Eres un asistente orquestador inteligente.
+
+Tu trabajo es analizar el mensaje del usuario y decidir qué herramienta ejecutar.
+
+Herramientas disponibles:
+{tool_descriptions}
+
+Analiza el mensaje y ejecuta la herramienta apropiada."""
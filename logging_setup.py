@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Configuración de logging por despliegue
+Un único punto para niveles, formato, muestreo y handlers asíncronos: los
+registros se encolan (QueueHandler) y un hilo (QueueListener) hace la E/S, así
+que el camino de cada petición nunca escribe en consola de forma síncrona.
+La salida es siempre stderr (o un fichero): en los servidores MCP stdio,
+stdout es el canal del protocolo y no se toca.
+
+Variables de entorno:
+    MCP_LOG_LEVEL     nivel raíz (INFO)
+    MCP_LOG_LEVELS    niveles por logger: "langchain=WARNING,httpx=WARNING"
+    MCP_LOG_FORMAT    text | json
+    MCP_LOG_SAMPLE    fracción de registros < WARNING que se emiten (1.0)
+    MCP_LOG_ASYNC     1 = cola + hilo de escritura (por defecto), 0 = síncrono
+    MCP_LOG_BUFFER    N > 0 agrupa N registros antes de escribir (se vacía con ERROR)
+    MCP_LOG_FILE      fichero de log en lugar de stderr
+    MCP_AGENT_VERBOSE 1 = verbose del AgentExecutor (stdout; nunca en servidores stdio)
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from serialization import dumps
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+# Traza del agente (sustituye a verbose=True): nivel DEBUG de este logger
+agent_logger = logging.getLogger("agent")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_stdio_server = False
+
+# ===============================================
+# FILTROS Y FORMATOS
+# ===============================================
+class SamplingFilter(logging.Filter):
+    """Deja pasar una fracción `rate` de los registros por debajo de `min_level`"""
+
+    def __init__(self, rate: float, min_level: int = logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.min_level = min_level
+        self._rng = random.Random()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.min_level or self._rng.random() < self.rate
+
+class JSONFormatter(logging.Formatter):
+    """Una línea JSON compacta por registro"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return dumps(data).decode("utf-8")
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+# ===============================================
+# CONFIGURACIÓN
+# ===============================================
+def log_level() -> str:
+    return os.getenv("MCP_LOG_LEVEL", "INFO").upper()
+
+def configure_logging(stdio_server: bool = False, level: Optional[str] = None) -> logging.Logger:
+    """Configura el logger raíz según el entorno (idempotente; reemplaza handlers previos).
+
+    `stdio_server=True` en los servidores MCP stdio: desactiva el verbose del agente.
+    """
+    global _listener, _stdio_server
+    _stdio_server = _stdio_server or stdio_server
+
+    if os.getenv("MCP_LOG_FILE"):
+        output: logging.Handler = logging.FileHandler(os.environ["MCP_LOG_FILE"], encoding="utf-8")
+    else:
+        output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JSONFormatter() if os.getenv("MCP_LOG_FORMAT") == "json" else logging.Formatter(TEXT_FORMAT))
+
+    buffer_size = int(os.getenv("MCP_LOG_BUFFER", "0"))
+    if buffer_size > 0:
+        output = logging.handlers.MemoryHandler(buffer_size, flushLevel=logging.ERROR, target=output)
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if os.getenv("MCP_LOG_ASYNC", "1") == "1":
+        log_queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        handler: logging.Handler = logging.handlers.QueueHandler(log_queue)
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler = output
+
+    sample = float(os.getenv("MCP_LOG_SAMPLE", "1.0"))
+    if sample < 1.0:
+        handler.addFilter(SamplingFilter(sample))
+
+    root = logging.getLogger()
+    for previous in list(root.handlers):
+        root.removeHandler(previous)
+    root.addHandler(handler)
+    root.setLevel(level or log_level())
+    for name, logger_level in _parse_levels(os.getenv("MCP_LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(logger_level)
+    return root
+
+def shutdown_logging():
+    """Vacía la cola y detiene el hilo de escritura"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.flush()
+        _listener = None
+
+atexit.register(shutdown_logging)
+
+# ===============================================
+# TRAZA DEL AGENTE
+# ===============================================
+class AgentTraceLogger(BaseCallbackHandler):
+    """Acciones y respuesta final del agente por logging (en lugar de verbose a stdout)"""
+
+    def on_agent_action(self, action, **kwargs: Any):
+        agent_logger.debug("Invocando %s con %s", action.tool, action.tool_input)
+
+    def on_agent_finish(self, finish, **kwargs: Any):
+        agent_logger.debug("Respuesta: %s", finish.return_values.get("output"))
+
+def agent_verbose() -> bool:
+    """verbose del AgentExecutor: solo con MCP_AGENT_VERBOSE=1 y nunca en servidores stdio"""
+    return os.getenv("MCP_AGENT_VERBOSE") == "1" and not _stdio_server
+
+def agent_callbacks() -> List[BaseCallbackHandler]:
+    """Callbacks de traza del AgentExecutor (solo emiten con el logger 'agent' en DEBUG)"""
+    return [AgentTraceLogger()]
@@ -4,44 +4,47 @@ Orquestadores y Código Común
 Todas las clases, herramientas, schemas y lógica compartida
 """
 
+import asyncio
+import contextlib
+import logging
 import os
-from typing import Dict
-from pydantic import BaseModel, Field
+import sys
+import time
+from typing import AsyncIterator, Dict, Optional, Sequence
 from dotenv import load_dotenv
 from langchain_mcp_adapters.client import MultiServerMCPClient
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.tools import tool
-from langchain.agents import create_tool_calling_agent, AgentExecutor
+from langchain.agents import AgentExecutor
+# Asegurar que los módulos comunes se importen desde esta carpeta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from resilience import BreakerRegistry, ResilientToolCaller
+from concurrency import offload_tools
+from serialization import expanding_tools
+from llm_factory import build_llm
+from recording import traffic_tools
+from profiling import is_admin_tool, profiler
+from arg_repair import create_repairing_agent
+from direct_results import direct_tools
+from speculation import Speculator, ToolPredictor, speculation_enabled
+from accounting import Budget, ainvoke_with_usage, astream_with_usage, invoke_with_usage, usage_ledger
+from logging_setup import agent_callbacks, agent_verbose
+from warmup import WarmupState, mark_ready, tool_loader, warm_llm, warm_up, warmup_llm_enabled
+from hedging import HedgedToolCaller, hedging_enabled, replica_urls
+from jobs import job_tools
+from tool_registry import (  # noqa: F401 (esquemas reexportados)
+    TOOL_SCHEMAS, GetUserInfoSchema, GetUsersInfoSchema, GetWeatherManySchema, GetWeatherSchema,
+    MultiplicarSchema, SumarListaSchema, SumarSchema, langchain_tools, tool_descriptions,
+)
 
 # Cargar variables de entorno
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # ===============================================
 # DESCRIPCIONES DE HERRAMIENTAS (JSON)
 # ===============================================
-TOOL_DESCRIPTIONS = {
-    "sumar": {
-        "name": "sumar",
-        "description": "Suma dos números enteros o decimales",
-        "examples": ["suma 5 y 3", "cuanto es 10 + 20"]
-    },
-    "multiplicar": {
-        "name": "multiplicar",
-        "description": "Multiplica dos números enteros o decimales",
-        "examples": ["multiplica 4 por 5", "cuanto es 7 x 8"]
-    },
-    "getUserInfo": {
-        "name": "getUserInfo",
-        "description": "Obtiene información de un usuario por su ID",
-        "examples": ["info del usuario 123", "datos de user456"]
-    },
-    "getWeather": {
-        "name": "getWeather",
-        "description": "Obtiene el clima de una ubicación",
-        "examples": ["clima en Nueva York", "temperatura en Madrid"]
-    }
-}
+TOOL_DESCRIPTIONS = tool_descriptions()
 
 ORCHESTRATOR_PROMPT = """Eres un asistente orquestador inteligente.
 
@@ -53,100 +56,270 @@ Herramientas disponibles:
 Analiza el mensaje y ejecuta la herramienta apropiada."""
 
 # ===============================================
-# ESQUEMAS PYDANTIC
+# HERRAMIENTAS (DEFINIDAS EN tool_registry.py)
 # ===============================================
-class SumarSchema(BaseModel):
-    a: float = Field(description="Primer número a sumar")
-    b: float = Field(description="Segundo número a sumar")
-
-class MultiplicarSchema(BaseModel):
-    a: float = Field(description="Primer número a multiplicar")
-    b: float = Field(description="Segundo número a multiplicar")
-
-class GetUserInfoSchema(BaseModel):
-    user_id: str = Field(description="ID del usuario a buscar")
-
-class GetWeatherSchema(BaseModel):
-    location: str = Field(description="Ubicación para consultar el clima")
+# Copias locales de las herramientas del servidor (respaldo de los breakers)
+LOCAL_TOOLS = langchain_tools()
+(sumar, multiplicar, getUserInfo, getWeather, sumar_lista, getUsersInfo, getWeatherMany,
+ estadisticas_lista) = LOCAL_TOOLS
 
 # ===============================================
-# HERRAMIENTAS
+# CONSTRUCCIÓN DEL AGENTE
 # ===============================================
-@tool(args_schema=SumarSchema, description="Suma dos números enteros o decimales")
-def sumar(a: float, b: float) -> float:
-    return a + b
-
-@tool(args_schema=MultiplicarSchema, description="Multiplica dos números enteros o decimales")
-def multiplicar(a: float, b: float) -> float:
-    return a * b
-
-@tool(args_schema=GetUserInfoSchema, description="Obtiene información de un usuario por su ID")
-def getUserInfo(user_id: str) -> Dict:
-    users_db = {
-        "123": {"name": "Juan Pérez", "email": "juan@example.com", "active": True},
-        "456": {"name": "María García", "email": "maria@example.com", "active": False},
-    }
-    return users_db.get(user_id, {"error": "Usuario no encontrado"})
-
-@tool(args_schema=GetWeatherSchema, description="Obtiene el clima de una ubicación")
-def getWeather(location: str) -> Dict:
-    weather_db = {
-        "nueva york": {"temp": "22°C", "condition": "Soleado"},
-        "madrid": {"temp": "18°C", "condition": "Nublado"},
-        "londres": {"temp": "15°C", "condition": "Lluvioso"},
-    }
-    return weather_db.get(location.lower(), {"error": "Ubicación no encontrada"})
+def build_agent_executor(llm, tools, budget: Optional[Budget] = None) -> AgentExecutor:
+    """Construye el AgentExecutor con el prompt del orquestador.
+
+    `budget` limita iteraciones y tiempo del agente (por defecto, MCP_BUDGET_*).
+    """
+    budget = budget or Budget.from_env()
+    tool_descriptions_str = "\n".join([
+        f"- {name}: {desc['description']} | Ejemplos: {', '.join(desc['examples'])}"
+        for name, desc in TOOL_DESCRIPTIONS.items()
+    ])
+    
+    prompt_template = ORCHESTRATOR_PROMPT.format(tool_descriptions=tool_descriptions_str)
+    
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", prompt_template),
+        ("human", "{input}"),
+        ("placeholder", "{agent_scratchpad}"),
+    ])
+    
+    # Los argumentos mal formados se reparan localmente antes de volver al LLM
+    agent = create_repairing_agent(llm, tools, prompt, schemas=TOOL_SCHEMAS)
+    return AgentExecutor(
+        agent=agent,
+        tools=tools,
+        verbose=agent_verbose(),
+        callbacks=agent_callbacks(),
+        handle_parsing_errors=True,
+        max_iterations=budget.max_iterations,
+        max_execution_time=budget.max_execution_time,
+    )
 
 # ===============================================
 # CLASE: ORQUESTADOR LOCAL
 # ===============================================
 class LocalOrchestrator:
-    """Orquestador con herramientas locales (síncrono)"""
+    """Orquestador con herramientas locales (síncrono y asíncrono)"""
     
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0,
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
-        self.tools = [sumar, multiplicar, getUserInfo, getWeather]
-        
-        tool_descriptions_str = "\n".join([
-            f"- {name}: {desc['description']} | Ejemplos: {', '.join(desc['examples'])}"
-            for name, desc in TOOL_DESCRIPTIONS.items()
-        ])
-        
-        prompt_template = ORCHESTRATOR_PROMPT.format(tool_descriptions=tool_descriptions_str)
-        
-        self.prompt = ChatPromptTemplate.from_messages([
-            ("system", prompt_template),
-            ("human", "{input}"),
-            ("placeholder", "{agent_scratchpad}"),
-        ])
-        
-        agent = create_tool_calling_agent(self.llm, self.tools, self.prompt)
-        self.agent_executor = AgentExecutor(
-            agent=agent,
-            tools=self.tools,
-            verbose=True,
-            handle_parsing_errors=True
-        )
+        self.llm = build_llm(schemas=TOOL_SCHEMAS)
+        # Las herramientas síncronas se ejecutan en un pool de hilos acotado con ainvoke;
+        # las que no necesitan interpretación responden directamente con plantilla
+        self.tools = direct_tools(offload_tools(LOCAL_TOOLS))
+        self.budget = Budget.from_env()
+        self.ledger = usage_ledger
+        self.agent_executor = build_agent_executor(self.llm, self.tools, self.budget)
+        self.warmup_state = WarmupState()
     
+    async def warm_up(self) -> Dict:
+        """El agente ya está construido; solo calienta el LLM si MCP_WARMUP_LLM=1"""
+        if self.warmup_state.status != "ready":
+            started = time.perf_counter()
+            if warmup_llm_enabled():
+                await warm_llm(self.llm)
+            self.warmup_state.status = "ready"
+            self.warmup_state.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        return self.warmup_state.to_dict()
+
+    def is_ready(self) -> bool:
+        return self.warmup_state.ready
+
     def process_message(self, message: str) -> str:
         """Procesa un mensaje - SÍNCRONO"""
-        response = self.agent_executor.invoke({"input": message})
-        return response["output"]
+        return self.process_message_with_usage(message)["output"]
+
+    async def aprocess_message(self, message: str) -> str:
+        """Procesa un mensaje - ASÍNCRONO (no bloquea un hilo durante la llamada al LLM)"""
+        return (await self.aprocess_message_with_usage(message))["output"]
+
+    def process_message_with_usage(self, message: str, session_id: Optional[str] = None,
+                                   tenant: Optional[str] = None) -> Dict:
+        """Procesa un mensaje y devuelve {"output": ..., "usage": {...}} - SÍNCRONO"""
+        with profiler.profile(type(self).__name__) as capture:
+            return invoke_with_usage(self.agent_executor, message, self.budget, self.ledger, session_id, tenant,
+                                     callbacks=capture.callbacks)
+
+    async def aprocess_message_with_usage(self, message: str, session_id: Optional[str] = None,
+                                          tenant: Optional[str] = None) -> Dict:
+        """Procesa un mensaje y devuelve {"output": ..., "usage": {...}} - ASÍNCRONO"""
+        async with profiler.aprofile(type(self).__name__) as capture:
+            return await ainvoke_with_usage(self.agent_executor, message, self.budget, self.ledger, session_id,
+                                            tenant, callbacks=capture.callbacks)
+
+    async def astream_message_with_usage(self, message: str, session_id: Optional[str] = None,
+                                         tenant: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Chunks del agente (actions / steps / output) y al final {"usage": {...}}"""
+        async with profiler.aprofile(type(self).__name__) as capture:
+            async for chunk in astream_with_usage(self.agent_executor, message, self.budget, self.ledger,
+                                                  session_id, tenant, callbacks=capture.callbacks):
+                yield chunk
+
+# ===============================================
+# BASE: ORQUESTADOR CON CLIENTE MCP Y BREAKERS
+# ===============================================
+class _ResilientMCPOrchestrator:
+    """Lógica común de los orquestadores cliente MCP.
+
+    Las herramientas remotas pasan por breakers de servidor y de herramienta.
+    Si el servidor no responde y el respaldo 'local' está habilitado, el
+    mensaje se atiende con las copias locales de `LOCAL_TOOLS`.
+    """
+
+    def _setup_resilience(self, breakers: Optional[BreakerRegistry], fallback: Optional[Sequence[str]]):
+        self.resilience = ResilientToolCaller(
+            "tools",
+            registry=breakers,
+            local_tools=LOCAL_TOOLS,
+            fallback=fallback,
+        )
+        self._degraded_executor = None
+        self.initialized = False
+        # Serializa initialize() y las reconexiones: el arranque en caliente, las peticiones
+        # concurrentes y el bucle de salud comparten una única inicialización en curso
+        self._init_lock = asyncio.Lock()
+        # Sesión MCP persistente (MCP_PERSISTENT_SESSION) y estado del arranque en caliente
+        self._get_tools, self.session = tool_loader(self.client, "tools")
+        # Hedging entre réplicas del servidor de herramientas (solo MCPOrchestratorHTTP)
+        self.hedger: Optional[HedgedToolCaller] = None
+        self._replica_sessions = []
+        self.warmup_state = WarmupState()
+        self._health_task = None
+        # Presupuesto y contabilidad por petición
+        self.budget = Budget.from_env()
+        self.ledger = usage_ledger
+        # Prefetch especulativo de herramientas de solo lectura (MCP_SPECULATE=1)
+        self.speculator = Speculator(ToolPredictor(TOOL_DESCRIPTIONS)) if speculation_enabled() else None
+
+    async def initialize(self):
+        """Inicializa el cliente MCP (una sola vez aunque lo pidan varias tareas a la vez)"""
+        if self.initialized:
+            return
+        async with self._init_lock:
+            if not self.initialized:
+                await self._initialize()
+
+    async def _initialize(self):
+        mcp_tools = await self.resilience.discover(lambda: traffic_tools("tools", self._get_tools))
+        # Las herramientas de administración (admin_*) no se ofrecen al LLM
+        mcp_tools = [t for t in mcp_tools if not is_admin_tool(t.name)]
+        if self.hedger is not None:
+            mcp_tools = await self.hedger.attach(mcp_tools)
+        # Resultados compactos del servidor: solo se descomprimen, sin re-serializar
+        tools = self.resilience.protect(expanding_tools(mcp_tools))
+        # Herramientas lentas: job_id inmediato y consulta de job_result con backoff (ver jobs.py)
+        tools = job_tools(tools)
+        if self.speculator is not None:
+            tools = self.speculator.attach(tools)
+        self.tools = direct_tools(tools)
+        self.agent_executor = build_agent_executor(self.llm, self.tools, self.budget)
+        self.initialized = True
+
+    async def _get_executor(self) -> AgentExecutor:
+        if self.initialized and self.session is not None and self.session.dead:
+            # La sesión persistente se cayó entre pings: se reabre en esta petición
+            await self._reset_if_dead()
+        if self.initialized:
+            return self.agent_executor
+        try:
+            await self.initialize()
+            # Si el arranque en caliente falló, una inicialización perezosa correcta deja /readyz en 200
+            mark_ready(self)
+            return self.agent_executor
+        except Exception:
+            if "local" not in self.resilience.fallback:
+                raise
+            # Servidor caído o breaker abierto: modo degradado con herramientas locales
+            if self._degraded_executor is None:
+                self._degraded_executor = build_agent_executor(self.llm, direct_tools(LOCAL_TOOLS), self.budget)
+            return self._degraded_executor
+
+    async def process_message(self, message: str) -> str:
+        """Procesa un mensaje - ASÍNCRONO"""
+        return (await self.process_message_with_usage(message))["output"]
+
+    async def process_message_with_usage(self, message: str, session_id: Optional[str] = None,
+                                         tenant: Optional[str] = None) -> Dict:
+        """Procesa un mensaje y devuelve {"output": ..., "usage": {...}}"""
+        started = time.perf_counter()
+        executor = await self._get_executor()
+        init_seconds = time.perf_counter() - started
+        speculation = contextlib.nullcontext()
+        if self.speculator is not None and executor is self.agent_executor:
+            speculation = self.speculator.speculate(message)
+        async with speculation, profiler.aprofile(type(self).__name__) as capture:
+            return await ainvoke_with_usage(executor, message, self.budget, self.ledger, session_id, tenant,
+                                            init_seconds=init_seconds, callbacks=capture.callbacks)
+
+    async def astream_message_with_usage(self, message: str, session_id: Optional[str] = None,
+                                         tenant: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Como process_message_with_usage, entregando los chunks del agente y al final {"usage": {...}}"""
+        started = time.perf_counter()
+        executor = await self._get_executor()
+        init_seconds = time.perf_counter() - started
+        speculation = contextlib.nullcontext()
+        if self.speculator is not None and executor is self.agent_executor:
+            speculation = self.speculator.speculate(message)
+        async with speculation, profiler.aprofile(type(self).__name__) as capture:
+            async for chunk in astream_with_usage(executor, message, self.budget, self.ledger, session_id, tenant,
+                                                  init_seconds=init_seconds, callbacks=capture.callbacks):
+                yield chunk
+
+    async def warm_up(self) -> Dict:
+        """Arranque en caliente: sesión, herramientas, agente y bucle de salud"""
+        return await warm_up(self)
+
+    def is_ready(self) -> bool:
+        return self.warmup_state.ready
+
+    async def reset_connection(self):
+        """Cierra la sesión persistente; el siguiente initialize() la reabre"""
+        for session in [self.session, *self._replica_sessions]:
+            if session is not None:
+                await session.aclose()
+        self.initialized = False
+
+    async def reconnect(self):
+        """Cierra la sesión y reinicializa bajo el candado: las peticiones esperan a la nueva"""
+        async with self._init_lock:
+            await self.reset_connection()
+            await self._initialize()
+
+    async def _reset_if_dead(self):
+        # Varias peticiones pueden ver la sesión caída; solo la primera la cierra
+        async with self._init_lock:
+            if self.initialized and self.session is not None and self.session.dead:
+                await self.reset_connection()
+
+    async def aclose(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        await self.reset_connection()
+
+    def breaker_metrics(self) -> Dict:
+        """Estado de los breakers y respuestas de respaldo servidas"""
+        return self.resilience.metrics()
+
+    def speculation_metrics(self) -> Dict:
+        """Prefetch especulativo: lanzadas, aciertos, fallos, desperdiciadas"""
+        return self.speculator.metrics() if self.speculator is not None else {}
+
+    def hedging_metrics(self) -> Dict:
+        """Hedging entre réplicas: llamadas, hedges, tasa, victorias del hedge, canceladas"""
+        return self.hedger.metrics() if self.hedger is not None else {}
 
 # ===============================================
 # CLASE: ORQUESTADOR CON CLIENTE MCP (STDIO)
 # ===============================================
-class MCPOrchestrator:
+class MCPOrchestrator(_ResilientMCPOrchestrator):
     """Orquestador en cliente, herramientas en servidor MCP stdio (asíncrono)"""
     
-    def __init__(self, server_path="tools_server.py"):
+    def __init__(self, server_path="tools_server.py", breakers: Optional[BreakerRegistry] = None,
+                 fallback: Optional[Sequence[str]] = None):
         # Diagnóstico de entorno
-        print(f"[MCPOrchestrator.__init__] cwd={os.getcwd()}")
-        print(f"[MCPOrchestrator.__init__] server_path (input)={server_path}")
+        logger.debug("cwd=%s server_path (input)=%s", os.getcwd(), server_path)
 
         # Normalizar ruta absoluta al servidor
         if not os.path.isabs(server_path):
@@ -155,163 +328,177 @@ class MCPOrchestrator:
             # __file__ apunta a mcp_examples/orchestrators.py; stdio_tools está al mismo nivel
             server_path = os.path.join(os.path.dirname(base_dir), "stdio_tools", server_path)
         self.server_path = server_path
-        print(f"[MCPOrchestrator.__init__] server_path (abs)={self.server_path}")
-        print(f"[MCPOrchestrator.__init__] server exists={os.path.exists(self.server_path)}")
+        logger.debug("server_path (abs)=%s exists=%s", self.server_path, os.path.exists(self.server_path))
 
-        self.llm = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0,
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
+        self.llm = build_llm(schemas=TOOL_SCHEMAS)
         self.client = MultiServerMCPClient({
             "tools": {
                 "transport": "stdio",
                 "command": "python",
-                "args": [self.server_path]
+                "args": [self.server_path],
+                # El SDK de MCP solo pasa un subconjunto del entorno; las variables MCP_* deben llegar al servidor
+                "env": dict(os.environ),
             }
         })
-        self.initialized = False
+        self._setup_resilience(breakers, fallback)
     
     async def initialize(self):
         """Inicializa el cliente MCP"""
         if self.initialized:
             return
             
-        print("[MCPOrchestrator.initialize] solicitando herramientas al servidor...")
+        logger.info("Solicitando herramientas al servidor MCP stdio...")
         try:
-            self.tools = await self.client.get_tools()
+            await super().initialize()
         except Exception as e:
-            print(f"[MCPOrchestrator.initialize] ERROR get_tools: {e}")
+            logger.error("Error en get_tools: %s", e)
             raise
-        
-        tool_descriptions_str = "\n".join([
-            f"- {name}: {desc['description']} | Ejemplos: {', '.join(desc['examples'])}"
-            for name, desc in TOOL_DESCRIPTIONS.items()
-        ])
-        
-        prompt_template = ORCHESTRATOR_PROMPT.format(tool_descriptions=tool_descriptions_str)
-        
-        self.prompt = ChatPromptTemplate.from_messages([
-            ("system", prompt_template),
-            ("human", "{input}"),
-            ("placeholder", "{agent_scratchpad}"),
-        ])
-        
-        agent = create_tool_calling_agent(self.llm, self.tools, self.prompt)
-        self.agent_executor = AgentExecutor(
-            agent=agent,
-            tools=self.tools,
-            verbose=True,
-            handle_parsing_errors=True
-        )
-        
-        self.initialized = True
-    
-    async def process_message(self, message: str) -> str:
-        """Procesa un mensaje - ASÍNCRONO"""
-        if not self.initialized:
-            await self.initialize()
-        
-        response = await self.agent_executor.ainvoke({"input": message})
-        return response["output"]
 
 # ===============================================
 # CLASE: ORQUESTADOR CON CLIENTE MCP (HTTP)
 # ===============================================
-class MCPOrchestratorHTTP:
+class MCPOrchestratorHTTP(_ResilientMCPOrchestrator):
     """Orquestador en cliente, herramientas en servidor MCP HTTP (asíncrono)"""
     
-    def __init__(self, server_url: str = "http://localhost:8000/sse"):
-        self.llm = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0,
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
+    def __init__(self, server_url: str = "http://localhost:8000/sse", breakers: Optional[BreakerRegistry] = None,
+                 fallback: Optional[Sequence[str]] = None):
+        self.llm = build_llm(schemas=TOOL_SCHEMAS)
         
+        # Con MCP_HEDGE=1 y varias réplicas en SERVER_URLS: "tools" es la primera, "tools@N" el resto
+        urls = replica_urls(server_url) if hedging_enabled() else [server_url]
         self.client = MultiServerMCPClient({
-            "tools": {
+            ("tools" if i == 0 else f"tools@{i}"): {
                 "transport": "sse",
-                "url": server_url,
+                "url": url,
             }
+            for i, url in enumerate(urls)
         })
+        self._setup_resilience(breakers, fallback)
+        if len(urls) > 1:
+            loaders = [self._get_tools]
+            for i in range(1, len(urls)):
+                get_tools, session = tool_loader(self.client, f"tools@{i}")
+                loaders.append(get_tools)
+                if session is not None:
+                    self._replica_sessions.append(session)
+            self.hedger = HedgedToolCaller.from_env(loaders)
+
+# ===============================================
+# CLASE: ORQUESTADOR CON SERVIDOR MCP EN PROCESO
+# ===============================================
+class MCPOrchestratorInProcess(_ResilientMCPOrchestrator):
+    """Orquestador y servidor MCP de herramientas en el mismo proceso (memory streams, sin IPC)"""
+
+    def __init__(self, server=None, breakers: Optional[BreakerRegistry] = None,
+                 fallback: Optional[Sequence[str]] = None):
+        from inprocess import InProcessMCPClient, load_server
+
+        self.llm = build_llm(schemas=TOOL_SCHEMAS)
+        # Por defecto el mismo servidor que la topología stdio_tools, importado en lugar de lanzado
+        self.client = InProcessMCPClient({"tools": server if server is not None else load_server()})
+        self._setup_resilience(breakers, fallback)
+
+# ===============================================
+# BASE: CLIENTE MCP SIMPLE
+# ===============================================
+class _SimpleMCPClientBase:
+    """Lógica común de los clientes que delegan en la herramienta process_message"""
+
+    def _setup_session(self):
         self.initialized = False
-    
+        self.process_tool = None
+        self.llm = None
+        # Sesión MCP persistente (MCP_PERSISTENT_SESSION) y estado del arranque en caliente
+        self._get_tools, self.session = tool_loader(self.client, "orchestrator")
+        self.warmup_state = WarmupState()
+        self._health_task = None
+        # Serializa initialize() y las reconexiones (ver _ResilientMCPOrchestrator)
+        self._init_lock = asyncio.Lock()
+
     async def initialize(self):
-        """Inicializa el cliente MCP HTTP"""
+        """Inicializa el cliente (una sola vez aunque lo pidan varias tareas a la vez)"""
         if self.initialized:
             return
-            
-        self.tools = await self.client.get_tools()
-        
-        tool_descriptions_str = "\n".join([
-            f"- {name}: {desc['description']} | Ejemplos: {', '.join(desc['examples'])}"
-            for name, desc in TOOL_DESCRIPTIONS.items()
-        ])
-        
-        prompt_template = ORCHESTRATOR_PROMPT.format(tool_descriptions=tool_descriptions_str)
-        
-        self.prompt = ChatPromptTemplate.from_messages([
-            ("system", prompt_template),
-            ("human", "{input}"),
-            ("placeholder", "{agent_scratchpad}"),
-        ])
-        
-        agent = create_tool_calling_agent(self.llm, self.tools, self.prompt)
-        self.agent_executor = AgentExecutor(
-            agent=agent,
-            tools=self.tools,
-            verbose=True,
-            handle_parsing_errors=True
-        )
-        
+        async with self._init_lock:
+            if not self.initialized:
+                await self._initialize()
+
+    async def _initialize(self):
+        tools = await traffic_tools("orchestrator", self._get_tools)
+        self.process_tool = next(t for t in tools if t.name == "process_message")
         self.initialized = True
     
-    async def process_message(self, message: str) -> str:
-        """Procesa un mensaje - ASÍNCRONO"""
+    async def send_message(self, message: str, tenant: Optional[str] = None) -> str:
+        """Envía mensaje al servidor (el servidor planifica y aísla por `tenant`)"""
+        if self.initialized and self.session is not None and self.session.dead:
+            await self._reset_if_dead()
         if not self.initialized:
             await self.initialize()
+            mark_ready(self)
         
-        response = await self.agent_executor.ainvoke({"input": message})
-        return response["output"]
+        args = {"message": message} if tenant is None else {"message": message, "tenant": tenant}
+        response = await self.process_tool.ainvoke(args)
+        return response
+
+    async def process_message_with_usage(self, message: str, session_id: Optional[str] = None,
+                                         tenant: Optional[str] = None) -> Dict:
+        """Como send_message con el tenant de la petición; el uso lo contabiliza el servidor"""
+        return {"output": await self.send_message(message, tenant)}
+
+    async def warm_up(self) -> Dict:
+        """Arranque en caliente: abre la sesión y descubre process_message"""
+        return await warm_up(self)
+
+    def is_ready(self) -> bool:
+        return self.warmup_state.ready
+
+    async def reset_connection(self):
+        """Cierra la sesión persistente; el siguiente initialize() la reabre"""
+        if self.session is not None:
+            await self.session.aclose()
+        self.initialized = False
+
+    async def reconnect(self):
+        """Cierra la sesión y reinicializa bajo el candado: las peticiones esperan a la nueva"""
+        async with self._init_lock:
+            await self.reset_connection()
+            await self._initialize()
+
+    async def _reset_if_dead(self):
+        async with self._init_lock:
+            if self.initialized and self.session is not None and self.session.dead:
+                await self.reset_connection()
+
+    async def aclose(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        await self.reset_connection()
 
 # ===============================================
 # CLASE: CLIENTE MCP SIMPLE (STDIO)
 # ===============================================
-class SimpleMCPClient:
+class SimpleMCPClient(_SimpleMCPClientBase):
     """Cliente simple que se conecta a servidor con orquestador completo (stdio)"""
     
-    def __init__(self):
+    def __init__(self, server_path: str = "orchestrator_server.py"):
+        # Ruta relativa a stdio_full (funciona con cualquier directorio de trabajo)
+        if not os.path.isabs(server_path):
+            server_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stdio_full", server_path)
         self.client = MultiServerMCPClient({
             "orchestrator": {
                 "transport": "stdio",
                 "command": "python",
-                "args": ["orchestrator_server.py"]
+                "args": [server_path],
+                "env": dict(os.environ),
             }
         })
-        self.initialized = False
-        self.process_tool = None
-    
-    async def initialize(self):
-        """Inicializa el cliente"""
-        if self.initialized:
-            return
-        
-        tools = await self.client.get_tools()
-        self.process_tool = tools[0]
-        self.initialized = True
-    
-    async def send_message(self, message: str) -> str:
-        """Envía mensaje al servidor"""
-        if not self.initialized:
-            await self.initialize()
-        
-        response = await self.process_tool.ainvoke({"message": message})
-        return response
+        self._setup_session()
 
 # ===============================================
 # CLASE: CLIENTE MCP SIMPLE (HTTP)
 # ===============================================
-class SimpleMCPClientHTTP:
+class SimpleMCPClientHTTP(_SimpleMCPClientBase):
     """Cliente simple que se conecta a servidor HTTP con orquestador completo"""
     
     def __init__(self, server_url: str = "http://localhost:8001/sse"):
@@ -321,23 +508,5 @@ class SimpleMCPClientHTTP:
                 "url": server_url,
             }
         })
-        self.initialized = False
-        self.process_tool = None
-    
-    async def initialize(self):
-        """Inicializa el cliente HTTP"""
-        if self.initialized:
-            return
-        
-        tools = await self.client.get_tools()
-        self.process_tool = tools[0]
-        self.initialized = True
-    
-    async def send_message(self, message: str) -> str:
-        """Envía mensaje al servidor HTTP"""
-        if not self.initialized:
-            await self.initialize()
-        
-        response = await self.process_tool.ainvoke({"message": message})
-        return response
+        self._setup_session()
 
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Esquemas de herramientas precompilados compartidos entre procesos
+Convertir cada herramienta al formato de tools de OpenAI (`bind_tools`) genera
+el JSON schema de su modelo pydantic: ~25 ms por agente en frío y se repite en
+cada worker, en cada reinicialización y por cada tenant. Los esquemas ya
+convertidos se guardan en un fichero versionado que cada proceso mapea en
+memoria (mmap, páginas compartidas en la caché del sistema). La clave de cada
+entrada es una huella de la definición de la herramienta (nombre, descripción,
+JSON schema de sus argumentos), así que un cambio en la herramienta invalida
+su entrada sin más.
+
+El directorio se crea con permisos 0700 y solo se usa si es del usuario y
+nadie más puede escribir en él: el esquema leído va tal cual al LLM.
+
+Variables de entorno:
+    MCP_PRECOMPILE      0 = convertir siempre en el proceso (1)
+    MCP_PRECOMPILE_DIR  directorio de la caché ($XDG_CACHE_HOME o ~/.cache, subdirectorio mcp_precompiled)
+
+Uso (precompilar antes de arrancar los workers):
+    python precompile.py
+"""
+
+import functools
+import hashlib
+import logging
+import mmap
+import os
+import stat
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import langchain_core
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import BaseModel
+
+from serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# Subir al cambiar el formato de las entradas
+ARTIFACT_VERSION = 2
+MAX_ENTRIES = 1024
+
+def precompile_enabled() -> bool:
+    return os.getenv("MCP_PRECOMPILE", "1") == "1"
+
+def cache_dir() -> str:
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.getenv("MCP_PRECOMPILE_DIR") or os.path.join(base, "mcp_precompiled")
+
+def _trusted_directory(path: str) -> bool:
+    """Directorio real (no enlace) del usuario actual en el que nadie más puede escribir"""
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    if not stat.S_ISDIR(info.st_mode) or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        return False
+    return not hasattr(os, "getuid") or info.st_uid == os.getuid()
+
+# ===============================================
+# HUELLA DE UNA HERRAMIENTA
+# ===============================================
+@functools.lru_cache(maxsize=MAX_ENTRIES)
+def _model_signature(model: type) -> str:
+    """Hash del JSON schema del modelo (restricciones, modelos anidados, json_schema_extra...).
+
+    Generarlo cuesta ~10 veces menos que la conversión completa y se hace una vez por modelo y proceso.
+    """
+    return hashlib.sha1(dumps(model.model_json_schema())).hexdigest()
+
+def _schema_signature(schema: Any) -> Any:
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        return _model_signature(schema)
+    return schema
+
+def tool_fingerprint(tool: BaseTool) -> str:
+    signature = [tool.name, tool.description, _schema_signature(tool.args_schema)]
+    return hashlib.sha1(dumps(signature)).hexdigest()
+
+# ===============================================
+# CACHÉ EN DISCO (MMAP)
+# ===============================================
+class ToolSchemaCache:
+    """Huella de herramienta -> esquema OpenAI, en un fichero JSON por versión"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or cache_dir()
+        self.path = os.path.join(
+            self.directory, f"tool-schemas-v{ARTIFACT_VERSION}-lc{langchain_core.__version__}.json"
+        )
+        self._entries: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+
+    def _load(self) -> Dict[str, Any]:
+        if self._entries is None:
+            if not _trusted_directory(self.directory):
+                # Inexistente (primer arranque) o inseguro: no se lee nada de él
+                self._entries = {}
+                return self._entries
+            try:
+                with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    self._entries = loads(memoryview(mapped))
+            except (OSError, ValueError) as e:
+                if os.path.exists(self.path):
+                    logger.warning("Caché de esquemas ilegible (%s); se regenera", e)
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        if not _trusted_directory(self.directory):
+            raise PermissionError(f"{self.directory} no es del usuario o tiene permisos de escritura para otros")
+        entries = self._entries
+        if len(entries) > MAX_ENTRIES:
+            entries = dict(list(entries.items())[-MAX_ENTRIES:])
+            self._entries = entries
+        # Escritura atómica: otro worker nunca ve un fichero a medias
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(dumps(entries))
+        os.replace(tmp, self.path)
+        self.stats["writes"] += 1
+
+    def convert(self, tools: Sequence[Any]) -> List[Any]:
+        """Esquemas OpenAI de `tools` (los dicts ya convertidos se devuelven tal cual)"""
+        with self._lock:
+            entries = self._load()
+            result, missed = [], False
+            for tool in tools:
+                if not isinstance(tool, BaseTool):
+                    result.append(tool)
+                    continue
+                key = tool_fingerprint(tool)
+                schema = entries.get(key)
+                if schema is None:
+                    schema = entries[key] = convert_to_openai_tool(tool)
+                    self.stats["misses"] += 1
+                    missed = True
+                else:
+                    self.stats["hits"] += 1
+                result.append(schema)
+            if missed:
+                try:
+                    self._save()
+                except OSError as e:
+                    logger.warning("No se pudo escribir la caché de esquemas: %s", e)
+            return result
+
+_cache: Optional[ToolSchemaCache] = None
+
+def get_schema_cache() -> ToolSchemaCache:
+    global _cache
+    if _cache is None:
+        _cache = ToolSchemaCache()
+    return _cache
+
+def compiled_tools(tools: Sequence[Any]) -> List[Any]:
+    """Lo que se pasa a `llm.bind_tools`: esquemas precompilados o las herramientas sin tocar"""
+    if not precompile_enabled():
+        return list(tools)
+    return get_schema_cache().convert(tools)
+
+# ===============================================
+# PRECOMPILACIÓN ANTICIPADA
+# ===============================================
+if __name__ == "__main__":
+    import sys
+    import time
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from orchestrators import LOCAL_TOOLS
+
+    # Las herramientas de los clientes MCP se añaden en su primer arranque
+    started = time.perf_counter()
+    cache = get_schema_cache()
+    cache.convert(LOCAL_TOOLS)
+    print(f"{len(LOCAL_TOOLS)} herramientas en {cache.path} {cache.stats} "
+          f"({(time.perf_counter() - started) * 1000:.1f} ms)")
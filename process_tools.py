@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Ejecución de herramientas MCP en procesos
+Las herramientas marcadas con `executor="process"` corren en un
+ProcessPoolExecutor caliente propio, con límite de concurrencia y timeout que
+mata a los workers colgados, para no retener el GIL del servidor. Matar un
+worker rompe todo el pool, así que las demás llamadas en curso se reenvían al
+pool nuevo (las herramientas en procesos deben ser funciones puras).
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class ToolTimeoutError(TimeoutError):
+    """La herramienta superó su timeout y sus workers fueron terminados"""
+
+# Reenvíos de una llamada cuyo pool se reinició por el timeout de otra
+MAX_RESUBMITS = 2
+
+def _noop():
+    return None
+
+class ProcessToolRunner:
+    """Pool de procesos caliente de una herramienta"""
+
+    def __init__(self, name: str, workers: int = 2, max_concurrency: Optional[int] = None,
+                 timeout: float = 30.0, start_method: Optional[str] = None):
+        self.name = name
+        self.workers = workers
+        self.timeout = timeout
+        self.start_method = start_method or os.getenv("MCP_PROCESS_START_METHOD", "spawn")
+        self._limit = asyncio.Semaphore(max_concurrency or workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.warm = True
+        self.timeouts = 0
+        self.resubmits = 0
+        # Precalentado en segundo plano tras un timeout (referencia para que no se pierdan sus errores)
+        self._rewarm: Optional[asyncio.Future] = None
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+            )
+        return self._pool
+
+    def warm_up(self):
+        """Arranca todos los workers antes de la primera llamada"""
+        pool = self._ensure_pool()
+        for future in [pool.submit(_noop) for _ in range(self.workers)]:
+            future.result()
+
+    def _kill_pool(self):
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        for process in list(getattr(pool, "_processes", {}).values()):
+            process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Ejecuta `func` en un worker; los argumentos y el resultado viajan por pickle"""
+        call = functools.partial(func, *args, **kwargs)
+        async with self._limit:
+            loop = asyncio.get_running_loop()
+            for attempt in range(MAX_RESUBMITS + 1):
+                pool = self._ensure_pool()
+                future = loop.run_in_executor(pool, call)
+                try:
+                    return await asyncio.wait_for(future, timeout=self.timeout)
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    logger.warning("[ProcessTool] %s superó %.1fs; reiniciando workers", self.name, self.timeout)
+                    self._restart_pool(loop)
+                    raise ToolTimeoutError(f"La herramienta '{self.name}' superó el timeout de {self.timeout}s")
+                except BrokenProcessPool:
+                    if pool is self._pool:
+                        # Un worker murió por su cuenta: se descarta el pool roto y la llamada falla
+                        self._restart_pool(loop)
+                        raise
+                    if attempt == MAX_RESUBMITS:
+                        raise
+                    # El timeout de otra llamada mató los workers: se reenvía al pool nuevo
+                    self.resubmits += 1
+                    logger.info("[ProcessTool] %s: llamada reenviada tras reiniciar los workers", self.name)
+
+    def _restart_pool(self, loop: asyncio.AbstractEventLoop):
+        self._kill_pool()
+        # Recrear y precalentar en segundo plano para que la siguiente llamada no arranque en frío
+        self._ensure_pool()
+        self._rewarm = loop.run_in_executor(None, self.warm_up)
+        self._rewarm.add_done_callback(self._rewarm_done)
+
+    def _rewarm_done(self, future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("[ProcessTool] no se pudo precalentar %s tras el timeout", self.name,
+                         exc_info=future.exception())
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+# Runners registrados por nombre de herramienta
+RUNNERS: Dict[str, ProcessToolRunner] = {}
+
+async def warm_up_runners():
+    """Arranca los pools marcados como calientes (se llama desde el lifespan del servidor).
+
+    No se hace al importar: con spawn los workers reimportan el módulo del servidor.
+    """
+    for runner in RUNNERS.values():
+        if runner.warm and runner._pool is None:
+            try:
+                await asyncio.to_thread(runner.warm_up)
+            except Exception:
+                logger.exception("[ProcessTool] no se pudo precalentar %s", runner.name)
+
+def server_tool(mcp_server, executor: str = "inline", workers: int = 2,
+                max_concurrency: Optional[int] = None, timeout: float = 30.0, warm: bool = True,
+                name: Optional[str] = None, **tool_options: Any):
+    """Registra una herramienta en FastMCP eligiendo dónde se ejecuta.
+
+    executor="inline": la herramienta corre en el proceso del servidor (comportamiento de FastMCP).
+    executor="process": corre en un ProcessPoolExecutor propio. La función debe ser
+    síncrona y de nivel de módulo (se envía por referencia al worker).
+    `name` y `tool_options` se pasan a `mcp_server.tool()` (descripción, anotaciones, meta).
+    """
+    def decorator(func: Callable) -> Callable:
+        tool_name = name or func.__name__
+        if executor != "process":
+            mcp_server.tool(name=tool_name, **tool_options)(func)
+            return func
+
+        runner = ProcessToolRunner(tool_name, workers=workers,
+                                   max_concurrency=max_concurrency, timeout=timeout)
+        runner.warm = warm
+        RUNNERS[tool_name] = runner
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await runner.run(func, *args, **kwargs)
+
+        mcp_server.tool(name=tool_name, **tool_options)(wrapper)
+        # Se devuelve la función original para que pickle la resuelva por nombre
+        return func
+
+    return decorator
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Profiling de CPU y memoria de los orquestadores
+Opcional y muestreado: MCP_PROFILE=1 captura cProfile (o pyinstrument si está
+instalado y MCP_PROFILE_ENGINE=pyinstrument) por petición, snapshots de
+tracemalloc (MCP_PROFILE_MEMORY=1) y tiempo/bloques asignados por etapa del
+agente (llm, tools, resto). Cada captura se vuelca a MCP_PROFILE_DIR como
+.prof/.html + un resumen .json con el tiempo propio agrupado por categoría
+(esperas de E/S y locks, callbacks de LangChain, pydantic, JSON, transporte...).
+
+Se puede activar en caliente con `profiler.configure(...)`, con la
+herramienta MCP `admin_profiling` de los servidores con orquestador o con
+POST /v1/admin/profiling de api_server.py.
+"""
+
+import asyncio
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+try:
+    import pyinstrument
+except ImportError:  # opcional
+    pyinstrument = None
+
+logger = logging.getLogger(__name__)
+
+# Prefijo de las herramientas MCP de administración (los clientes no se las pasan al LLM)
+ADMIN_TOOL_PREFIX = "admin_"
+
+# Categorías del tiempo propio (primera coincidencia sobre "fichero:función")
+CATEGORIES = [
+    ("wait", ("'poll' of 'select", "select.select", "'control' of 'select", "'acquire' of '_thread.lock'")),
+    ("callbacks", ("langchain_core/callbacks", "langchain_core/tracers", "builtins.print")),
+    ("pydantic", ("pydantic",)),
+    ("json", ("/json/", "orjson", "serialization.py", "'dumps'", "'loads'")),
+    ("transport", ("/mcp/", "anyio", "httpx", "httpcore", "sse_starlette", "subprocess")),
+    ("langchain", ("langchain",)),
+    ("asyncio", ("asyncio", "select", "selectors")),
+]
+
+def is_admin_tool(name: str) -> bool:
+    return name.startswith(ADMIN_TOOL_PREFIX)
+
+ENGINES = ("cprofile", "pyinstrument")
+
+# Opciones que se pueden cambiar desde fuera del proceso (HTTP, MCP); `directory` no
+REMOTE_OPTIONS = ("enabled", "sample_rate", "memory", "engine", "top")
+
+# ===============================================
+# CONFIGURACIÓN (VARIABLES DE ENTORNO)
+# ===============================================
+class ProfileSettings:
+    def __init__(self, enabled: bool = False, sample_rate: float = 1.0, memory: bool = False,
+                 engine: str = "cprofile", directory: str = "profiles", top: int = 25):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.memory = memory
+        self.engine = engine
+        self.directory = directory
+        self.top = top
+
+    @classmethod
+    def from_env(cls) -> "ProfileSettings":
+        return cls(
+            enabled=os.getenv("MCP_PROFILE") == "1",
+            sample_rate=float(os.getenv("MCP_PROFILE_SAMPLE", "1.0")),
+            memory=os.getenv("MCP_PROFILE_MEMORY") == "1",
+            engine=os.getenv("MCP_PROFILE_ENGINE", "cprofile"),
+            directory=os.getenv("MCP_PROFILE_DIR", "profiles"),
+            top=int(os.getenv("MCP_PROFILE_TOP", "25")),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "memory": self.memory,
+            "engine": self.engine,
+            "directory": self.directory,
+            "top": self.top,
+        }
+
+def _as_bool(key: str, value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ("1", "true", "on", "yes", "0", "false", "off", "no"):
+        return value.strip().lower() in ("1", "true", "on", "yes")
+    raise ValueError(f"'{key}' debe ser booleano")
+
+def _as_number(key: str, value: Any, kind: type) -> Any:
+    if isinstance(value, bool):
+        raise ValueError(f"'{key}' debe ser numérico")
+    try:
+        number = kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{key}' debe ser numérico") from None
+    if kind is int and isinstance(value, float) and value != number:
+        raise ValueError(f"'{key}' debe ser entero")
+    return number
+
+def _coerce_option(key: str, value: Any) -> Any:
+    """Valida y convierte una opción de ProfileSettings (ValueError si no es válida)"""
+    if key in ("enabled", "memory"):
+        return _as_bool(key, value)
+    if key == "sample_rate":
+        rate = _as_number(key, value, float)
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError("'sample_rate' debe estar entre 0 y 1")
+        return rate
+    if key == "top":
+        top = _as_number(key, value, int)
+        if top < 1:
+            raise ValueError("'top' debe ser mayor que 0")
+        return top
+    if key == "engine":
+        if value not in ENGINES:
+            raise ValueError(f"'engine' debe ser uno de {list(ENGINES)}")
+        return value
+    if key == "directory":
+        if not isinstance(value, str) or not value:
+            raise ValueError("'directory' debe ser una ruta")
+        return value
+    raise ValueError(f"Opción de profiling desconocida: {key}")
+
+# ===============================================
+# ETAPAS DEL AGENTE (CALLBACK)
+# ===============================================
+def _memory_mark() -> tuple:
+    """(bloques vivos, bytes trazados por tracemalloc o 0)"""
+    traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+    return sys.getallocatedblocks(), traced
+
+class StageProfileHandler(BaseCallbackHandler):
+    """Tiempo, bloques netos asignados y bytes (con tracemalloc) por etapa: llm y tools.
+
+    Los contadores de memoria son del proceso: con peticiones concurrentes
+    incluyen las asignaciones de las demás.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {
+            name: {"calls": 0, "ms": 0.0, "blocks": 0, "bytes": 0} for name in ("llm", "tools")
+        }
+        self._started: Dict[UUID, tuple] = {}
+        self._tool_runs: set = set()
+
+    def _start(self, run_id: UUID):
+        self._started[run_id] = (time.perf_counter(), *_memory_mark())
+
+    def _stop(self, run_id: UUID, stage: str):
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        blocks, traced = _memory_mark()
+        data = self.stages[stage]
+        data["calls"] += 1
+        data["ms"] += (time.perf_counter() - started[0]) * 1000
+        data["blocks"] += blocks - started[1]
+        data["bytes"] += traced - started[2]
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        self._stop(run_id, "llm")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._stop(run_id, "llm")
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID,
+                      parent_run_id: Optional[UUID] = None, **kwargs: Any):
+        # Igual que en accounting: las herramientas envueltas anidan ejecuciones, cuenta la externa
+        nested = parent_run_id in self._tool_runs
+        self._tool_runs.add(run_id)
+        if not nested:
+            self._start(run_id)
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any):
+        self._stop(run_id, "tools")
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._stop(run_id, "tools")
+
+# ===============================================
+# CAPTURA DE UNA PETICIÓN
+# ===============================================
+def _function_label(func: tuple) -> str:
+    filename, line, name = func
+    return f"{filename}:{line}:{name}" if filename != "~" else name
+
+def _category(label: str) -> str:
+    normalized = label.replace(os.sep, "/")
+    for category, patterns in CATEGORIES:
+        if any(pattern in normalized for pattern in patterns):
+            return category
+    return "other"
+
+class ProfileCapture:
+    """Una petición perfilada (o una vacía si no toca muestrearla)"""
+
+    def __init__(self, label: str, settings: Optional[ProfileSettings] = None):
+        self.label = label
+        self.settings = settings
+        self.stages = StageProfileHandler() if settings else None
+        self.callbacks: List[BaseCallbackHandler] = [self.stages] if self.stages else []
+        self.paths: List[str] = []
+        self._engine = None
+        self._snapshot = None
+
+    @property
+    def active(self) -> bool:
+        return self.settings is not None
+
+    def start(self):
+        if self.settings.memory:
+            self._snapshot = tracemalloc.take_snapshot()
+        if self.settings.engine == "pyinstrument" and pyinstrument is not None:
+            self._engine = pyinstrument.Profiler(async_mode="enabled")
+            self._engine.start()
+        else:
+            self._engine = cProfile.Profile()
+            self._engine.enable()
+        self._wall, self._cpu = time.perf_counter(), time.process_time()
+        self._mark = _memory_mark()
+
+    def stop(self) -> Dict[str, Any]:
+        wall_ms = (time.perf_counter() - self._wall) * 1000
+        cpu_ms = (time.process_time() - self._cpu) * 1000
+        blocks, traced = _memory_mark()
+        if isinstance(self._engine, cProfile.Profile):
+            self._engine.disable()
+        else:
+            self._engine.stop()
+
+        stages = {name: {key: round(value, 2) for key, value in data.items()}
+                  for name, data in self.stages.stages.items()}
+        stages["other"] = {
+            "ms": round(wall_ms - stages["llm"]["ms"] - stages["tools"]["ms"], 2),
+            "blocks": blocks - self._mark[0] - stages["llm"]["blocks"] - stages["tools"]["blocks"],
+            "bytes": traced - self._mark[1] - stages["llm"]["bytes"] - stages["tools"]["bytes"],
+        }
+        summary = {
+            "label": self.label,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "engine": "cprofile" if isinstance(self._engine, cProfile.Profile) else "pyinstrument",
+            "wall_ms": round(wall_ms, 2),
+            "cpu_ms": round(cpu_ms, 2),
+            "stages": stages,
+        }
+        return summary
+
+    def summarize(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        """Parte costosa del resumen (diff de tracemalloc, pstats); admite ejecutarse en otro hilo"""
+        if self._snapshot is not None:
+            summary["memory_top"] = self._memory_summary()
+        if isinstance(self._engine, cProfile.Profile):
+            summary.update(self._cprofile_summary())
+        return summary
+
+    def _cprofile_summary(self) -> Dict[str, Any]:
+        stats = pstats.Stats(self._engine, stream=io.StringIO())
+        categories: Dict[str, float] = {}
+        rows = []
+        for func, (calls, _, tottime, cumtime, _) in stats.stats.items():
+            label = _function_label(func)
+            category = _category(label)
+            categories[category] = categories.get(category, 0.0) + tottime * 1000
+            rows.append((tottime, label, calls, cumtime))
+        rows.sort(reverse=True)
+        return {
+            "self_ms_by_category": {name: round(ms, 2) for name, ms in
+                                    sorted(categories.items(), key=lambda item: -item[1])},
+            "top_self_time": [
+                {"function": label, "calls": calls, "self_ms": round(tottime * 1000, 3),
+                 "cum_ms": round(cumtime * 1000, 3)}
+                for tottime, label, calls, cumtime in rows[:self.settings.top]
+            ],
+        }
+
+    def _memory_summary(self) -> List[Dict[str, Any]]:
+        # Sin las asignaciones del propio profiler
+        ignore = [tracemalloc.Filter(False, module.__file__) for module in (cProfile, pstats, tracemalloc)]
+        snapshot = tracemalloc.take_snapshot().filter_traces(ignore)
+        diff = snapshot.compare_to(self._snapshot.filter_traces(ignore), "lineno")
+        return [
+            {"location": str(stat.traceback), "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+            for stat in diff[:self.settings.top]
+        ]
+
+    def dump(self, summary: Dict[str, Any], index: int):
+        os.makedirs(self.settings.directory, exist_ok=True)
+        label = re.sub(r"[^A-Za-z0-9_.-]", "_", self.label)
+        base = os.path.join(self.settings.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{index:05d}-{label}")
+        if isinstance(self._engine, cProfile.Profile):
+            self._engine.dump_stats(base + ".prof")
+            self.paths.append(base + ".prof")
+        else:
+            with open(base + ".html", "w", encoding="utf-8") as f:
+                f.write(self._engine.output_html())
+            self.paths.append(base + ".html")
+        summary["files"] = self.paths + [base + ".json"]
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        self.paths.append(base + ".json")
+
+# ===============================================
+# PROFILER DEL PROCESO
+# ===============================================
+class RequestProfiler:
+    """Decide qué peticiones se perfilan y vuelca las capturas.
+
+    cProfile perfila el hilo completo, así que solo hay una captura activa a la
+    vez; en el bucle asíncrono incluye también el trabajo de las demás tareas.
+    """
+
+    def __init__(self, settings: Optional[ProfileSettings] = None):
+        self.settings = settings or ProfileSettings.from_env()
+        self._capture_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+        self.stats = {"requests": 0, "captured": 0, "skipped_busy": 0}
+        self.recent: List[str] = []
+        # Solo se detiene tracemalloc si lo arrancó este módulo (no el de PYTHONTRACEMALLOC o el operador)
+        self._owns_tracemalloc = False
+        self._apply_memory()
+
+    def _apply_memory(self):
+        if self.settings.enabled and self.settings.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(int(os.getenv("MCP_PROFILE_FRAMES", "1")))
+            self._owns_tracemalloc = True
+        elif not (self.settings.enabled and self.settings.memory) and self._owns_tracemalloc:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    def configure(self, **changes: Any) -> Dict[str, Any]:
+        """Cambia la configuración en caliente (enabled, sample_rate, memory, engine, directory, top)"""
+        unknown = [key for key in changes if not hasattr(self.settings, key)]
+        if unknown:
+            raise ValueError(f"Opciones de profiling desconocidas: {unknown}")
+        # Validar todo antes de aplicar nada: un valor erróneo no deja la configuración a medias
+        values = {key: _coerce_option(key, value) for key, value in changes.items() if value is not None}
+        with self._lock:
+            for key, value in values.items():
+                setattr(self.settings, key, value)
+            self._apply_memory()
+        logger.info("[Profiling] configuración: %s", self.settings.to_dict())
+        return self.status()
+
+    def configure_remote(self, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """`configure` para peticiones externas: solo REMOTE_OPTIONS (nunca el directorio de volcado)"""
+        forbidden = [key for key in changes if key not in REMOTE_OPTIONS]
+        if forbidden:
+            raise ValueError(f"Opciones de profiling no permitidas: {forbidden}")
+        return self.configure(**changes)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.settings.to_dict(),
+                "pyinstrument_available": pyinstrument is not None,
+                "tracemalloc": tracemalloc.is_tracing(),
+                **self.stats,
+                "recent": list(self.recent[-10:]),
+            }
+
+    def _begin(self, label: str) -> ProfileCapture:
+        settings = self.settings
+        with self._lock:
+            self.stats["requests"] += 1
+            sampled = settings.enabled and self._rng.random() < settings.sample_rate
+        if not sampled:
+            return ProfileCapture(label)
+        if not self._capture_lock.acquire(blocking=False):
+            with self._lock:
+                self.stats["skipped_busy"] += 1
+            return ProfileCapture(label)
+        capture = ProfileCapture(label, settings)
+        try:
+            capture.start()
+        except Exception:
+            self._capture_lock.release()
+            raise
+        return capture
+
+    def _stop(self, capture: ProfileCapture) -> Optional[Dict[str, Any]]:
+        """Detiene la captura (barato); None si no había captura o falló"""
+        if not capture.active:
+            return None
+        try:
+            return capture.stop()
+        except Exception as e:
+            logger.warning("[Profiling] no se pudo detener la captura de %s: %s", capture.label, e)
+            self._capture_lock.release()
+            return None
+
+    def _finish(self, capture: ProfileCapture, summary: Dict[str, Any]):
+        """Resume y vuelca la captura y libera el turno de captura"""
+        try:
+            capture.summarize(summary)
+            with self._lock:
+                self.stats["captured"] += 1
+                index = self.stats["captured"]
+            capture.dump(summary, index)
+            with self._lock:
+                self.recent.append(capture.paths[-1])
+                del self.recent[:-50]
+        except Exception as e:
+            logger.warning("[Profiling] no se pudo volcar la captura de %s: %s", capture.label, e)
+        finally:
+            self._capture_lock.release()
+
+    def _end(self, capture: ProfileCapture):
+        summary = self._stop(capture)
+        if summary is not None:
+            self._finish(capture, summary)
+
+    async def _aend(self, capture: ProfileCapture):
+        summary = self._stop(capture)
+        if summary is not None:
+            # take_snapshot/compare_to, pstats y el volcado a disco no bloquean el bucle de eventos
+            await asyncio.to_thread(self._finish, capture, summary)
+
+    @contextmanager
+    def profile(self, label: str):
+        """Perfila un bloque síncrono; `capture.callbacks` va en el config del agente"""
+        capture = self._begin(label)
+        try:
+            yield capture
+        finally:
+            self._end(capture)
+
+    @asynccontextmanager
+    async def aprofile(self, label: str):
+        """Versión asíncrona de `profile`"""
+        capture = self._begin(label)
+        try:
+            yield capture
+        finally:
+            await self._aend(capture)
+
+profiler = RequestProfiler()
+
+# ===============================================
+# HERRAMIENTA MCP DE ADMINISTRACIÓN
+# ===============================================
+def register_profiling_tool(mcp_server):
+    """Añade `admin_profiling` a un servidor FastMCP para activar el profiling en caliente"""
+
+    @mcp_server.tool(name=f"{ADMIN_TOOL_PREFIX}profiling")
+    async def admin_profiling(enabled: Optional[bool] = None, sample_rate: Optional[float] = None,
+                              memory: Optional[bool] = None, engine: Optional[str] = None) -> Dict:
+        return profiler.configure_remote(
+            {"enabled": enabled, "sample_rate": sample_rate, "memory": memory, "engine": engine})
+
+    return admin_profiling
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Grabación y reproducción de tráfico LLM + MCP
+MCP_RECORD=trafico.jsonl añade a un log (JSONL, solo anexar) cada llamada al LLM
+y cada `call_tool` MCP con su duración. MCP_REPLAY=trafico.jsonl sirve esas
+respuestas de forma determinista sin OpenAI ni servidores MCP, a la velocidad
+grabada (MCP_REPLAY_SPEED=recorded o un factor) o lo más rápido posible (fast).
+
+La clave de cada llamada al LLM es el mensaje del usuario más los tool calls y
+resultados previos (sin el prompt de sistema), de modo que un cambio en el
+prompt o en el código del agente se puede reproducir con el mismo tráfico.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_core.tools import BaseTool, StructuredTool, ToolException
+
+from serialization import dumps, loads
+from tool_wrappers import wrap_tools
+
+class ReplayMissError(KeyError):
+    """La llamada no está en la grabación"""
+
+# ===============================================
+# CLAVES
+# ===============================================
+def _messages(value: Any) -> List[BaseMessage]:
+    return value.to_messages() if isinstance(value, PromptValue) else list(value)
+
+def llm_key(messages: Sequence[BaseMessage], tool_names: Sequence[str] = ()) -> str:
+    """Huella de la conversación: mensaje del usuario, tool calls y resultados (sin system prompt)"""
+    parts: List[Any] = [sorted(tool_names)]
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            parts.append(["human", message.content])
+        elif isinstance(message, AIMessage):
+            parts.append(["ai", [[c["name"], c["args"]] for c in message.tool_calls]])
+        elif isinstance(message, ToolMessage):
+            parts.append(["tool", message.content])
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+def tool_key(server: str, name: str, args: Dict[str, Any]) -> str:
+    return f"{server}/{name}:" + json.dumps(args, sort_keys=True, default=str, ensure_ascii=False)
+
+def _ai_to_dict(message: AIMessage) -> Dict[str, Any]:
+    data = {"content": message.content}
+    if message.tool_calls:
+        data["tool_calls"] = [{"name": c["name"], "args": c["args"], "id": c["id"]} for c in message.tool_calls]
+    if message.usage_metadata:
+        data["usage"] = dict(message.usage_metadata)
+    return data
+
+def _ai_from_dict(data: Dict[str, Any]) -> AIMessage:
+    return AIMessage(content=data.get("content", ""), tool_calls=data.get("tool_calls", []),
+                     usage_metadata=data.get("usage"))
+
+# ===============================================
+# GRABACIÓN
+# ===============================================
+class TrafficRecorder:
+    """Escribe los eventos en un JSONL de solo anexar (una línea por llamada)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "ab")
+        self._lock = threading.Lock()
+        self.write({"kind": "meta", "pid": os.getpid()})
+
+    def write(self, event: Dict[str, Any]):
+        event["ts"] = round(time.time(), 3)
+        line = dumps(event) + b"\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    # --- LLM ---
+    def wrap_llm(self, llm) -> "RecordingLLM":
+        return RecordingLLM(llm, self)
+
+    # --- Herramientas MCP ---
+    def record_tools(self, server: str, tools: Sequence[BaseTool]):
+        """Definiciones de las herramientas (para reconstruirlas en la reproducción)"""
+        self.write({"kind": "tools", "server": server, "tools": [
+            {"name": t.name, "description": t.description, "args_schema": _schema_dict(t)} for t in tools
+        ]})
+
+    def wrap_tools(self, server: str, tools: Sequence[BaseTool]) -> List[StructuredTool]:
+        async def _call(tool: BaseTool, args: Dict[str, Any]) -> Any:
+            start = time.perf_counter()
+            try:
+                output = await tool.ainvoke(args)
+            except Exception as e:
+                self.write({"kind": "tool", "key": tool_key(server, tool.name, args), "error": str(e),
+                            "ms": round((time.perf_counter() - start) * 1000, 3)})
+                raise
+            self.write({"kind": "tool", "key": tool_key(server, tool.name, args), "output": output,
+                        "ms": round((time.perf_counter() - start) * 1000, 3)})
+            return output
+
+        return wrap_tools(tools, _call)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+def _schema_dict(tool: BaseTool) -> Dict[str, Any]:
+    schema = tool.args_schema
+    if isinstance(schema, dict):
+        return schema
+    return schema.model_json_schema() if schema is not None else {}
+
+def _tool_names(tools: Sequence[Any]) -> List[str]:
+    """Nombres de herramientas, también de las ya convertidas a esquema OpenAI (dicts)"""
+    names = []
+    for t in tools:
+        if isinstance(t, dict):
+            names.append(t.get("function", t).get("name") or str(t))
+        else:
+            names.append(getattr(t, "name", None) or str(t))
+    return names
+
+class RecordingLLM:
+    """Envoltorio del LLM que graba cada llamada hecha a través de `bind_tools`"""
+
+    def __init__(self, llm, recorder: TrafficRecorder):
+        self.llm = llm
+        self.recorder = recorder
+
+    def __getattr__(self, name: str):
+        return getattr(self.llm, name)
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable:
+        bound = self.llm.bind_tools(tools, **kwargs)
+        names = _tool_names(tools)
+
+        def _write(value: Any, message: AIMessage, start: float):
+            messages = _messages(value)
+            event = {"kind": "llm", "key": llm_key(messages, names), "response": _ai_to_dict(message),
+                     "ms": round((time.perf_counter() - start) * 1000, 3)}
+            # Primer turno de la petición: se guarda el mensaje para poder volver a lanzarlo
+            if not any(isinstance(m, ToolMessage) for m in messages):
+                human = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+                if human is not None:
+                    event["input"] = human.content
+            self.recorder.write(event)
+
+        def _invoke(value: Any, config: RunnableConfig) -> AIMessage:
+            start = time.perf_counter()
+            message = bound.invoke(value, config)
+            _write(value, message, start)
+            return message
+
+        async def _ainvoke(value: Any, config: RunnableConfig) -> AIMessage:
+            start = time.perf_counter()
+            message = await bound.ainvoke(value, config)
+            _write(value, message, start)
+            return message
+
+        return RunnableLambda(_invoke, afunc=_ainvoke, name="RecordingLLM")
+
+# ===============================================
+# REPRODUCCIÓN
+# ===============================================
+def replay_speed() -> float:
+    """Factor sobre el tiempo grabado: fast=0, recorded=1 o un número"""
+    value = os.getenv("MCP_REPLAY_SPEED", "fast")
+    if value == "fast":
+        return 0.0
+    if value == "recorded":
+        return 1.0
+    return float(value)
+
+class TrafficReplayer:
+    """Sirve las respuestas grabadas por clave, en el orden en que se grabaron"""
+
+    def __init__(self, path: str, speed: Optional[float] = None):
+        self.path = path
+        self.speed = replay_speed() if speed is None else speed
+        self._llm: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._tools: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._definitions: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"llm_hits": 0, "tool_hits": 0, "misses": 0}
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    self._load(loads(line))
+
+    def _load(self, event: Dict[str, Any]):
+        kind = event.get("kind")
+        if kind == "llm":
+            self._llm[event["key"]].append(event)
+        elif kind == "tool":
+            self._tools[event["key"]].append(event)
+        elif kind == "tools":
+            self._definitions[event["server"]] = event["tools"]
+
+    def inputs(self) -> List[str]:
+        """Mensajes de usuario grabados, en orden de llegada"""
+        events = sorted((e for queue in self._llm.values() for e in queue if "input" in e), key=lambda e: e["ts"])
+        return [e["input"] for e in events]
+
+    def _take(self, table: Dict[str, Deque[Dict[str, Any]]], key: str, what: str) -> Dict[str, Any]:
+        with self._lock:
+            queue = table.get(key)
+            if not queue:
+                self.stats["misses"] += 1
+                raise ReplayMissError(f"{what} no grabado: {key}")
+            event = queue.popleft()
+            # La última respuesta se mantiene para peticiones repetidas
+            if not queue:
+                queue.append(event)
+            return event
+
+    def _delay(self, event: Dict[str, Any]) -> float:
+        return event.get("ms", 0) / 1000 * self.speed
+
+    # --- LLM ---
+    def llm(self) -> "ReplayLLM":
+        return ReplayLLM(self)
+
+    # --- Herramientas MCP ---
+    def tools(self, server: str) -> List[StructuredTool]:
+        """Herramientas reconstruidas a partir de las definiciones grabadas"""
+        definitions = self._definitions.get(server)
+        if definitions is None:
+            raise ReplayMissError(f"Sin definiciones de herramientas grabadas para '{server}'")
+        return [self._replay_tool(server, d) for d in definitions]
+
+    def _replay_tool(self, server: str, definition: Dict[str, Any]) -> StructuredTool:
+        name = definition["name"]
+
+        async def _coroutine(**kwargs):
+            event = self._take(self._tools, tool_key(server, name, kwargs), "call_tool")
+            if self.speed:
+                await asyncio.sleep(self._delay(event))
+            with self._lock:
+                self.stats["tool_hits"] += 1
+            if "error" in event:
+                raise ToolException(event["error"])
+            return event["output"]
+
+        return StructuredTool(
+            name=name,
+            description=definition.get("description", ""),
+            args_schema=definition.get("args_schema") or {"type": "object", "properties": {}},
+            coroutine=_coroutine,
+        )
+
+class ReplayLLM:
+    """LLM que responde con la grabación (sin red)"""
+
+    def __init__(self, replayer: TrafficReplayer):
+        self.replayer = replayer
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable:
+        names = _tool_names(tools)
+
+        def _event(value: Any) -> Dict[str, Any]:
+            event = self.replayer._take(self.replayer._llm, llm_key(_messages(value), names), "Llamada al LLM")
+            with self.replayer._lock:
+                self.replayer.stats["llm_hits"] += 1
+            return event
+
+        def _invoke(value: Any, config: RunnableConfig) -> AIMessage:
+            event = _event(value)
+            if self.replayer.speed:
+                time.sleep(self.replayer._delay(event))
+            return _ai_from_dict(event["response"])
+
+        async def _ainvoke(value: Any, config: RunnableConfig) -> AIMessage:
+            event = _event(value)
+            if self.replayer.speed:
+                await asyncio.sleep(self.replayer._delay(event))
+            return _ai_from_dict(event["response"])
+
+        return RunnableLambda(_invoke, afunc=_ainvoke, name="ReplayLLM")
+
+# ===============================================
+# MODO SEGÚN ENTORNO
+# ===============================================
+_traffic: Any = None
+_traffic_lock = threading.Lock()
+
+def get_traffic():
+    """TrafficRecorder (MCP_RECORD), TrafficReplayer (MCP_REPLAY) o None; uno por proceso"""
+    global _traffic
+    with _traffic_lock:
+        if _traffic is None:
+            if os.getenv("MCP_REPLAY"):
+                _traffic = TrafficReplayer(os.environ["MCP_REPLAY"])
+            elif os.getenv("MCP_RECORD"):
+                _traffic = TrafficRecorder(os.environ["MCP_RECORD"])
+            else:
+                _traffic = False
+        return _traffic or None
+
+def replay_enabled() -> bool:
+    return isinstance(get_traffic(), TrafficReplayer)
+
+def traffic_llm(llm_factory: Callable[[], Any]):
+    """LLM según el modo: grabado, reproducido o el de `llm_factory` sin cambios"""
+    traffic = get_traffic()
+    if isinstance(traffic, TrafficReplayer):
+        return traffic.llm()
+    llm = llm_factory()
+    if isinstance(traffic, TrafficRecorder):
+        return traffic.wrap_llm(llm)
+    return llm
+
+async def traffic_tools(server: str, get_tools: Callable[[], Awaitable[List[BaseTool]]]) -> List[BaseTool]:
+    """Herramientas MCP según el modo: grabadas, reproducidas o las del servidor sin cambios"""
+    traffic = get_traffic()
+    if isinstance(traffic, TrafficReplayer):
+        return traffic.tools(server)
+    tools = await get_tools()
+    if isinstance(traffic, TrafficRecorder):
+        traffic.record_tools(server, tools)
+        return traffic.wrap_tools(server, tools)
+    return tools
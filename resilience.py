@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Resiliencia: Circuit Breakers y Fallbacks
+Breakers por servidor y por herramienta (closed / open / half-open) con
+respuestas de respaldo desde caché obsoleta o copia local de la herramienta
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from tool_wrappers import wrap_tool
+
+logger = logging.getLogger(__name__)
+
+# ===============================================
+# CONFIGURACIÓN (VARIABLES DE ENTORNO)
+# ===============================================
+def breaker_settings_from_env() -> Dict[str, Any]:
+    """Lee la configuración de breakers desde variables de entorno"""
+    return {
+        "error_rate_threshold": float(os.getenv("MCP_BREAKER_ERROR_RATE", "0.5")),
+        "latency_threshold": float(os.getenv("MCP_BREAKER_LATENCY", "5.0")),
+        "window": int(os.getenv("MCP_BREAKER_WINDOW", "20")),
+        "min_calls": int(os.getenv("MCP_BREAKER_MIN_CALLS", "5")),
+        "open_seconds": float(os.getenv("MCP_BREAKER_OPEN_SECONDS", "30")),
+        "half_open_max_calls": int(os.getenv("MCP_BREAKER_HALF_OPEN_CALLS", "1")),
+    }
+
+def fallback_order_from_env() -> List[str]:
+    """Orden de respaldo: 'cache', 'local' (vacío = fallo rápido sin respaldo)"""
+    raw = os.getenv("MCP_BREAKER_FALLBACK", "cache,local")
+    return [item.strip() for item in raw.split(",") if item.strip()]
+
+# ===============================================
+# CIRCUIT BREAKER
+# ===============================================
+class CircuitOpenError(RuntimeError):
+    """El breaker está abierto: la llamada se rechaza sin tocar el servidor"""
+
+class CircuitBreaker:
+    """Circuit breaker con ventana deslizante de tasa de error y latencia.
+
+    Una llamada cuenta como fallo si lanza excepción o si tarda más que
+    `latency_threshold`. Con al menos `min_calls` en la ventana y una tasa de
+    fallos >= `error_rate_threshold` el breaker se abre durante `open_seconds`;
+    después pasa a half-open y deja pasar `half_open_max_calls` sondas.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        error_rate_threshold: float = 0.5,
+        latency_threshold: float = 5.0,
+        window: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.error_rate_threshold = error_rate_threshold
+        self.latency_threshold = latency_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._outcomes = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._lock = threading.Lock()
+
+        # Contadores para métricas
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.opened_count = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._half_open_in_flight = 0
+        return self._state
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self.opened_count += 1
+        logger.warning("[CircuitBreaker] %s abierto", self.name)
+
+    def allow(self) -> bool:
+        """Indica si una llamada puede pasar (reserva una sonda en half-open)"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def release(self):
+        """Libera una sonda reservada por `allow()` sin registrar resultado"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def record(self, ok: bool, latency: float):
+        """Registra el resultado de una llamada autorizada por `allow()`"""
+        failed = (not ok) or latency > self.latency_threshold
+        with self._lock:
+            self.calls += 1
+            if failed:
+                self.failures += 1
+            state = self._current_state()
+            if state == self.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                if failed:
+                    self._open()
+                else:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                return
+            self._outcomes.append(failed)
+            if state == self.CLOSED and len(self._outcomes) >= self.min_calls:
+                error_rate = sum(self._outcomes) / len(self._outcomes)
+                if error_rate >= self.error_rate_threshold:
+                    self._open()
+
+    async def call(self, func: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """Ejecuta `func()` protegido por el breaker (con timeout opcional)"""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit breaker '{self.name}' abierto")
+        start = time.monotonic()
+        try:
+            if timeout:
+                result = await asyncio.wait_for(func(), timeout=timeout)
+            else:
+                result = await func()
+        except asyncio.CancelledError:
+            # Cancelar (p. ej. un prefetch especulativo descartado) no es un fallo
+            self.release()
+            raise
+        except Exception:
+            self.record(False, time.monotonic() - start)
+            raise
+        self.record(True, time.monotonic() - start)
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            window = list(self._outcomes)
+        return {
+            "state": state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "opened": self.opened_count,
+            "window_error_rate": (sum(window) / len(window)) if window else 0.0,
+        }
+
+class BreakerRegistry:
+    """Registro de breakers por nombre ('server:tools', 'tool:tools/sumar', ...)"""
+
+    def __init__(self, **settings):
+        self.settings = settings or breaker_settings_from_env()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            if name not in self._breakers:
+                self._breakers[name] = CircuitBreaker(name, **self.settings)
+            return self._breakers[name]
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.metrics() for breaker in breakers}
+
+    def to_prometheus(self) -> str:
+        """Métricas en formato de texto de Prometheus"""
+        states = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+        lines = []
+        for name, data in self.metrics().items():
+            label = f'{{breaker="{name}"}}'
+            lines.append(f"mcp_breaker_state{label} {states[data['state']]}")
+            lines.append(f"mcp_breaker_calls_total{label} {data['calls']}")
+            lines.append(f"mcp_breaker_failures_total{label} {data['failures']}")
+            lines.append(f"mcp_breaker_rejected_total{label} {data['rejected']}")
+            lines.append(f"mcp_breaker_opened_total{label} {data['opened']}")
+        return "\n".join(lines) + "\n"
+
+# ===============================================
+# CACHÉ OBSOLETA (ÚLTIMO RESULTADO CORRECTO)
+# ===============================================
+class StaleCache:
+    """Guarda el último resultado correcto por (herramienta, argumentos)"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(tool_name: str, args: Dict[str, Any]) -> str:
+        return tool_name + ":" + json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)
+
+    def put(self, tool_name: str, args: Dict[str, Any], value: Any):
+        key = self.key(tool_name, args)
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def get(self, tool_name: str, args: Dict[str, Any]) -> Any:
+        with self._lock:
+            return self._data.get(self.key(tool_name, args))
+
+# ===============================================
+# HERRAMIENTAS PROTEGIDAS
+# ===============================================
+class ResilientToolCaller:
+    """Ejecuta herramientas MCP a través de breakers de servidor y de herramienta"""
+
+    def __init__(
+        self,
+        server_name: str,
+        registry: Optional[BreakerRegistry] = None,
+        local_tools: Optional[Iterable[BaseTool]] = None,
+        fallback: Optional[Sequence[str]] = None,
+        call_timeout: Optional[float] = None,
+    ):
+        self.server_name = server_name
+        self.registry = registry or BreakerRegistry()
+        self.local_tools = {t.name: t for t in (local_tools or [])}
+        self.fallback = list(fallback) if fallback is not None else fallback_order_from_env()
+        self.call_timeout = call_timeout if call_timeout is not None else float(os.getenv("MCP_TOOL_TIMEOUT", "10"))
+        self.cache = StaleCache()
+        self.fallback_served = 0
+
+    @property
+    def server_breaker(self) -> CircuitBreaker:
+        return self.registry.get(f"server:{self.server_name}")
+
+    def tool_breaker(self, tool_name: str) -> CircuitBreaker:
+        return self.registry.get(f"tool:{self.server_name}/{tool_name}")
+
+    async def __call__(self, tool: BaseTool, args: Dict[str, Any]) -> Any:
+        server_breaker = self.server_breaker
+        tool_breaker = self.tool_breaker(tool.name)
+        try:
+            if not server_breaker.allow():
+                raise CircuitOpenError(f"Circuit breaker '{server_breaker.name}' abierto")
+            start = time.monotonic()
+            try:
+                result = await tool_breaker.call(lambda: tool.ainvoke(args), timeout=self.call_timeout)
+            except CircuitOpenError:
+                # El servidor no ha fallado: liberar la sonda sin penalizarlo
+                server_breaker.release()
+                raise
+            except asyncio.CancelledError:
+                server_breaker.release()
+                raise
+            except Exception:
+                server_breaker.record(False, time.monotonic() - start)
+                raise
+            server_breaker.record(True, time.monotonic() - start)
+        except Exception as exc:
+            return await self._fallback(tool, args, exc)
+        self.cache.put(tool.name, args, result)
+        return result
+
+    async def _fallback(self, tool: BaseTool, args: Dict[str, Any], exc: Exception) -> Any:
+        for source in self.fallback:
+            if source == "cache":
+                cached = self.cache.get(tool.name, args)
+                if cached is not None:
+                    self.fallback_served += 1
+                    logger.info("[Resilience] %s servido desde caché obsoleta (%s)", tool.name, exc)
+                    return cached
+            elif source == "local" and tool.name in self.local_tools:
+                self.fallback_served += 1
+                logger.info("[Resilience] %s servido por copia local (%s)", tool.name, exc)
+                return await self.local_tools[tool.name].ainvoke(args)
+        raise exc
+
+    async def discover(self, get_tools: Callable[[], Awaitable[List[BaseTool]]]) -> List[BaseTool]:
+        """Descubre herramientas a través del breaker de servidor"""
+        return await self.server_breaker.call(get_tools, timeout=self.call_timeout)
+
+    def protect(self, tools: Iterable[BaseTool]) -> List[StructuredTool]:
+        return [wrap_tool(tool, self) for tool in tools]
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"breakers": self.registry.metrics(), "fallback_served": self.fallback_served}
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Serialización compacta de resultados de herramientas
+Los servidores serializan una sola vez (orjson si está disponible) y devuelven
+el texto ya listo; los payloads grandes se pueden comprimir (zlib + base64).
+Los orquestadores solo descomprimen: el texto JSON llega tal cual al LLM.
+"""
+
+import base64
+import functools
+import inspect
+import json
+import os
+import zlib
+from typing import Any, Callable, Dict, Iterable, List
+
+from mcp.types import CallToolResult, TextContent
+from langchain_core.tools import BaseTool
+
+from tool_wrappers import wrap_tools
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional
+    orjson = None
+
+# Prefijo que identifica un payload comprimido
+COMPRESSED_PREFIX = "~zlib64:"
+
+def compress_threshold() -> int:
+    """Bytes a partir de los cuales se comprime (0 = nunca)"""
+    return int(os.getenv("MCP_COMPRESS_THRESHOLD", "0"))
+
+def structured_content_enabled() -> bool:
+    """Incluir también `structuredContent` en la respuesta MCP"""
+    return os.getenv("MCP_STRUCTURED_CONTENT") == "1"
+
+# ===============================================
+# CODIFICACIÓN / DECODIFICACIÓN
+# ===============================================
+def dumps(data: Any) -> bytes:
+    """JSON compacto en bytes (sin espacios ni indentación)"""
+    if orjson is not None:
+        return orjson.dumps(data, default=str)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+def loads(raw) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def encode_tool_result(data: Any, threshold: int = None) -> str:
+    """Serializa una vez; comprime si supera el umbral"""
+    raw = dumps(data)
+    threshold = compress_threshold() if threshold is None else threshold
+    if threshold and len(raw) >= threshold:
+        return COMPRESSED_PREFIX + base64.b64encode(zlib.compress(raw)).decode("ascii")
+    return raw.decode("utf-8")
+
+def expand_tool_output(output: Any) -> Any:
+    """Descomprime un payload comprimido; cualquier otra salida se devuelve sin tocar"""
+    if isinstance(output, str) and output.startswith(COMPRESSED_PREFIX):
+        return zlib.decompress(base64.b64decode(output[len(COMPRESSED_PREFIX):])).decode("utf-8")
+    return output
+
+def decode_tool_result(output: Any) -> Any:
+    """Convierte la salida de una herramienta en objeto Python (si es JSON)"""
+    output = expand_tool_output(output)
+    if isinstance(output, str):
+        try:
+            return loads(output)
+        except ValueError:
+            return output
+    return output
+
+# ===============================================
+# LADO SERVIDOR (FastMCP)
+# ===============================================
+def _to_call_tool_result(data: Any) -> CallToolResult:
+    return CallToolResult(
+        content=[TextContent(type="text", text=encode_tool_result(data))],
+        structuredContent=data if structured_content_enabled() and isinstance(data, dict) else None,
+    )
+
+def compact_result(func: Callable) -> Callable:
+    """Decorador para herramientas FastMCP que devuelven dict/list.
+
+    Evita la validación del esquema de salida y el JSON indentado de FastMCP:
+    el resultado se serializa una sola vez y se devuelve como CallToolResult.
+    """
+    signature = inspect.signature(func)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return _to_call_tool_result(await func(*args, **kwargs))
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return _to_call_tool_result(func(*args, **kwargs))
+
+    wrapper.__signature__ = signature.replace(return_annotation=CallToolResult)
+    return wrapper
+
+# ===============================================
+# LADO CLIENTE (orquestadores)
+# ===============================================
+async def _expanding_call(tool: BaseTool, args: Dict[str, Any]) -> Any:
+    return expand_tool_output(await tool.ainvoke(args))
+
+def expanding_tools(tools: Iterable[BaseTool]) -> List[BaseTool]:
+    """Envuelve herramientas MCP para descomprimir sus resultados antes del LLM"""
+    return wrap_tools(tools, _expanding_call)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Backends asíncronos compartidos por las herramientas de los servidores MCP
+Un backend de búsqueda por almacén de datos (usuarios, clima) por proceso,
+límites de concurrencia por backend y timeouts por petición.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from mcp.server.fastmcp import Context
+
+from data_access import DataStore, users_store, weather_store
+from process_tools import warm_up_runners
+
+# ===============================================
+# CONFIGURACIÓN (VARIABLES DE ENTORNO)
+# ===============================================
+def backend_limits_from_env() -> Dict[str, int]:
+    """Llamadas concurrentes permitidas por backend"""
+    return {
+        "users": int(os.getenv("MCP_USERS_CONCURRENCY", "256")),
+        "weather": int(os.getenv("MCP_WEATHER_CONCURRENCY", "256")),
+    }
+
+def request_timeout() -> float:
+    return float(os.getenv("MCP_REQUEST_TIMEOUT", "10"))
+
+# ===============================================
+# BACKENDS LOCALES DE SUSTITUCIÓN
+# ===============================================
+class LookupBackend:
+    """Backend asíncrono de búsqueda sobre un DataStore en memoria.
+
+    Sustituye al servicio real (usuarios, clima); mantiene la misma interfaz
+    asíncrona que tendría un cliente HTTP. El almacén puede estar en memoria,
+    en SQLite o en JSONL mapeado (ver data_access.py).
+    """
+
+    def __init__(self, store: DataStore):
+        self.store = store
+
+    async def get(self, key: str) -> Dict[str, Any]:
+        return self.store.get(key)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        return self.store.get_many(keys)
+
+# ===============================================
+# CONJUNTO DE BACKENDS DEL SERVIDOR
+# ===============================================
+class ServerBackends:
+    """Recursos compartidos por todas las sesiones del proceso servidor"""
+
+    def __init__(self):
+        limits = backend_limits_from_env()
+        self.users = LookupBackend(users_store)
+        self.weather = LookupBackend(weather_store)
+        self._limits = {name: asyncio.Semaphore(limit) for name, limit in limits.items()}
+
+    async def call(self, backend: str, func: Callable[..., Awaitable[Any]], *args,
+                   timeout: Optional[float] = None) -> Any:
+        """Ejecuta `func(*args)` respetando el límite del backend y el timeout de la petición"""
+        async with self._limits[backend]:
+            return await asyncio.wait_for(func(*args), timeout=timeout or request_timeout())
+
+    async def aclose(self):
+        """Punto de cierre de los backends con conexiones propias (los de búsqueda no tienen)"""
+
+_backends: Optional[ServerBackends] = None
+# Sesiones abiertas que usan `_backends`; con la última se cierran
+_sessions = 0
+
+def shared_backends() -> ServerBackends:
+    global _backends
+    if _backends is None:
+        _backends = ServerBackends()
+    return _backends
+
+@asynccontextmanager
+async def server_lifespan(server) -> AsyncIterator[ServerBackends]:
+    """Lifespan de FastMCP.
+
+    FastMCP entra en el lifespan en cada sesión; los backends se crean una
+    sola vez por proceso y se reutilizan entre sesiones. Al cerrarse la
+    última sesión se cierran y la siguiente
+    sesión crea otros.
+    """
+    global _backends, _sessions
+    backends = shared_backends()
+    _sessions += 1
+    try:
+        await warm_up_runners()
+        yield backends
+    finally:
+        _sessions -= 1
+        if _sessions == 0 and _backends is backends:
+            _backends = None
+            await backends.aclose()
+
+def get_backends(ctx: Context) -> ServerBackends:
+    """Backends del servidor a partir del contexto de la petición MCP"""
+    return ctx.request_context.lifespan_context
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Prefetch especulativo de herramientas
+Mientras el LLM decide, un predictor local barato (parecido con los `examples`
+de TOOL_DESCRIPTIONS + extracción de argumentos) lanza la llamada más probable
+a una herramienta de solo lectura. Si el LLM pide exactamente esa llamada, se
+usa el resultado ya en curso; si no, se cancela al terminar la petición.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import re
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+from data_access import LOCATION_ALIASES, normalize_location, normalize_user_id, strip_accents, weather_store
+from tool_wrappers import wrap_tools
+
+logger = logging.getLogger(__name__)
+
+def speculation_enabled() -> bool:
+    return os.getenv("MCP_SPECULATE") == "1"
+
+# ===============================================
+# PREDICTOR LOCAL
+# ===============================================
+TOKEN_RE = re.compile(r"[a-z]+|\d+(?:[.,]\d+)?|[+*]")
+NUMBER_RE = re.compile(r"-?\d+(?:[.,]\d+)?")
+
+def _tokens(text: str) -> Set[str]:
+    """Tokens normalizados; los números se sustituyen por <n> para comparar con los ejemplos"""
+    tokens = TOKEN_RE.findall(strip_accents(text).lower())
+    return {"<n>" if token[0].isdigit() else token for token in tokens}
+
+def _numbers(text: str) -> List[float]:
+    return [float(n.replace(",", ".")) for n in NUMBER_RE.findall(text)]
+
+def _ids(text: str) -> List[str]:
+    return re.findall(r"\d+", text)
+
+def _locations(text: str) -> List[str]:
+    """Ubicaciones conocidas (claves del almacén y alias) que aparecen en el texto, en orden"""
+    normalized = f" {normalize_location(text)} "
+    found = []
+    for name in sorted(set(weather_store.keys()) | set(LOCATION_ALIASES), key=len, reverse=True):
+        position = normalized.find(f" {name} ")
+        if position >= 0:
+            found.append((position, normalize_location(name)))
+            normalized = normalized.replace(f" {name} ", " " * (len(name) + 2))
+    return [name for _, name in sorted(found)]
+
+def _exactly(n: int, values: List[Any]) -> bool:
+    return len(values) == n
+
+# Extracción de argumentos por herramienta: mensaje -> argumentos (None si no se pueden deducir)
+ARG_EXTRACTORS: Dict[str, Callable[[str], Optional[Dict[str, Any]]]] = {
+    "sumar": lambda m: {"a": _numbers(m)[0], "b": _numbers(m)[1]} if _exactly(2, _numbers(m)) else None,
+    "multiplicar": lambda m: {"a": _numbers(m)[0], "b": _numbers(m)[1]} if _exactly(2, _numbers(m)) else None,
+    "sumar_lista": lambda m: {"numeros": _numbers(m)} if len(_numbers(m)) > 2 else None,
+    "getUserInfo": lambda m: {"user_id": _ids(m)[0]} if _exactly(1, _ids(m)) else None,
+    "getUsersInfo": lambda m: {"user_ids": _ids(m)} if len(_ids(m)) > 1 else None,
+    "getWeather": lambda m: {"location": _locations(m)[0]} if _exactly(1, _locations(m)) else None,
+    "getWeatherMany": lambda m: {"locations": _locations(m)} if len(_locations(m)) > 1 else None,
+}
+
+class ToolPredictor:
+    """Predice (herramienta, argumentos) comparando el mensaje con los ejemplos.
+
+    Solo considera herramientas marcadas `read_only` en las descripciones y con
+    extractor de argumentos; devuelve None si ninguna supera `min_score`.
+    """
+
+    def __init__(self, tool_descriptions: Dict[str, Dict], min_score: float = 0.3):
+        self.min_score = min_score
+        self._examples: Dict[str, List[Set[str]]] = {
+            name: [_tokens(example) for example in desc.get("examples", [])]
+            for name, desc in tool_descriptions.items()
+            if desc.get("read_only") and name in ARG_EXTRACTORS
+        }
+
+    def _score(self, tokens: Set[str], name: str) -> float:
+        return max((len(tokens & ex) / len(tokens | ex) for ex in self._examples[name] if ex), default=0.0)
+
+    def predict(self, message: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        tokens = _tokens(message)
+        if not tokens:
+            return None
+        ranked = sorted(((self._score(tokens, name), name) for name in self._examples), reverse=True)
+        for score, name in ranked:
+            if score < self.min_score:
+                break
+            args = ARG_EXTRACTORS[name](message)
+            if args is not None:
+                return name, args
+        return None
+
+# ===============================================
+# PREFETCH POR PETICIÓN
+# ===============================================
+# Normalización que aplica la propia herramienta a cada campo (data_access.py): el extractor
+# devuelve "nueva york" y el LLM puede pedir "NYC" o "New York", que la herramienta resuelve igual
+FIELD_NORMALIZERS: Dict[str, Callable[[str], str]] = {
+    "location": normalize_location,
+    "locations": normalize_location,
+    "user_id": normalize_user_id,
+    "user_ids": normalize_user_id,
+}
+
+def _canonical(value: Any, normalize: Optional[Callable[[str], str]] = None) -> Any:
+    """Normaliza argumentos para comparar la predicción con la llamada del LLM (5 == 5.0, 'NYC' == 'nueva york')"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return (normalize(value) if normalize else value).strip().casefold()
+    if isinstance(value, dict):
+        return {k: _canonical(v, FIELD_NORMALIZERS.get(k)) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v, normalize) for v in value]
+    return value
+
+def call_key(name: str, args: Dict[str, Any]) -> str:
+    return name + ":" + json.dumps(_canonical(args), sort_keys=True, ensure_ascii=False)
+
+# Llamadas especulativas en curso de la petición actual
+_pending: contextvars.ContextVar[Optional[Dict[str, asyncio.Task]]] = contextvars.ContextVar(
+    "speculative_calls", default=None
+)
+
+def _consume_exception(task: asyncio.Task):
+    if not task.cancelled():
+        task.exception()
+
+class Speculator:
+    """Lanza la llamada predicha en paralelo con el LLM y la reutiliza si coincide"""
+
+    def __init__(self, predictor: ToolPredictor):
+        self.predictor = predictor
+        self._tools: Dict[str, BaseTool] = {}
+        self.stats = {"started": 0, "hits": 0, "misses": 0, "wasted": 0, "errors": 0}
+
+    def attach(self, tools: Iterable[BaseTool]) -> List[StructuredTool]:
+        """Envuelve las herramientas para que consulten primero las llamadas especulativas"""
+        tools = list(tools)
+        self._tools = {tool.name: tool for tool in tools}
+        return wrap_tools(tools, self._call)
+
+    @asynccontextmanager
+    async def speculate(self, message: str):
+        """Ámbito de una petición: arranca el prefetch y cancela lo que no se haya usado"""
+        pending: Dict[str, asyncio.Task] = {}
+        token = _pending.set(pending)
+        prediction = self.predictor.predict(message)
+        if prediction is not None and prediction[0] in self._tools:
+            name, args = prediction
+            task = asyncio.create_task(self._tools[name].ainvoke(args))
+            task.add_done_callback(_consume_exception)
+            pending[call_key(name, args)] = task
+            self.stats["started"] += 1
+        try:
+            yield
+        finally:
+            _pending.reset(token)
+            for task in pending.values():
+                self.stats["wasted"] += 1
+                task.cancel()
+
+    async def _call(self, tool: BaseTool, args: Dict[str, Any]) -> Any:
+        pending = _pending.get()
+        task = pending.pop(call_key(tool.name, args), None) if pending else None
+        if task is not None:
+            try:
+                result = await task
+                self.stats["hits"] += 1
+                return result
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # El prefetch falló: se repite la llamada de forma normal
+                self.stats["errors"] += 1
+                logger.debug("[Speculation] prefetch de %s falló; se repite", tool.name, exc_info=True)
+        elif pending:
+            # Había predicción pero el LLM pidió otra llamada
+            self.stats["misses"] += 1
+        return await tool.ainvoke(args)
+
+    def metrics(self) -> Dict[str, int]:
+        return dict(self.stats)
@@ -4,15 +4,23 @@ Servidor MCP con Orquestador Completo
 Punto 3: Todo el orquestador y las herramientas en el servidor MCP
 """
 
+import logging
 import os
+import sys
 from mcp.server.fastmcp import FastMCP
-from typing import Dict
-from pydantic import BaseModel, Field
+from typing import Optional
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.tools import tool
-from langchain.agents import create_tool_calling_agent, AgentExecutor
+from langchain.agents import AgentExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_factory import build_llm
+from arg_repair import create_repairing_agent
+from direct_results import direct_tools
+from profiling import profiler, register_profiling_tool
+from logging_setup import agent_callbacks, agent_verbose, configure_logging
+from warmup import warmup_enabled
+from tool_registry import format_tool_descriptions, langchain_tools, tool_descriptions
+from tenancy import DEFAULT_TENANT, FairScheduler, OrchestratorRegistry, TenantConfig, register_tenancy_tool
 
 # Cargar variables de entorno
 load_dotenv()
@@ -21,59 +29,12 @@ load_dotenv()
 mcp_server = FastMCP("OrchestratorServer")
 
 # ===============================================
-# ESQUEMAS PYDANTIC PARA HERRAMIENTAS INTERNAS
+# HERRAMIENTAS INTERNAS Y DESCRIPCIONES (ver tool_registry.py)
 # ===============================================
-class SumarInternoSchema(BaseModel):
-    a: float = Field(description="Primer número a sumar")
-    b: float = Field(description="Segundo número a sumar")
-
-class MultiplicarInternoSchema(BaseModel):
-    a: float = Field(description="Primer número a multiplicar")
-    b: float = Field(description="Segundo número a multiplicar")
-
-class GetUserInfoInternoSchema(BaseModel):
-    user_id: str = Field(description="ID del usuario a buscar")
-
-class GetWeatherInternoSchema(BaseModel):
-    location: str = Field(description="Ubicación para consultar el clima")
-
-# ===============================================
-# HERRAMIENTAS INTERNAS (CON DESCRIPTION EN DECORADOR)
-# ===============================================
-@tool(args_schema=SumarInternoSchema, description="Suma dos números enteros o decimales")
-def sumar_interno(a: float, b: float) -> float:
-    return a + b
-
-@tool(args_schema=MultiplicarInternoSchema, description="Multiplica dos números enteros o decimales")
-def multiplicar_interno(a: float, b: float) -> float:
-    return a * b
-
-@tool(args_schema=GetUserInfoInternoSchema, description="Obtiene información de un usuario por su ID")
-def getUserInfo_interno(user_id: str) -> Dict:
-    users_db = {
-        "123": {"name": "Juan Pérez", "email": "juan@example.com", "active": True},
-        "456": {"name": "María García", "email": "maria@example.com", "active": False},
-    }
-    return users_db.get(user_id, {"error": "Usuario no encontrado"})
-
-@tool(args_schema=GetWeatherInternoSchema, description="Obtiene el clima de una ubicación")
-def getWeather_interno(location: str) -> Dict:
-    weather_db = {
-        "nueva york": {"temp": "22°C", "condition": "Soleado"},
-        "madrid": {"temp": "18°C", "condition": "Nublado"},
-        "londres": {"temp": "15°C", "condition": "Lluvioso"},
-    }
-    return weather_db.get(location.lower(), {"error": "Ubicación no encontrada"})
-
-# ===============================================
-# DESCRIPCIONES Y PROMPT
-# ===============================================
-TOOL_DESCRIPTIONS = {
-    "sumar_interno": {"description": "Suma dos números", "examples": ["suma 5 y 3"]},
-    "multiplicar_interno": {"description": "Multiplica dos números", "examples": ["multiplica 4 por 5"]},
-    "getUserInfo_interno": {"description": "Información de usuario", "examples": ["usuario 123"]},
-    "getWeather_interno": {"description": "Clima de ubicación", "examples": ["clima en Madrid"]},
-}
+# Sufijo `_interno`: las herramientas no se exponen por MCP, solo las usa el agente del servidor
+TOOL_SUFFIX = "_interno"
+INTERNAL_TOOLS = langchain_tools(suffix=TOOL_SUFFIX)
+TOOL_DESCRIPTIONS = tool_descriptions(suffix=TOOL_SUFFIX)
 
 ORCHESTRATOR_PROMPT = """Eres un asistente orquestador inteligente.
 
@@ -86,20 +47,16 @@ Analiza el mensaje y ejecuta la herramienta apropiada."""
 # ORQUESTADOR EN SERVIDOR (ASÍNCRONO)
 # ===============================================
 class ServerOrchestrator:
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0,
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
-        self.tools = [sumar_interno, multiplicar_interno, getUserInfo_interno, getWeather_interno]
+    def __init__(self, config: Optional[TenantConfig] = None, llm=None):
+        config = config or TenantConfig()
+        # LLM compartido entre tenants del mismo modelo (ver tenancy.py)
+        self.llm = llm or build_llm(model=config.model)
+        # Resultados sin interpretación: respuesta directa con plantilla (sin segunda llamada al LLM)
+        self.tools = direct_tools([t for t in INTERNAL_TOOLS if config.tools is None or t.name in config.tools])
         
-        tool_descriptions_str = "\n".join([
-            f"- {name}: {desc['description']}"
-            for name, desc in TOOL_DESCRIPTIONS.items()
-        ])
+        tool_descriptions_str = format_tool_descriptions(TOOL_DESCRIPTIONS, config.tools)
         
-        prompt_template = ORCHESTRATOR_PROMPT.format(tool_descriptions=tool_descriptions_str)
+        prompt_template = (config.prompt or ORCHESTRATOR_PROMPT).format(tool_descriptions=tool_descriptions_str)
         
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", prompt_template),
@@ -107,42 +64,53 @@ class ServerOrchestrator:
             ("placeholder", "{agent_scratchpad}"),
         ])
         
-        agent = create_tool_calling_agent(self.llm, self.tools, self.prompt)
+        agent = create_repairing_agent(self.llm, self.tools, self.prompt)
         self.agent_executor = AgentExecutor(
             agent=agent,
             tools=self.tools,
-            verbose=True,
+            verbose=agent_verbose(),
+            callbacks=agent_callbacks(),
             handle_parsing_errors=True
         )
     
     async def process(self, message: str) -> str:
         """Procesa mensaje con orquestador interno - ASÍNCRONO con ainvoke"""
-        response = await self.agent_executor.ainvoke({"input": message})
+        async with profiler.aprofile("ServerOrchestrator") as capture:
+            response = await self.agent_executor.ainvoke({"input": message}, config={"callbacks": capture.callbacks})
         return response["output"]
 
-# Instancia global del orquestador
-_orchestrator = None
+# Orquestadores por tenant (LLM compartido por modelo) y reparto justo de la concurrencia
+registry = OrchestratorRegistry(ServerOrchestrator)
+scheduler = FairScheduler.for_registry(registry)
 
-def get_orchestrator():
-    global _orchestrator
-    if _orchestrator is None:
-        _orchestrator = ServerOrchestrator()
-    return _orchestrator
+def get_orchestrator(tenant: str = DEFAULT_TENANT):
+    return registry.get(tenant)
 
 # ===============================================
 # HERRAMIENTA MCP EXPUESTA (SIN DOCSTRING)
 # ===============================================
 @mcp_server.tool()
-async def process_message(message: str) -> str:
-    orchestrator = get_orchestrator()
-    result = await orchestrator.process(message)
+async def process_message(message: str, tenant: str = DEFAULT_TENANT) -> str:
+    async with scheduler.slot(tenant):
+        orchestrator = get_orchestrator(tenant)
+        result = await orchestrator.process(message)
     return result
 
+# Administración: profiling en caliente (admin_profiling) y estado por tenant (admin_tenants)
+register_profiling_tool(mcp_server)
+register_tenancy_tool(mcp_server, registry, scheduler)
+
 # ===============================================
 # EJECUTAR SERVIDOR
 # ===============================================
 if __name__ == "__main__":
-    print("🚀 Iniciando servidor MCP con Orquestador completo...")
-    print("🧠 El orquestador y las herramientas están en el servidor")
+    # stdout es el canal MCP: los logs van a stderr y el agente no usa verbose
+    configure_logging(stdio_server=True)
+    logger = logging.getLogger(__name__)
+    logger.info("🚀 Iniciando servidor MCP con Orquestador completo...")
+    logger.info("🧠 El orquestador y las herramientas están en el servidor")
+    if warmup_enabled():
+        # Arranque en caliente: el tenant por defecto no paga la construcción del agente
+        get_orchestrator(DEFAULT_TENANT)
     mcp_server.run(transport="stdio")
 
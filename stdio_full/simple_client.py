@@ -4,13 +4,14 @@ Interfaz Gradio para Cliente Simple
 Punto 3: UI para cliente simple que solo envía/recibe mensajes del servidor con orquestador
 """
 
-import asyncio
 import gradio as gr
 from typing import List, Tuple
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from orchestrators import SimpleMCPClient
+from gradio_launch import launch_interface
+from warmup import warmup_lifespan, warmup_ready
 
 # ===============================================
 # INSTANCIA GLOBAL DEL CLIENTE
@@ -20,7 +21,7 @@ client = SimpleMCPClient()
 # ===============================================
 # FUNCIONES PARA GRADIO
 # ===============================================
-async def process_chat_async(message: str, history: List[List[str]]) -> Tuple[List[List[str]], str]:
+async def process_chat(message: str, history: List[List[str]]) -> Tuple[List[List[str]], str]:
     """Procesa un mensaje de forma asíncrona"""
     if not message.strip():
         return history, ""
@@ -38,10 +39,6 @@ async def process_chat_async(message: str, history: List[List[str]]) -> Tuple[Li
         history.append([message, error_msg])
         return history, ""
 
-def process_chat(message: str, history: List[List[str]]) -> Tuple[List[List[str]], str]:
-    """Wrapper síncrono para Gradio"""
-    return asyncio.run(process_chat_async(message, history))
-
 def clear_chat():
     """Limpia el historial del chat"""
     return [], ""
@@ -165,13 +162,12 @@ def main():
     interface = create_gradio_interface()
     
     # Configuración del servidor
-    interface.launch(
+    launch_interface(
+        interface,
         server_name="0.0.0.0",
         server_port=7862,
-        share=False,
-        debug=True,
-        show_error=True,
-        inbrowser=True,
+        lifespan=warmup_lifespan(lambda: client),
+        ready_check=lambda: warmup_ready(lambda: client),
     )
 
 if __name__ == "__main__":
@@ -5,14 +5,21 @@ Punto 2: UI para orquestador en cliente, herramientas en servidor MCP
 """
 
 import asyncio
+import logging
 import gradio as gr
 from typing import List, Tuple
 import os
+import sys
 from dotenv import load_dotenv
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gradio_launch import launch_interface
+from warmup import warmup_lifespan, warmup_ready
 
 # Cargar variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Modo diagnóstico: si MCP_DUMMY=1, no llama MCP y responde de inmediato
 MCP_DUMMY = os.getenv("MCP_DUMMY") == "1"
 
@@ -24,8 +31,6 @@ def get_orchestrator():
     global _orchestrator
     if _orchestrator is None:
         # Import solo cuando se necesita
-        import sys
-        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         from orchestrators import MCPOrchestrator
         
         # Crear con ruta absoluta
@@ -37,14 +42,13 @@ def get_orchestrator():
 # ===============================================
 # FUNCIONES PARA GRADIO
 # ===============================================
-async def process_chat_async(message: str, history: List[List[str]]) -> Tuple[List[List[str]], str]:
+async def process_chat(message: str, history: List[List[str]]) -> Tuple[List[List[str]], str]:
     """Procesa un mensaje de forma asíncrona con logs y timeout para evitar spinner infinito."""
     if not message.strip():
         return history, ""
     
     try:
-        # Log: inicio
-        print(f"[process_chat_async] Recibido mensaje: {message}")
+        logger.debug("Recibido mensaje: %s", message)
 
         # Modo diagnóstico: evita MCP totalmente
         if MCP_DUMMY:
@@ -58,26 +62,21 @@ async def process_chat_async(message: str, history: List[List[str]]) -> Tuple[Li
                 timeout=25
             )
 
-        # Log: éxito
-        print("[process_chat_async] Respuesta lista")
+        logger.debug("Respuesta lista")
 
         history.append([message, response])
         return history, ""
     except asyncio.TimeoutError:
         error_msg = "❌ Timeout: el servidor no respondió a tiempo. Intenta de nuevo."
-        print("[process_chat_async] Timeout esperando respuesta")
+        logger.warning("Timeout esperando respuesta")
         history.append([message, error_msg])
         return history, ""
     except Exception as e:
         error_msg = f"❌ Error: {str(e)}"
-        print(f"[process_chat_async] Error: {e}")
+        logger.exception("Error procesando mensaje: %s", e)
         history.append([message, error_msg])
         return history, ""
 
-def process_chat(message: str, history: List[List[str]]) -> Tuple[List[List[str]], str]:
-    """Wrapper síncrono para Gradio"""
-    return asyncio.run(process_chat_async(message, history))
-
 def clear_chat():
     """Limpia el historial del chat"""
     return [], ""
@@ -183,13 +182,13 @@ def main():
     
     interface = create_gradio_interface()
     
-    interface.launch(
+    launch_interface(
+        interface,
         server_name="127.0.0.1",
         server_port=7861,
-        share=False,
-        debug=False,
-        show_error=True,
-        inbrowser=False,
+        # Arranque en caliente: sesión, herramientas y agente antes de la primera petición
+        lifespan=None if MCP_DUMMY else warmup_lifespan(get_orchestrator),
+        ready_check=None if MCP_DUMMY else lambda: warmup_ready(get_orchestrator),
     )
 
 if __name__ == "__main__":
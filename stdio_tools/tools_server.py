@@ -4,44 +4,31 @@ Servidor MCP con Herramientas
 Punto 2: Las herramientas corren en el servidor MCP
 """
 
+import logging
 from mcp.server.fastmcp import FastMCP
-from typing import Dict
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from server_backends import server_lifespan
+from tool_registry import register_server_tools
+from logging_setup import configure_logging
 
 # Crear servidor MCP
-mcp_server = FastMCP("ToolsServer")
+mcp_server = FastMCP("ToolsServer", lifespan=server_lifespan)
 
 # ===============================================
-# HERRAMIENTAS EN SERVIDOR MCP (SIN DOCSTRING)
+# HERRAMIENTAS EN SERVIDOR MCP (ver tool_registry.py)
+# Las que usan backends son asíncronas y los comparten por proceso (ver server_backends.py);
+# MCP_BULK_EXECUTOR=process ejecuta sumar_lista en un pool de procesos (listas muy grandes)
 # ===============================================
-@mcp_server.tool()
-def sumar(a: float, b: float) -> float:
-    return a + b
-
-@mcp_server.tool()
-def multiplicar(a: float, b: float) -> float:
-    return a * b
-
-@mcp_server.tool()
-def getUserInfo(user_id: str) -> Dict:
-    users_db = {
-        "123": {"name": "Juan Pérez", "email": "juan@example.com", "active": True},
-        "456": {"name": "María García", "email": "maria@example.com", "active": False},
-    }
-    return users_db.get(user_id, {"error": "Usuario no encontrado"})
-
-@mcp_server.tool()
-def getWeather(location: str) -> Dict:
-    weather_db = {
-        "nueva york": {"temp": "22°C", "condition": "Soleado"},
-        "madrid": {"temp": "18°C", "condition": "Nublado"},
-        "londres": {"temp": "15°C", "condition": "Lluvioso"},
-    }
-    return weather_db.get(location.lower(), {"error": "Ubicación no encontrada"})
+register_server_tools(mcp_server)
 
 # ===============================================
 # EJECUTAR SERVIDOR
 # ===============================================
 if __name__ == "__main__":
-    print("🚀 Iniciando servidor MCP en modo stdio...")
+    # stdout es el canal MCP: los logs van a stderr
+    configure_logging(stdio_server=True)
+    logging.getLogger(__name__).info("🚀 Iniciando servidor MCP en modo stdio...")
     mcp_server.run(transport="stdio")
 
@@ -1,27 +1,47 @@
 #!/usr/bin/env python3
+import os
 import subprocess
 import time
 import sys
 import requests
 
+HERE = os.path.dirname(os.path.abspath(__file__))
+
 print("=== VALIDACIÓN AUTOMATIZADA ===\n")
 
-# 1. Matar procesos previos
-print("1. Matando procesos previos...")
-subprocess.run(["pkill", "-9", "-f", "orchestrator_mcp_client.py"], 
-               stderr=subprocess.DEVNULL)
-time.sleep(2)
+# 1. Comprobar que el puerto está libre (no se matan procesos ajenos)
+print("1. Comprobando puerto 7861...")
+result = subprocess.run(["ss", "-tuln"], capture_output=True, text=True)
+if ":7861 " in result.stdout:
+    print("   ❌ El puerto 7861 ya está en uso; detén la instancia anterior")
+    sys.exit(1)
 
 # 2. Iniciar servidor
 print("2. Iniciando servidor...")
 proc = subprocess.Popen(
-    ["python", "orchestrator_mcp_client.py"],
+    [sys.executable, "orchestrator_mcp_client.py"],
     stdout=subprocess.PIPE,
     stderr=subprocess.PIPE,
-    cwd="/home/mar_anta_ruz/kiwi_gpt_service/mcp_examples/stdio_tools"
+    cwd=HERE
 )
 print(f"   PID: {proc.pid}")
-time.sleep(8)
+
+# Espera activa a /readyz (200 cuando el arranque en caliente ha terminado) en lugar de un sleep fijo
+READY_TIMEOUT = float(os.getenv("VALIDATE_READY_TIMEOUT", "60"))
+started = time.monotonic()
+while proc.poll() is None and time.monotonic() - started < READY_TIMEOUT:
+    try:
+        if requests.get("http://localhost:7861/readyz", timeout=1).status_code == 200:
+            print(f"   ✅ Listo en {time.monotonic() - started:.1f}s")
+            break
+    except requests.RequestException:
+        pass
+    time.sleep(0.2)
+else:
+    if proc.poll() is None:
+        print(f"   ❌ /readyz no respondió 200 en {READY_TIMEOUT:.0f}s")
+        proc.kill()
+        sys.exit(1)
 
 # 3. Verificar que está corriendo
 print("3. Verificando proceso...")
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Multi-tenant en los servidores con orquestador completo
+Un registro de orquestadores por (tenant, configuración) que comparten el
+cliente LLM de cada modelo y las herramientas del proceso, un planificador
+justo con pesos por tenant (un tenant pesado no acapara la concurrencia) y
+desalojo del estado de los tenants inactivos o con presión de memoria.
+
+Variables de entorno:
+    MCP_TENANTS_FILE         JSON {"tenant": {"model", "tools", "prompt", "weight"}}; "default" aplica al resto
+    MCP_TENANT_WEIGHTS       pesos por tenant: "acme=3,free=1" (sobre los del fichero; 1 por defecto)
+    MCP_TENANT_CONCURRENCY   peticiones en ejecución a la vez entre todos los tenants (8)
+    MCP_TENANT_MAX_QUEUE     peticiones en espera por tenant; con la cola llena se rechaza (64)
+    MCP_TENANT_IDLE_SECONDS  segundos sin uso tras los que se desaloja un orquestador (600)
+    MCP_TENANT_MAX           orquestadores en memoria como máximo (256)
+    MCP_TENANT_MEMORY_MB     RSS a partir del cual se desalojan los menos usados (0 = sin límite)
+"""
+
+import asyncio
+import contextlib
+import gc
+import json
+import logging
+import os
+import resource
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from llm_factory import build_llm
+from profiling import ADMIN_TOOL_PREFIX
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+
+class TenantQueueFullError(RuntimeError):
+    """La cola del tenant está llena (rechazo rápido en lugar de esperar)"""
+
+# ===============================================
+# CONFIGURACIÓN POR TENANT
+# ===============================================
+class TenantConfig:
+    """Modelo, subconjunto de herramientas (None = todas), prompt y peso de un tenant"""
+
+    def __init__(self, model: str = "gpt-4o", tools: Optional[Iterable[str]] = None,
+                 prompt: Optional[str] = None, weight: float = 1.0):
+        self.model = model
+        self.tools = tuple(sorted(tools)) if tools is not None else None
+        self.prompt = prompt
+        self.weight = float(weight)
+
+    @property
+    def key(self) -> Tuple:
+        """Lo que distingue a dos orquestadores (el peso solo afecta al planificador)"""
+        return (self.model, self.tools, self.prompt)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TenantConfig":
+        unknown = set(data) - {"model", "tools", "prompt", "weight"}
+        if unknown:
+            raise ValueError(f"Claves de tenant desconocidas: {sorted(unknown)}")
+        return cls(**data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"model": self.model, "tools": list(self.tools) if self.tools is not None else None,
+                "prompt": self.prompt is not None, "weight": self.weight}
+
+def _parse_weights(spec: str) -> Dict[str, float]:
+    weights = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = float(weight)
+    return weights
+
+def load_tenant_configs() -> Dict[str, TenantConfig]:
+    """Configuraciones de MCP_TENANTS_FILE con los pesos de MCP_TENANT_WEIGHTS aplicados"""
+    configs: Dict[str, TenantConfig] = {}
+    path = os.getenv("MCP_TENANTS_FILE")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            configs = {name: TenantConfig.from_dict(data) for name, data in json.load(f).items()}
+    for name, weight in _parse_weights(os.getenv("MCP_TENANT_WEIGHTS", "")).items():
+        configs.setdefault(name, TenantConfig()).weight = weight
+    return configs
+
+# ===============================================
+# CLIENTES LLM COMPARTIDOS
+# ===============================================
+_llms: Dict[str, Any] = {}
+_llms_lock = threading.Lock()
+
+def shared_llm(model: str):
+    """Un cliente LLM por modelo para todo el proceso (pool de conexiones HTTP compartido)"""
+    with _llms_lock:
+        if model not in _llms:
+            _llms[model] = build_llm(model=model)
+        return _llms[model]
+
+def current_rss_mb() -> float:
+    """Memoria residente actual (pico de ru_maxrss si no hay /proc)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# ===============================================
+# REGISTRO DE ORQUESTADORES
+# ===============================================
+class OrchestratorRegistry:
+    """Orquestadores por (tenant, configuración), creados bajo demanda y desalojados por LRU.
+
+    `factory(config, llm)` construye el orquestador; el LLM llega ya compartido
+    entre todos los tenants del mismo modelo.
+    """
+
+    def __init__(self, factory: Callable[[TenantConfig, Any], Any],
+                 configs: Optional[Dict[str, TenantConfig]] = None,
+                 idle_seconds: Optional[float] = None, max_entries: Optional[int] = None,
+                 memory_limit_mb: Optional[float] = None, sweep_interval: float = 5.0):
+        self.factory = factory
+        self.configs = configs if configs is not None else load_tenant_configs()
+        self.idle_seconds = idle_seconds if idle_seconds is not None else \
+            float(os.getenv("MCP_TENANT_IDLE_SECONDS", "600"))
+        self.max_entries = max_entries or int(os.getenv("MCP_TENANT_MAX", "256"))
+        self.memory_limit_mb = memory_limit_mb if memory_limit_mb is not None else \
+            float(os.getenv("MCP_TENANT_MEMORY_MB", "0"))
+        self.sweep_interval = sweep_interval
+        # (tenant, config.key) -> [orquestador, último uso]
+        self._entries: "OrderedDict[Tuple, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.created = 0
+        self.evicted = {"idle": 0, "memory": 0, "capacity": 0}
+        # Se llaman con el tenant cuando se desaloja su último orquestador (p. ej. FairScheduler.forget)
+        self.on_evict: List[Callable[[str], None]] = []
+
+    def config_for(self, tenant: str) -> TenantConfig:
+        return self.configs.get(tenant) or self.configs.get(DEFAULT_TENANT) or TenantConfig()
+
+    def get(self, tenant: Optional[str] = None):
+        """Orquestador del tenant (se crea la primera vez)"""
+        tenant = tenant or DEFAULT_TENANT
+        config = self.config_for(tenant)
+        key = (tenant, config.key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                entry = [self.factory(config, shared_llm(config.model)), now]
+                self.created += 1
+                logger.info("Orquestador creado para el tenant '%s' (%s)", tenant, config.model)
+            entry[1] = now
+            self._entries[key] = entry
+            self._evict(now)
+            return entry[0]
+
+    def _evict(self, now: float):
+        while len(self._entries) > self.max_entries:
+            self._pop_oldest("capacity")
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        # El más reciente (el que se acaba de pedir) nunca se desaloja
+        while len(self._entries) > 1 and now - next(iter(self._entries.values()))[1] > self.idle_seconds:
+            self._pop_oldest("idle")
+        # La RSS no baja al instante al liberar objetos: un cuarto de los menos usados por barrido
+        if self.memory_limit_mb > 0 and current_rss_mb() > self.memory_limit_mb:
+            for _ in range(min(len(self._entries) - 1, max(1, len(self._entries) // 4))):
+                self._pop_oldest("memory")
+            gc.collect()
+
+    def _pop_oldest(self, reason: str):
+        (tenant, _), _ = self._entries.popitem(last=False)
+        self.evicted[reason] += 1
+        logger.info("Orquestador del tenant '%s' desalojado (%s)", tenant, reason)
+        if not any(other == tenant for other, _ in self._entries):
+            for callback in self.on_evict:
+                callback(tenant)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "entries": {f"{tenant}:{key[0]}": round(now - last_used, 1)
+                            for (tenant, key), (_, last_used) in self._entries.items()},
+                "created": self.created,
+                "evicted": dict(self.evicted),
+                "shared_llms": sorted(_llms),
+                "rss_mb": round(current_rss_mb(), 1),
+            }
+
+# ===============================================
+# PLANIFICADOR JUSTO CON PESOS
+# ===============================================
+class FairScheduler:
+    """Reparte `concurrency` huecos de ejecución entre tenants en proporción a su peso.
+
+    Planificación por pasos (stride): cada petición atendida avanza el pase del
+    tenant en 1/peso y el siguiente hueco es para el tenant en espera con menor
+    pase. Un tenant que vuelve tras estar inactivo empieza en el tiempo virtual
+    actual, así que no acumula crédito.
+
+    El tenant llega del cliente (X-Tenant-ID): su estado (pase, cola,
+    estadísticas) se borra cuando el registro desaloja su orquestador por
+    inactividad, en cuanto no le quedan peticiones en espera ni en curso.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None, weights: Optional[Dict[str, float]] = None,
+                 max_queue: Optional[int] = None):
+        self.concurrency = concurrency or int(os.getenv("MCP_TENANT_CONCURRENCY", "8"))
+        self.weights = weights or {}
+        self.max_queue = max_queue or int(os.getenv("MCP_TENANT_MAX_QUEUE", "64"))
+        self._running = 0
+        self._vtime = 0.0
+        self._pass: Dict[str, float] = {}
+        self._queues: Dict[str, Deque[asyncio.Future]] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        # Huecos ocupados por tenant y tenants desalojados que aún tenían peticiones
+        self._active: Dict[str, int] = {}
+        self._forget_pending: Set[str] = set()
+
+    @classmethod
+    def from_configs(cls, configs: Dict[str, TenantConfig]) -> "FairScheduler":
+        return cls(weights={name: config.weight for name, config in configs.items()})
+
+    @classmethod
+    def for_registry(cls, registry: OrchestratorRegistry) -> "FairScheduler":
+        """Planificador con los pesos del registro que olvida a los tenants que este desaloja"""
+        scheduler = cls.from_configs(registry.configs)
+        registry.on_evict.append(scheduler.forget)
+        return scheduler
+
+    def _weight(self, tenant: str) -> float:
+        return self.weights.get(tenant) or self.weights.get(DEFAULT_TENANT) or 1.0
+
+    def _charge(self, tenant: str):
+        start = max(self._pass.get(tenant, 0.0), self._vtime)
+        self._vtime = start
+        self._pass[tenant] = start + 1.0 / self._weight(tenant)
+        self._running += 1
+        self._active[tenant] = self._active.get(tenant, 0) + 1
+
+    def _stat(self, tenant: str) -> Dict[str, float]:
+        return self._stats.setdefault(tenant, {"served": 0, "rejected": 0, "wait_ms": 0.0})
+
+    def _waiting(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def _acquire(self, tenant: str):
+        stats = self._stat(tenant)
+        if self._running < self.concurrency and not self._waiting():
+            self._charge(tenant)
+            stats["served"] += 1
+            return
+        queue = self._queues.setdefault(tenant, deque())
+        if len(queue) >= self.max_queue:
+            stats["rejected"] += 1
+            raise TenantQueueFullError(f"Cola del tenant '{tenant}' llena ({self.max_queue})")
+        future = asyncio.get_running_loop().create_future()
+        queue.append(future)
+        started = time.perf_counter()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # El hueco llegó a la vez que la cancelación: se devuelve
+                self._release(tenant)
+            elif future in queue:
+                queue.remove(future)
+                if not stats["served"]:
+                    # Nunca atendido: no tiene orquestador en el registro que lo desaloje
+                    self.forget(tenant)
+            raise
+        stats["served"] += 1
+        stats["wait_ms"] += (time.perf_counter() - started) * 1000
+
+    def _release(self, tenant: str):
+        self._running -= 1
+        active = self._active.get(tenant, 1) - 1
+        if active:
+            self._active[tenant] = active
+        else:
+            self._active.pop(tenant, None)
+        if tenant in self._forget_pending:
+            self.forget(tenant)
+        while self._running < self.concurrency:
+            candidates = [tenant for tenant, queue in self._queues.items() if queue]
+            if not candidates:
+                return
+            tenant = min(candidates, key=lambda t: max(self._pass.get(t, 0.0), self._vtime))
+            future = self._queues[tenant].popleft()
+            if future.done():
+                continue
+            self._charge(tenant)
+            future.set_result(None)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, tenant: Optional[str] = None):
+        """Espera el turno del tenant y ocupa un hueco de ejecución mientras dura el bloque"""
+        await self._acquire(tenant or DEFAULT_TENANT)
+        try:
+            yield
+        finally:
+            self._release(tenant or DEFAULT_TENANT)
+
+    def forget(self, tenant: str):
+        """Borra el estado del tenant (o lo aplaza hasta que no tenga peticiones en espera ni en curso)"""
+        if self._queues.get(tenant) or self._active.get(tenant):
+            self._forget_pending.add(tenant)
+            return
+        self._forget_pending.discard(tenant)
+        self._queues.pop(tenant, None)
+        self._pass.pop(tenant, None)
+        self._stats.pop(tenant, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "running": self._running,
+            "tenants": {
+                tenant: {
+                    "weight": self._weight(tenant),
+                    "queued": len(self._queues.get(tenant, ())),
+                    "served": int(stats["served"]),
+                    "rejected": int(stats["rejected"]),
+                    "mean_wait_ms": round(stats["wait_ms"] / stats["served"], 2) if stats["served"] else 0.0,
+                }
+                for tenant, stats in self._stats.items()
+            },
+        }
+
+# ===============================================
+# HERRAMIENTA MCP DE ADMINISTRACIÓN
+# ===============================================
+def register_tenancy_tool(mcp_server, registry: OrchestratorRegistry, scheduler: FairScheduler):
+    """Añade la herramienta `admin_tenants` (registro y colas por tenant)"""
+
+    @mcp_server.tool(name=f"{ADMIN_TOOL_PREFIX}tenants")
+    async def admin_tenants() -> Dict[str, Any]:
+        return {"registry": registry.metrics(), "scheduler": scheduler.metrics()}
+
+    return admin_tenants
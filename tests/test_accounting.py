@@ -0,0 +1,23 @@
+from langchain.agents import AgentExecutor
+
+from accounting import Budget
+
+
+def test_default_budget_matches_agent_executor(monkeypatch):
+    for name in ("MCP_BUDGET_MAX_ITERATIONS", "MCP_BUDGET_MAX_SECONDS", "MCP_BUDGET_MAX_TOKENS",
+                 "MCP_BUDGET_MAX_TOOL_CALLS"):
+        monkeypatch.delenv(name, raising=False)
+    fields = AgentExecutor.model_fields
+    for budget in (Budget(), Budget.from_env()):
+        assert budget.max_iterations == fields["max_iterations"].default
+        assert budget.max_execution_time == fields["max_execution_time"].default
+        assert (budget.max_tokens, budget.max_tool_calls) == (0, 0)
+
+
+def test_budget_limits_are_opt_in(monkeypatch):
+    monkeypatch.setenv("MCP_BUDGET_MAX_ITERATIONS", "4")
+    monkeypatch.setenv("MCP_BUDGET_MAX_SECONDS", "20")
+    budget = Budget.from_env()
+    assert (budget.max_iterations, budget.max_execution_time) == (4, 20.0)
+    monkeypatch.setenv("MCP_BUDGET_MAX_ITERATIONS", "0")
+    assert Budget.from_env().max_iterations is None
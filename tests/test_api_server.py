@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from starlette.testclient import TestClient
+
+from accounting import Budget, UsageLedger
+from api_server import create_api
+from orchestrators import MCPOrchestratorInProcess
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("MCP_FAKE_LLM", "1")
+    monkeypatch.setenv("MCP_WARMUP", "0")
+    orchestrator = MCPOrchestratorInProcess()
+    orchestrator.ledger = UsageLedger()
+    with TestClient(create_api(orchestrator)) as client:
+        yield client
+
+
+def _events(text):
+    return [block.split("\n")[0].removeprefix("event: ") for block in text.strip().split("\n\n")]
+
+
+def test_chat_batch_and_stream_record_usage(client):
+    assert client.post("/v1/chat", json={"message": "suma 5 y 3", "session_id": "s1"}).json()["usage"]
+    results = client.post("/v1/batch", json={"messages": ["suma 5 y 3", "clima en Madrid"],
+                                              "session_id": "s1"}).json()["results"]
+    assert all(result["usage"]["llm_calls"] for result in results)
+    stream = client.get("/v1/chat/stream", params={"message": "clima en Madrid", "session_id": "s1"})
+    assert _events(stream.text) == ["action", "step", "output", "usage"]
+    assert client.get("/v1/usage", params={"session_id": "s1"}).json()["requests"] == 4
+
+
+class _SlowOrchestrator:
+    """Orquestador mínimo cuyo agente tarda más que su presupuesto de tiempo"""
+
+    def __init__(self, seconds):
+        self.budget = Budget(max_execution_time=0.2)
+        self.ledger = UsageLedger()
+        self.seconds = seconds
+        self.cancelled = 0
+
+    async def aprocess_message(self, message):
+        return (await self.aprocess_message_with_usage(message))["output"]
+
+    async def aprocess_message_with_usage(self, message, session_id=None, tenant=None):
+        await asyncio.sleep(self.seconds)
+        return {"output": message, "usage": {}}
+
+    async def astream_message_with_usage(self, message, session_id=None, tenant=None):
+        try:
+            await asyncio.sleep(self.seconds)
+            yield {"output": message}
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+def test_budget_time_limit_applies_to_every_route():
+    orchestrator = _SlowOrchestrator(seconds=5)
+    with TestClient(create_api(orchestrator, timeout=60)) as client:
+        response = client.post("/v1/chat", json={"message": "hola"})
+        assert response.status_code == 504
+        assert client.post("/v1/batch", json={"messages": ["hola"]}).json()["results"] == [
+            {"error": "Timeout (0.2s)"}]
+        stream = client.get("/v1/chat/stream", params={"message": "hola"})
+        assert _events(stream.text) == ["error"]
+    assert orchestrator.cancelled == 1
@@ -0,0 +1,68 @@
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from arg_repair import match_key, normalize_id, parse_number, repair_args
+
+
+@pytest.mark.parametrize("value, expected", [
+    (3, 3.0),
+    ("3,5", 3.5),
+    ("1.234", 1.234),
+    ("-1.5", -1.5),
+    ("1.234,5", 1234.5),
+    ("1.234.567", 1234567.0),
+    ("1.234.567,25", 1234567.25),
+    ("1 000", 1000.0),
+    ("tres mil doscientos cinco", 3205.0),
+    ("tres coma cero cinco", 3.05),
+    ("dos y medio", 2.5),
+    ("menos cuatro", -4.0),
+])
+def test_parse_number(value, expected):
+    assert parse_number(value) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("value", [True, None, "abc", "1.23.4", ""])
+def test_parse_number_rejects(value):
+    assert parse_number(value) is None
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("user456", "456"),
+    ("USER_456", "456"),
+    ("usuario 456", "456"),
+    ("ID-456", "456"),
+    ("#456", "456"),
+    ("456", "456"),
+    (456, "456"),
+    (456.0, "456"),
+    ("A123", "A123"),
+    ("order-123", "order-123"),
+    ("user", "user"),
+])
+def test_normalize_id(value, expected):
+    assert normalize_id(value) == expected
+
+
+def test_match_key():
+    keys = ["madrid", "barcelona", "sevilla"]
+    assert match_key("Madird", keys) == "madrid"
+    assert match_key("madrid", keys) == "madrid"
+    assert match_key("Tokio", keys) == "Tokio"
+
+
+class _Args(BaseModel):
+    numbers: List[float]
+    count: int
+    user_id: str
+
+
+def test_repair_args_coerces_and_normalizes():
+    repaired = repair_args(_Args, {"numbers": "4, 8,5 y 15", "count": "tres", "user_id": "user42"})
+    assert repaired == {"numbers": [4.0, 8.5, 15.0], "count": 3, "user_id": "42"}
+
+
+def test_repair_args_unrepairable():
+    assert repair_args(_Args, {"numbers": [1], "count": "muchos", "user_id": "42"}) is None
@@ -0,0 +1,97 @@
+import asyncio
+from typing import Any, List
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel
+
+from cascade import CascadeChatModel
+from fake_llm import FakeToolCallingLLM
+
+
+class SumarArgs(BaseModel):
+    a: float
+    b: float
+
+
+SUMAR = StructuredTool.from_function(lambda a, b: a + b, name="sumar", description="Suma dos números",
+                                     args_schema=SumarArgs)
+
+
+class ScriptedLLM(BaseChatModel):
+    """Modelo pequeño que siempre responde el mismo mensaje"""
+
+    reply: Any
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages: List, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=self.reply.model_copy(deep=True))])
+
+
+def _call(args, name="sumar"):
+    return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": "call_1"}])
+
+
+def _route(reply, **options):
+    small = ScriptedLLM(reply=reply)
+    cascade = CascadeChatModel(small=small, large=FakeToolCallingLLM(), **options)
+    bound = cascade.bind_tools([SUMAR])
+    message = asyncio.run(bound.ainvoke([HumanMessage(content="suma 5 y 3")]))
+    return message, cascade.metrics()
+
+
+def test_valid_call_stays_on_small_model():
+    message, metrics = _route(_call({"a": 5, "b": 3}))
+    assert message.tool_calls[0]["args"] == {"a": 5, "b": 3}
+    assert metrics == {"small": 1, "escalated": 0, "reasons": {}}
+
+
+def test_repairable_call_is_repaired_instead_of_escalated():
+    message, metrics = _route(_call({"a": "cinco", "b": "3,5"}))
+    assert message.tool_calls[0]["args"] == {"a": 5.0, "b": 3.5}
+    assert metrics["escalated"] == 0
+
+
+def test_loose_json_invalid_call_is_repaired():
+    reply = AIMessage(content="", invalid_tool_calls=[
+        {"name": "sumar", "args": "{'a': 5, 'b': 3}", "id": "call_1", "error": None, "type": "invalid_tool_call"}])
+    message, metrics = _route(reply)
+    assert message.tool_calls[0]["args"] == {"a": 5.0, "b": 3.0}
+    assert metrics["escalated"] == 0
+
+
+@pytest.mark.parametrize("reply, reason", [
+    (_call({"a": "muchos", "b": 3}), "validation"),
+    (_call({"a": 5, "b": 3}, name="restar"), "validation"),
+    (AIMessage(content="No sé"), "no_tool"),
+])
+def test_unrepairable_answers_escalate_to_large_model(reply, reason):
+    message, metrics = _route(reply)
+    # El modelo grande (falso) enruta el mensaje correctamente
+    assert message.tool_calls[0]["name"] == "sumar"
+    assert message.tool_calls[0]["args"] == {"a": 5.0, "b": 3.0}
+    assert metrics == {"small": 0, "escalated": 1, "reasons": {reason: 1}}
+
+
+def test_no_tool_answer_kept_when_escalation_disabled():
+    message, metrics = _route(AIMessage(content="No sé"), escalate_on_no_tool=False)
+    assert message.content == "No sé"
+    assert metrics["escalated"] == 0
+
+
+def test_low_confidence_escalates():
+    reply = _call({"a": 5, "b": 3})
+    reply.response_metadata = {"confidence": 0.3}
+    _, metrics = _route(reply, min_confidence=0.5)
+    assert metrics["reasons"] == {"low_confidence": 1}
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from data_access import (LOCATION_NOT_FOUND, DataStore, MmapJSONLBackend, SQLiteBackend, WEATHER_SEED,
+                         normalize_location)
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    path = str(tmp_path / "datos.db")
+    SQLiteBackend.write(path, "weather", {"Madrid": WEATHER_SEED["madrid"], "Nueva York": WEATHER_SEED["nueva york"]})
+    backend = SQLiteBackend(path, "weather", cache_size=1)
+    return path, DataStore("weather", backend, normalize_location, LOCATION_NOT_FOUND)
+
+
+def test_sqlite_loads_keys_and_queries_by_key(sqlite_store):
+    _, store = sqlite_store
+    assert sorted(store.keys()) == ["madrid", "nueva york"]
+    index = store._ensure_loaded()
+    assert index.queries == 0
+    assert store.get("NYC") == WEATHER_SEED["nueva york"]
+    assert store.get("nueva york") == WEATHER_SEED["nueva york"]
+    assert index.queries == 1
+    # Caché de un registro: al pedir otro se desaloja el anterior
+    assert store.get_many(["madrid", "Tokio"]) == {"madrid": WEATHER_SEED["madrid"], "Tokio": LOCATION_NOT_FOUND}
+    store.get("nyc")
+    assert index.queries == 3
+
+
+def test_sqlite_refresh_sees_new_rows(sqlite_store):
+    path, store = sqlite_store
+    assert store.get("londres") == LOCATION_NOT_FOUND
+    SQLiteBackend.write(path, "weather", {"Londres": WEATHER_SEED["londres"]})
+    store.refresh()
+    assert store.get("London") == WEATHER_SEED["londres"]
+
+
+def test_sqlite_results_are_copies(sqlite_store):
+    _, store = sqlite_store
+    store.get("madrid")["temp"] = "99°C"
+    assert store.get("madrid") == WEATHER_SEED["madrid"]
+
+
+def test_mmap_indexes_keys_without_decoding_values(tmp_path):
+    path = tmp_path / "datos.jsonl"
+    MmapJSONLBackend.write(str(path), {"Madrid": WEATHER_SEED["madrid"], 'raro", "value": 1': {"temp": "0°C"}})
+    with open(path, "a", encoding="utf-8") as f:
+        # Valor ilegible: indexar no lo decodifica, solo consultarlo
+        f.write('{"key": "roto", "value": {no es json}}\n')
+        # Otro orden de campos: se decodifica la línea entera
+        f.write(json.dumps({"value": WEATHER_SEED["londres"], "key": "Londres"}) + "\n")
+    store = DataStore("weather", MmapJSONLBackend(str(path)), normalize_location, LOCATION_NOT_FOUND)
+    assert sorted(store.keys()) == ["londres", "madrid", 'raro" "value": 1', "roto"]
+    assert store.get("MADRID") == WEATHER_SEED["madrid"]
+    assert store.get("london") == WEATHER_SEED["londres"]
+    with pytest.raises(json.JSONDecodeError):
+        store.get("roto")
@@ -0,0 +1,132 @@
+"""HedgedToolCaller: quién gana, qué se cancela y cuándo no se cubre"""
+
+import asyncio
+
+from langchain_core.tools import StructuredTool
+
+from hedging import HedgedToolCaller
+
+def _replica(name: str, delay: float, error: Exception = None):
+    """Herramienta `sumar` de una réplica con latencia fija; anota llamadas y cancelaciones"""
+    calls = {"started": 0, "cancelled": 0}
+
+    async def sumar(a: float, b: float):
+        calls["started"] += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            calls["cancelled"] += 1
+            raise
+        if error is not None:
+            raise error
+        return name
+
+    tool = StructuredTool.from_function(coroutine=sumar, name="sumar", description="Suma")
+    return tool, calls
+
+def _call(primary, secondary, **settings):
+    """Una llamada cubierta: la primera del turno rotatorio va a `primary`"""
+    async def run():
+        caller = HedgedToolCaller([None, lambda: _loaded(secondary)], tools=["sumar"], **settings)
+        await caller.attach([primary])
+        try:
+            result = await caller(primary, {"a": 1, "b": 2})
+        except Exception as e:
+            result = e
+        await asyncio.sleep(0.01)
+        return caller, result
+
+    async def _loaded(tool):
+        return [tool]
+
+    return asyncio.run(run())
+
+def test_fast_primary_is_not_hedged():
+    primary, primary_calls = _replica("primaria", 0.0)
+    secondary, secondary_calls = _replica("secundaria", 0.0)
+    caller, result = _call(primary, secondary, initial_delay=0.5, max_rate=1.0)
+    assert result == "primaria"
+    assert caller.stats["hedged"] == 0 and secondary_calls["started"] == 0
+    assert caller.replica_stats[0]["wins"] == 1
+
+def test_slow_primary_loses_and_is_cancelled():
+    primary, primary_calls = _replica("primaria", 5.0)
+    secondary, secondary_calls = _replica("secundaria", 0.0)
+    caller, result = _call(primary, secondary, initial_delay=0.01, max_rate=1.0)
+    assert result == "secundaria"
+    assert caller.stats["hedged"] == 1 and caller.stats["hedge_wins"] == 1
+    assert caller.stats["cancelled"] == 1 and primary_calls["cancelled"] == 1
+    assert caller.replica_stats == [{"calls": 1, "wins": 0, "errors": 0}, {"calls": 1, "wins": 1, "errors": 0}]
+
+def test_hedge_loses_to_primary_and_is_cancelled():
+    primary, primary_calls = _replica("primaria", 0.05)
+    secondary, secondary_calls = _replica("secundaria", 5.0)
+    caller, result = _call(primary, secondary, initial_delay=0.01, max_rate=1.0)
+    assert result == "primaria"
+    assert caller.stats["hedged"] == 1 and caller.stats["hedge_wins"] == 0
+    assert secondary_calls["cancelled"] == 1
+
+def test_failed_replica_waits_for_the_other():
+    primary, _ = _replica("primaria", 0.05, error=RuntimeError("réplica caída"))
+    secondary, _ = _replica("secundaria", 0.1)
+    caller, result = _call(primary, secondary, initial_delay=0.01, max_rate=1.0)
+    assert result == "secundaria"
+    assert caller.replica_stats[0]["errors"] == 1 and caller.stats["errors"] == 0
+
+def test_both_failing_raises():
+    primary, _ = _replica("primaria", 0.05, error=RuntimeError("primaria caída"))
+    secondary, _ = _replica("secundaria", 0.02, error=RuntimeError("secundaria caída"))
+    caller, result = _call(primary, secondary, initial_delay=0.01, max_rate=1.0)
+    assert isinstance(result, RuntimeError)
+    assert caller.stats["errors"] == 1
+
+def test_budget_exhausted_waits_for_primary():
+    primary, _ = _replica("primaria", 0.05)
+    secondary, secondary_calls = _replica("secundaria", 0.0)
+    caller, result = _call(primary, secondary, initial_delay=0.01, max_rate=0.0)
+    assert result == "primaria"
+    assert caller.stats["budget_denied"] == 1 and secondary_calls["started"] == 0
+
+def test_fast_failing_primary_retries_at_once():
+    primary, _ = _replica("primaria", 0.0, error=ConnectionError("conexión rechazada"))
+    secondary, secondary_calls = _replica("secundaria", 0.0)
+    caller, result = _call(primary, secondary, initial_delay=0.5, max_rate=0.0)
+    assert result == "secundaria"
+    assert caller.stats["failovers"] == 1 and caller.stats["hedged"] == 0
+    assert caller.stats["budget_denied"] == 0 and secondary_calls["started"] == 1
+
+def test_failing_replica_leaves_rotation():
+    broken, broken_calls = _replica("rota", 0.0, error=ConnectionError("conexión rechazada"))
+    healthy, healthy_calls = _replica("sana", 0.0)
+
+    async def run():
+        async def load():
+            return [healthy]
+
+        caller = HedgedToolCaller([None, load], tools=["sumar"], initial_delay=0.5, max_rate=0.0,
+                                  eject_seconds=60)
+        await caller.attach([broken])
+        results = [await caller(broken, {"a": 1, "b": 2}) for _ in range(4)]
+        return caller, results
+
+    caller, results = asyncio.run(run())
+    assert results == ["sana"] * 4
+    # Solo la primera llamada pasa por la réplica rota; después queda fuera del turno rotatorio
+    assert broken_calls["started"] == 1 and healthy_calls["started"] == 4
+    assert caller.stats["ejections"] == 1 and caller.metrics()["ejected"] == [0]
+
+def test_ejected_replica_is_still_a_last_resort():
+    primary, _ = _replica("primaria", 0.0)
+    secondary, _ = _replica("secundaria", 0.0)
+
+    async def run():
+        async def load():
+            return [secondary]
+
+        caller = HedgedToolCaller([None, load], tools=["sumar"], eject_seconds=60)
+        await caller.attach([primary])
+        caller._eject(0)
+        caller._eject(1)
+        return await caller(primary, {"a": 1, "b": 2})
+
+    assert asyncio.run(run()) == "primaria"
@@ -0,0 +1,126 @@
+"""JobManager: límites, desalojo, espera acotada y cancelación"""
+
+import asyncio
+import time
+
+import pytest
+
+from jobs import JobManager, JobQueueFullError
+
+def _blocking():
+    """Corrutina que no termina hasta que se abre `gate` (y cuántas veces se canceló)"""
+    gate = asyncio.Event()
+    state = {"started": 0, "cancelled": 0}
+
+    async def work(**kwargs):
+        state["started"] += 1
+        try:
+            await gate.wait()
+        except asyncio.CancelledError:
+            state["cancelled"] += 1
+            raise
+        return kwargs
+
+    return gate, state, work
+
+def test_rejects_when_active_limit_reached():
+    async def run():
+        manager = JobManager(workers=1, max_active=2)
+        gate, _, work = _blocking()
+        first = manager.submit("lenta", work, {"n": 1})
+        manager.submit("lenta", work, {"n": 2})
+        with pytest.raises(JobQueueFullError):
+            manager.submit("lenta", work, {"n": 3})
+        assert manager.stats["rejected"] == 1
+        gate.set()
+        await first.done.wait()
+        assert first.status == "done" and first.result == {"n": 1}
+
+    asyncio.run(run())
+
+def test_workers_bound_concurrency():
+    async def run():
+        manager = JobManager(workers=2, max_active=10)
+        gate, state, work = _blocking()
+        jobs = [manager.submit("lenta", work, {}) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        assert state["started"] == 2
+        assert sorted(job.status for job in jobs) == ["pending"] * 3 + ["running"] * 2
+        gate.set()
+        await asyncio.gather(*(job.done.wait() for job in jobs))
+        assert manager.stats["done"] == 5
+
+    asyncio.run(run())
+
+def test_evicts_oldest_finished_beyond_max_results():
+    async def run():
+        manager = JobManager(workers=4, max_results=2)
+        jobs = [manager.submit("rapida", lambda n: n, {"n": n}) for n in range(3)]
+        await asyncio.gather(*(job.done.wait() for job in jobs))
+        manager.submit("rapida", lambda n: n, {"n": 3})
+        assert manager.get(jobs[0].id) is None
+        assert manager.get(jobs[2].id).result == 2
+        assert manager.stats["evicted"] == 1
+
+    asyncio.run(run())
+
+def test_evicts_expired_results():
+    async def run():
+        manager = JobManager(result_ttl=0.0)
+        job = manager.submit("rapida", lambda: 1, {})
+        await job.done.wait()
+        time.sleep(0.001)
+        manager.submit("rapida", lambda: 2, {})
+        assert manager.get(job.id) is None
+
+    asyncio.run(run())
+
+def test_wait_is_bounded_by_max_wait():
+    async def run():
+        manager = JobManager(max_wait=0.05)
+        gate, _, work = _blocking()
+        job = manager.submit("lenta", work, {})
+        started = time.monotonic()
+        assert (await manager.wait(job.id, timeout=30)).status == "running"
+        assert time.monotonic() - started < 1
+        gate.set()
+        assert (await manager.wait(job.id, timeout=30)).status == "done"
+        assert await manager.wait("desconocido", timeout=1) is None
+
+    asyncio.run(run())
+
+def test_cancel_running_and_pending():
+    async def run():
+        manager = JobManager(workers=1)
+        gate, state, work = _blocking()
+        running = manager.submit("lenta", work, {})
+        pending = manager.submit("lenta", work, {})
+        await asyncio.sleep(0.01)
+        assert (running.status, pending.status) == ("running", "pending")
+
+        # Un trabajo pendiente termina como cancelado sin llegar a ejecutarse
+        assert manager.cancel(pending.id)
+        assert pending.status == "cancelled" and pending.done.is_set()
+
+        assert manager.cancel(running.id)
+        await running.done.wait()
+        assert running.status == "cancelled"
+        assert state == {"started": 1, "cancelled": 1}
+        assert not manager.cancel(running.id)
+        assert manager.stats["cancelled"] == 2 and manager.active() == 0
+
+    asyncio.run(run())
+
+def test_errors_are_reported():
+    async def run():
+        manager = JobManager()
+
+        def fail():
+            raise ValueError("sin datos")
+
+        job = manager.submit("rota", fail, {})
+        await job.done.wait()
+        assert job.status == "error" and job.error == "ValueError: sin datos"
+        assert "result" not in job.to_dict()
+
+    asyncio.run(run())
@@ -0,0 +1,38 @@
+import asyncio
+import time
+
+import pytest
+
+from process_tools import ProcessToolRunner, ToolTimeoutError
+
+
+def test_timeout_resubmits_other_in_flight_calls():
+    runner = ProcessToolRunner("lenta", workers=2, timeout=3.0)
+    runner.warm_up()
+
+    async def late_call():
+        # Empieza después que la colgada y sigue en curso cuando esta agota el timeout
+        await asyncio.sleep(2.0)
+        return await runner.run(time.sleep, 1.5)
+
+    async def scenario():
+        return await asyncio.gather(runner.run(time.sleep, 60), late_call(), return_exceptions=True)
+
+    try:
+        stuck, late = asyncio.run(scenario())
+    finally:
+        runner.shutdown()
+    assert isinstance(stuck, ToolTimeoutError)
+    assert late is None
+    assert runner.timeouts == 1
+    assert runner.resubmits == 1
+
+
+def test_timeout_alone_raises():
+    runner = ProcessToolRunner("lenta", workers=1, timeout=0.5)
+    try:
+        with pytest.raises(ToolTimeoutError):
+            asyncio.run(runner.run(time.sleep, 60))
+    finally:
+        runner.shutdown()
+    assert runner.resubmits == 0
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import tracemalloc
+
+import pytest
+
+from profiling import ProfileCapture, ProfileSettings, RequestProfiler
+
+
+@pytest.fixture
+def no_tracemalloc():
+    was_tracing = tracemalloc.is_tracing()
+    tracemalloc.stop()
+    yield
+    tracemalloc.stop()
+    if was_tracing:
+        tracemalloc.start()
+
+
+def test_memory_off_keeps_tracemalloc_started_by_someone_else(no_tracemalloc):
+    tracemalloc.start()
+    profiler = RequestProfiler(ProfileSettings(enabled=True, memory=True))
+    profiler.configure(memory=False)
+    assert tracemalloc.is_tracing()
+
+
+def test_memory_off_stops_tracemalloc_started_by_profiler(no_tracemalloc):
+    profiler = RequestProfiler(ProfileSettings(enabled=True, memory=True))
+    assert tracemalloc.is_tracing()
+    profiler.configure(memory=False)
+    assert not tracemalloc.is_tracing()
+
+
+def test_async_summary_runs_off_the_event_loop(no_tracemalloc, tmp_path, monkeypatch):
+    profiler = RequestProfiler(ProfileSettings(enabled=True, memory=True, directory=str(tmp_path)))
+    threads = []
+    summarize = ProfileCapture.summarize
+
+    def recording_summarize(self, summary):
+        threads.append(threading.current_thread())
+        return summarize(self, summary)
+
+    monkeypatch.setattr(ProfileCapture, "summarize", recording_summarize)
+
+    async def scenario():
+        async with profiler.aprofile("test"):
+            [str(i) for i in range(1000)]
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(scenario())
+    assert threads and threads[0] is not loop_thread
+    assert profiler.stats["captured"] == 1
+    assert any(path.endswith(".json") for path in profiler.recent)
+    profiler.configure(memory=False)
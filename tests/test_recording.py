@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+
+import recording
+from orchestrators import MCPOrchestratorInProcess
+from recording import ReplayMissError, TrafficRecorder, TrafficReplayer
+
+MESSAGES = ["suma 5 y 3", "clima en Madrid", "info del usuario 123"]
+
+
+@pytest.fixture
+def traffic_env(monkeypatch):
+    monkeypatch.setenv("MCP_FAKE_LLM", "1")
+    monkeypatch.setenv("MCP_HEALTH_INTERVAL", "0")
+    monkeypatch.delenv("MCP_RECORD", raising=False)
+    monkeypatch.delenv("MCP_REPLAY", raising=False)
+    monkeypatch.setattr(recording, "_traffic", None)
+    return monkeypatch
+
+
+def _run(messages):
+    async def scenario():
+        orchestrator = MCPOrchestratorInProcess()
+        try:
+            return [await orchestrator.process_message(m) for m in messages]
+        finally:
+            await orchestrator.aclose()
+
+    return asyncio.run(scenario())
+
+
+def test_record_then_replay_gives_the_same_outputs(traffic_env, tmp_path):
+    path = str(tmp_path / "trafico.jsonl")
+    traffic_env.setenv("MCP_RECORD", path)
+    recorded = _run(MESSAGES)
+    recorder = recording.get_traffic()
+    assert isinstance(recorder, TrafficRecorder)
+    recorder.close()
+
+    with open(path, encoding="utf-8") as f:
+        kinds = [json.loads(line)["kind"] for line in f]
+    assert kinds[0] == "meta" and "tools" in kinds
+    assert kinds.count("tool") == len(MESSAGES)
+
+    traffic_env.delenv("MCP_RECORD")
+    traffic_env.setenv("MCP_REPLAY", path)
+    traffic_env.setattr(recording, "_traffic", None)
+    replayed = _run(MESSAGES)
+    replayer = recording.get_traffic()
+    assert isinstance(replayer, TrafficReplayer)
+    assert replayed == recorded
+    assert replayer.inputs() == MESSAGES
+    assert replayer.stats["misses"] == 0
+    assert replayer.stats["tool_hits"] == len(MESSAGES)
+    assert replayer.stats["llm_hits"] == 2 * len(MESSAGES)
+
+
+def test_replay_miss_for_unrecorded_message(traffic_env, tmp_path):
+    path = str(tmp_path / "trafico.jsonl")
+    traffic_env.setenv("MCP_RECORD", path)
+    _run(MESSAGES[:1])
+    recording.get_traffic().close()
+
+    traffic_env.delenv("MCP_RECORD")
+    traffic_env.setenv("MCP_REPLAY", path)
+    traffic_env.setattr(recording, "_traffic", None)
+    with pytest.raises(ReplayMissError):
+        _run(["clima en Londres"])
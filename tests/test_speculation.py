@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+from langchain_core.tools import StructuredTool
+
+from speculation import Speculator, ToolPredictor, call_key
+from tool_registry import tool_descriptions
+
+
+@pytest.mark.parametrize("llm_args", [
+    {"location": "NYC"},
+    {"location": "New York"},
+    {"location": "Nueva York"},
+    {"location": " nueva york "},
+])
+def test_call_key_uses_the_tool_normalization(llm_args):
+    assert call_key("getWeather", llm_args) == call_key("getWeather", {"location": "nueva york"})
+
+
+def test_call_key_distinguishes_other_values():
+    assert call_key("getWeather", {"location": "madrid"}) != call_key("getWeather", {"location": "nueva york"})
+    assert call_key("sumar", {"a": 5, "b": 3}) == call_key("sumar", {"a": 5.0, "b": 3.0})
+    assert call_key("getUsersInfo", {"user_ids": [" 123", "456"]}) == call_key("getUsersInfo",
+                                                                               {"user_ids": ["123", "456"]})
+
+
+def test_prefetch_hit_when_llm_uses_an_alias():
+    calls = []
+
+    async def get_weather(location: str) -> str:
+        calls.append(location)
+        return "18°C"
+
+    tool = StructuredTool.from_function(coroutine=get_weather, name="getWeather", description="Clima")
+    speculator = Speculator(ToolPredictor(tool_descriptions()))
+    (wrapped,) = speculator.attach([tool])
+
+    async def scenario():
+        async with speculator.speculate("clima en NYC"):
+            # El LLM pide la ubicación tal como la escribió el usuario
+            return await wrapped.ainvoke({"location": "NYC"})
+
+    assert asyncio.run(scenario()) == "18°C"
+    assert calls == ["nueva york"]
+    assert speculator.metrics()["hits"] == 1
+    assert speculator.metrics()["misses"] == 0
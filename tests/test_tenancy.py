@@ -0,0 +1,80 @@
+"""FairScheduler: orden de servicio con pesos y limpieza de tenants desalojados"""
+
+import asyncio
+import random
+
+import tenancy
+from tenancy import FairScheduler, OrchestratorRegistry
+
+def _serve_order(seed: int, weights, arrivals_per_tenant: int = 12):
+    """Orden en que se atienden peticiones encoladas en orden aleatorio (semilla fija) con un hueco"""
+    async def run():
+        scheduler = FairScheduler(concurrency=1, weights=weights, max_queue=100)
+        arrivals = [tenant for tenant in weights for _ in range(arrivals_per_tenant)]
+        random.Random(seed).shuffle(arrivals)
+        order = []
+        gate = asyncio.Event()
+
+        async def hold():
+            async with scheduler.slot("ocupado"):
+                await gate.wait()
+
+        async def request(tenant):
+            async with scheduler.slot(tenant):
+                order.append(tenant)
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        requests = [asyncio.create_task(request(tenant)) for tenant in arrivals]
+        await asyncio.sleep(0)
+        assert scheduler.metrics()["running"] == 1
+        gate.set()
+        await asyncio.gather(holder, *requests)
+        return scheduler, order
+
+    return asyncio.run(run())
+
+def test_order_is_deterministic_and_weighted():
+    _, order = _serve_order(7, {"acme": 3, "free": 1})
+    assert order == _serve_order(7, {"acme": 3, "free": 1})[1]
+    # Con todo encolado, cada 4 huecos son 3 para acme y 1 para free hasta que acme vacía su cola
+    for start in range(0, 16, 4):
+        window = order[start:start + 4]
+        assert window.count("acme") == 3 and window.count("free") == 1, order
+    assert order[16:] == ["free"] * 8
+
+def test_equal_weights_alternate():
+    _, order = _serve_order(11, {"a": 1, "b": 1}, arrivals_per_tenant=6)
+    assert all(order[i] != order[i + 1] for i in range(len(order) - 1)), order
+
+def test_stats_per_tenant():
+    scheduler, _ = _serve_order(3, {"acme": 2, "free": 1}, arrivals_per_tenant=4)
+    tenants = scheduler.metrics()["tenants"]
+    assert tenants["acme"]["served"] == 4 and tenants["free"]["served"] == 4
+    assert tenants["acme"]["weight"] == 2 and tenants["free"]["queued"] == 0
+
+def test_forgets_tenants_evicted_from_registry(monkeypatch):
+    # Sin cliente LLM real: el registro solo necesita uno compartido por modelo
+    monkeypatch.setitem(tenancy._llms, "gpt-4o", object())
+
+    async def run():
+        registry = OrchestratorRegistry(lambda config, llm: object(), configs={}, idle_seconds=0.0,
+                                        sweep_interval=0.0)
+        scheduler = FairScheduler.for_registry(registry)
+        for tenant in ("t1", "t2", "t3"):
+            async with scheduler.slot(tenant):
+                registry.get(tenant)
+            await asyncio.sleep(0.001)
+        # Cada get desaloja los anteriores inactivos: solo queda el último
+        assert set(scheduler.metrics()["tenants"]) == {"t3"}
+
+        # Desalojado mientras tiene una petición en curso: se olvida al terminarla
+        async with scheduler.slot("t4"):
+            registry.get("t4")
+            await asyncio.sleep(0.001)
+            async with scheduler.slot("t5"):
+                registry.get("t5")
+            assert "t4" in scheduler.metrics()["tenants"]
+        assert set(scheduler.metrics()["tenants"]) == {"t5"}
+
+    asyncio.run(run())
@@ -0,0 +1,71 @@
+"""Paridad entre las herramientas LangChain y las registradas en FastMCP"""
+
+import asyncio
+
+import pytest
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from server_backends import server_lifespan
+from tool_registry import TOOL_NAMES, TOOL_SPECS, langchain_tools, register_server_tools
+
+JOB_TOOLS = {"job_status", "job_result"}
+
+def _without_titles(schema):
+    if isinstance(schema, dict):
+        return {key: _without_titles(value) for key, value in schema.items() if key != "title"}
+    if isinstance(schema, list):
+        return [_without_titles(item) for item in schema]
+    return schema
+
+@pytest.fixture(scope="module")
+def mcp_tools():
+    """(tools de list_tools, herramientas de langchain-mcp-adapters) de un servidor con todo el registro"""
+    async def load():
+        server = FastMCP("RegistryParity", lifespan=server_lifespan)
+        register_server_tools(server)
+        async with create_connected_server_and_client_session(server) as session:
+            listed = (await session.list_tools()).tools
+            return {t.name: t for t in listed}, {t.name: t for t in await load_mcp_tools(session)}
+
+    return asyncio.run(load())
+
+def test_names(mcp_tools):
+    listed, _ = mcp_tools
+    assert [t.name for t in langchain_tools()] == list(TOOL_NAMES)
+    assert set(listed) == set(TOOL_NAMES) | JOB_TOOLS
+
+def test_suffix_and_subset():
+    tools = langchain_tools(["sumar", "getWeather"], suffix="_interno")
+    assert [t.name for t in tools] == ["sumar_interno", "getWeather_interno"]
+
+def test_input_schemas(mcp_tools):
+    listed, _ = mcp_tools
+    for tool in langchain_tools():
+        local = _without_titles(tool.args_schema.model_json_schema())
+        remote = _without_titles(listed[tool.name].inputSchema)
+        assert remote["properties"] == local["properties"], tool.name
+        assert sorted(remote.get("required", [])) == sorted(local.get("required", [])), tool.name
+
+def test_descriptions(mcp_tools):
+    listed, _ = mcp_tools
+    for tool in langchain_tools():
+        assert listed[tool.name].description == tool.description == TOOL_SPECS[tool.name].description
+
+def test_meta(mcp_tools):
+    listed, adapted = mcp_tools
+    for name, spec in TOOL_SPECS.items():
+        expected = spec.metadata()
+        assert listed[name].meta == expected, name
+        assert adapted[name].metadata["_meta"] == expected, name
+        assert listed[name].annotations.readOnlyHint is spec.read_only, name
+    for tool in langchain_tools():
+        assert tool.metadata == TOOL_SPECS[tool.name].metadata()
+
+def test_job_tools_marked(mcp_tools):
+    from jobs import is_job_tool
+
+    _, adapted = mcp_tools
+    jobs = {name for name, tool in adapted.items() if is_job_tool(tool)}
+    assert jobs == {name for name, spec in TOOL_SPECS.items() if spec.job}
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from orchestrators import MCPOrchestratorInProcess
+
+
+@pytest.fixture
+def orchestrator(monkeypatch):
+    monkeypatch.setenv("MCP_FAKE_LLM", "1")
+    monkeypatch.setenv("MCP_HEALTH_INTERVAL", "0")
+    orch = MCPOrchestratorInProcess()
+    calls = {"list_tools": 0}
+    get_tools = orch._get_tools
+
+    async def counting_get_tools():
+        calls["list_tools"] += 1
+        await asyncio.sleep(0.05)
+        return await get_tools()
+
+    orch._get_tools = counting_get_tools
+    return orch, calls
+
+
+def test_warm_up_and_concurrent_requests_share_one_initialize(orchestrator):
+    orch, calls = orchestrator
+
+    async def scenario():
+        try:
+            await asyncio.gather(orch.warm_up(), *(orch._get_executor() for _ in range(3)))
+        finally:
+            await orch.aclose()
+
+    asyncio.run(scenario())
+    assert calls["list_tools"] == 1
+    assert orch.is_ready()
+
+
+def test_reconnect_rebuilds_once_while_requests_wait(orchestrator):
+    orch, calls = orchestrator
+
+    async def scenario():
+        try:
+            await orch.initialize()
+            executors = await asyncio.gather(orch.reconnect(), *(orch._get_executor() for _ in range(3)))
+            return executors[1:]
+        finally:
+            await orch.aclose()
+
+    executors = asyncio.run(scenario())
+    assert calls["list_tools"] == 2
+    assert all(e is executors[0] for e in executors)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Registro único de herramientas
+Cada herramienta se define una sola vez (nombre, descripción, esquema,
+implementación y metadatos de rendimiento) y de esa definición salen tanto las
+herramientas @tool de LangChain de los orquestadores como los registros FastMCP
+de los servidores. Así todas las topologías ven las mismas herramientas y lo
+que se añade aquí (caché, bloque, ejecutor) llega a todas.
+
+Metadatos por herramienta:
+    read_only  sin efectos secundarios: se puede repetir (hedging) o cachear
+    backend    (almacén, método): datos de usuarios/clima (DataStore en local,
+               ServerBackends asíncrono en los servidores)
+    batch_of   herramienta unitaria a la que sustituye en bloque
+    job        lenta: devuelve un job_id al instante y el resultado se consulta (ver jobs.py)
+    executor   variable de entorno que elige dónde corre en el servidor (inline/process)
+"""
+
+import functools
+import inspect
+import os
+import time
+from typing import Annotated, Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from data_access import users_store, weather_store
+
+# ===============================================
+# ESQUEMAS PYDANTIC
+# ===============================================
+class SumarSchema(BaseModel):
+    a: float = Field(description="Primer número a sumar")
+    b: float = Field(description="Segundo número a sumar")
+
+class MultiplicarSchema(BaseModel):
+    a: float = Field(description="Primer número a multiplicar")
+    b: float = Field(description="Segundo número a multiplicar")
+
+class GetUserInfoSchema(BaseModel):
+    user_id: str = Field(description="ID del usuario a buscar")
+
+class GetWeatherSchema(BaseModel):
+    location: str = Field(description="Ubicación para consultar el clima")
+
+class SumarListaSchema(BaseModel):
+    numeros: List[float] = Field(description="Lista de números a sumar")
+
+class GetUsersInfoSchema(BaseModel):
+    user_ids: List[str] = Field(description="IDs de los usuarios a buscar")
+
+class GetWeatherManySchema(BaseModel):
+    locations: List[str] = Field(description="Ubicaciones para consultar el clima")
+
+class EstadisticasListaSchema(BaseModel):
+    numeros: List[float] = Field(description="Lista de números a analizar")
+
+# ===============================================
+# IMPLEMENTACIONES SIN BACKEND
+# (nivel de módulo: el ejecutor de procesos las envía por referencia)
+# ===============================================
+def _sumar(a: float, b: float) -> float:
+    return a + b
+
+def _multiplicar(a: float, b: float) -> float:
+    return a * b
+
+def _sumar_lista(numeros: List[float]) -> float:
+    return float(np.sum(np.asarray(numeros, dtype=np.float64)))
+
+def _estadisticas_lista(numeros: List[float]) -> Dict[str, float]:
+    # Analítica de ejemplo: MCP_ANALYTICS_DELAY simula el coste de una consulta pesada (0 por defecto)
+    time.sleep(float(os.getenv("MCP_ANALYTICS_DELAY", "0")))
+    values = np.asarray(numeros, dtype=np.float64)
+    if values.size == 0:
+        return {"n": 0}
+    p50, p95 = np.percentile(values, [50, 95])
+    return {"n": int(values.size), "media": float(values.mean()), "desviacion": float(values.std()),
+            "min": float(values.min()), "max": float(values.max()), "p50": float(p50), "p95": float(p95)}
+
+# Almacenes locales por nombre de backend (mismos nombres que ServerBackends)
+LOCAL_STORES = {"users": users_store, "weather": weather_store}
+
+# ===============================================
+# DEFINICIÓN DE UNA HERRAMIENTA
+# ===============================================
+class ToolSpec:
+    """Definición de una herramienta compartida por todas las topologías"""
+
+    def __init__(self, name: str, description: str, schema: Type[BaseModel],
+                 examples: Iterable[str] = (), func: Optional[Callable[..., Any]] = None,
+                 backend: Optional[Tuple[str, str]] = None, batch_of: Optional[str] = None,
+                 read_only: bool = True, executor: Optional[str] = None, job: bool = False):
+        if (func is None) == (backend is None):
+            raise ValueError(f"La herramienta '{name}' necesita `func` o `backend` (solo uno)")
+        self.name = name
+        self.description = description
+        self.schema = schema
+        self.examples = list(examples)
+        self.func = func
+        self.backend = backend
+        self.batch_of = batch_of
+        self.read_only = read_only
+        self.executor = executor
+        self.job = job
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self.schema.model_fields)
+
+    @property
+    def cacheable(self) -> bool:
+        """Resultado determinista por argumentos: se puede cachear"""
+        return self.read_only
+
+    def server_executor(self) -> str:
+        return os.getenv(self.executor, "inline") if self.executor else "inline"
+
+    def metadata(self) -> Dict[str, Any]:
+        return {"read_only": self.read_only, "cacheable": self.cacheable, "batch_of": self.batch_of,
+                "backend": self.backend[0] if self.backend else None, "job": self.job,
+                "async": self.job or self.backend is not None or self.server_executor() == "process"}
+
+    def call_local(self, **kwargs: Any) -> Any:
+        """Implementación síncrona en el propio proceso (orquestadores locales y servidores completos)"""
+        if self.func is not None:
+            return self.func(**kwargs)
+        store, method = self.backend
+        return getattr(LOCAL_STORES[store], method)(*(kwargs[f] for f in self.fields))
+
+    def description_entry(self) -> Dict[str, Any]:
+        return {"name": self.name, "description": self.description,
+                "examples": list(self.examples), "read_only": self.read_only}
+
+# ===============================================
+# REGISTRO
+# ===============================================
+TOOL_SPECS: Dict[str, ToolSpec] = {spec.name: spec for spec in [
+    ToolSpec("sumar", "Suma dos números enteros o decimales", SumarSchema,
+             examples=["suma 5 y 3", "cuanto es 10 + 20"], func=_sumar),
+    ToolSpec("multiplicar", "Multiplica dos números enteros o decimales", MultiplicarSchema,
+             examples=["multiplica 4 por 5", "cuanto es 7 x 8"], func=_multiplicar),
+    ToolSpec("getUserInfo", "Obtiene información de un usuario por su ID", GetUserInfoSchema,
+             examples=["info del usuario 123", "datos de user456"], backend=("users", "get")),
+    ToolSpec("getWeather", "Obtiene el clima de una ubicación", GetWeatherSchema,
+             examples=["clima en Nueva York", "temperatura en Madrid"], backend=("weather", "get")),
+    # En bloque: una llamada para N elementos
+    ToolSpec("sumar_lista", "Suma una lista de números en una sola llamada", SumarListaSchema,
+             examples=["suma estas cifras: 4, 8, 15, 16, 23, 42", "total de 1.5, 2.5 y 3"],
+             func=_sumar_lista, batch_of="sumar", executor="MCP_BULK_EXECUTOR"),
+    ToolSpec("getUsersInfo", "Obtiene información de varios usuarios por sus IDs en una sola llamada",
+             GetUsersInfoSchema, examples=["info de los usuarios 123 y 456", "datos de user123, user456"],
+             backend=("users", "get_many"), batch_of="getUserInfo"),
+    ToolSpec("getWeatherMany", "Obtiene el clima de varias ubicaciones en una sola llamada",
+             GetWeatherManySchema, examples=["clima en Madrid, Londres y Nueva York"],
+             backend=("weather", "get_many"), batch_of="getWeather"),
+    # Lenta: se ejecuta como trabajo asíncrono
+    ToolSpec("estadisticas_lista", "Calcula estadísticas (media, desviación, percentiles) de una lista de números",
+             EstadisticasListaSchema, examples=["estadísticas de 4, 8, 15, 16, 23, 42"],
+             func=_estadisticas_lista, job=True),
+]}
+
+TOOL_NAMES = list(TOOL_SPECS)
+TOOL_SCHEMAS: Dict[str, Type[BaseModel]] = {name: spec.schema for name, spec in TOOL_SPECS.items()}
+
+def _select(names: Optional[Iterable[str]]) -> List[ToolSpec]:
+    if names is None:
+        return list(TOOL_SPECS.values())
+    wanted = set(names)
+    return [spec for name, spec in TOOL_SPECS.items() if name in wanted]
+
+def read_only_tools() -> Tuple[str, ...]:
+    """Herramientas repetibles en otra réplica (los trabajos no: su job_id es de la réplica que lo creó)"""
+    return tuple(name for name, spec in TOOL_SPECS.items() if spec.read_only and not spec.job)
+
+def job_tool_names() -> Tuple[str, ...]:
+    """Herramientas lentas que se ejecutan como trabajos asíncronos"""
+    return tuple(name for name, spec in TOOL_SPECS.items() if spec.job)
+
+# ===============================================
+# DESCRIPCIONES PARA EL PROMPT
+# ===============================================
+def tool_descriptions(names: Optional[Iterable[str]] = None, suffix: str = "") -> Dict[str, Dict[str, Any]]:
+    """Descripciones (formato TOOL_DESCRIPTIONS) con el sufijo de nombre de la topología"""
+    descriptions = {}
+    for spec in _select(names):
+        entry = spec.description_entry()
+        entry["name"] = spec.name + suffix
+        descriptions[entry["name"]] = entry
+    return descriptions
+
+def format_tool_descriptions(descriptions: Dict[str, Dict[str, Any]],
+                             names: Optional[Iterable[str]] = None) -> str:
+    """Líneas '- nombre: descripción' del prompt del orquestador"""
+    wanted = set(names) if names is not None else None
+    return "\n".join(f"- {name}: {desc['description']}" for name, desc in descriptions.items()
+                     if wanted is None or name in wanted)
+
+# ===============================================
+# HERRAMIENTAS LANGCHAIN
+# ===============================================
+@functools.lru_cache(maxsize=None)
+def _langchain_tools(suffix: str) -> Tuple[Any, ...]:
+    from langchain_core.tools import StructuredTool
+    from jobs import local_job_coroutine
+
+    return tuple(
+        StructuredTool.from_function(
+            func=spec.call_local, name=spec.name + suffix, description=spec.description,
+            coroutine=local_job_coroutine(spec.name, spec.call_local) if spec.job else None,
+            args_schema=spec.schema, metadata=spec.metadata(),
+        )
+        for spec in TOOL_SPECS.values()
+    )
+
+def langchain_tools(names: Optional[Iterable[str]] = None, suffix: str = "") -> List[Any]:
+    """Herramientas @tool de LangChain (las mismas instancias en cada llamada)"""
+    wanted = {name + suffix for name in names} if names is not None else None
+    return [t for t in _langchain_tools(suffix) if wanted is None or t.name in wanted]
+
+# ===============================================
+# HERRAMIENTAS FASTMCP
+# ===============================================
+def _schema_parameters(spec: ToolSpec) -> List[inspect.Parameter]:
+    """Parámetros con el tipo y el Field del esquema (descripción y restricciones llegan al inputSchema)"""
+    return [
+        inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, annotation=Annotated[field.annotation, field],
+                          default=inspect.Parameter.empty if field.is_required() else field.default)
+        for name, field in spec.schema.model_fields.items()
+    ]
+
+def _with_signature(handler: Callable[..., Any], spec: ToolSpec, context: bool = False) -> Callable[..., Any]:
+    """FastMCP genera el esquema de entrada a partir de la firma: la del esquema de la herramienta"""
+    parameters = _schema_parameters(spec)
+    if context:
+        from mcp.server.fastmcp import Context
+        parameters.append(inspect.Parameter("ctx", inspect.Parameter.KEYWORD_ONLY, annotation=Context))
+    handler.__signature__ = inspect.Signature(parameters, return_annotation=Dict)
+    handler.__annotations__ = {**{p.name: p.annotation for p in parameters}, "return": Dict}
+    handler.__name__ = handler.__qualname__ = spec.name
+    return handler
+
+def _backend_handler(spec: ToolSpec) -> Callable[..., Any]:
+    """Herramienta asíncrona sobre los backends compartidos del proceso servidor"""
+    from server_backends import get_backends
+
+    store, method = spec.backend
+
+    async def handler(ctx, **kwargs: Any) -> Dict:
+        backends = get_backends(ctx)
+        return await backends.call(store, getattr(getattr(backends, store), method),
+                                   *(kwargs[f] for f in spec.fields))
+
+    return _with_signature(handler, spec, context=True)
+
+def register_server_tools(mcp_server, names: Optional[Iterable[str]] = None):
+    """Registra las herramientas del registro en un servidor FastMCP"""
+    from mcp.types import ToolAnnotations
+    from jobs import job_handler, register_job_tools
+    from process_tools import server_tool
+    from serialization import compact_result
+
+    specs = _select(names)
+    for spec in specs:
+        options = {
+            "name": spec.name,
+            "description": spec.description,
+            "annotations": ToolAnnotations(readOnlyHint=spec.read_only, idempotentHint=spec.read_only),
+            "meta": spec.metadata(),
+        }
+        if spec.job:
+            # Devuelve el job_id al instante; el resultado se consulta con job_result
+            handler = _with_signature(job_handler(spec.name, spec.call_local), spec)
+            mcp_server.tool(**options)(compact_result(handler))
+        elif spec.backend is not None:
+            # Resultado dict: se serializa una sola vez (ver serialization.compact_result)
+            mcp_server.tool(**options)(compact_result(_backend_handler(spec)))
+        else:
+            # Solo la firma: la función sigue siendo la de nivel de módulo (el ejecutor de procesos la envía por referencia)
+            spec.func.__signature__ = inspect.Signature(_schema_parameters(spec))
+            server_tool(mcp_server, executor=spec.server_executor(), timeout=30, **options)(spec.func)
+    if any(spec.job for spec in specs):
+        register_job_tools(mcp_server)
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Envoltorios de herramientas LangChain
+Base común para interceptar la ejecución de herramientas (breakers, decodificación, ...)
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+ToolCall = Callable[[BaseTool, Dict[str, Any]], Awaitable[Any]]
+
+def wrap_tool(tool: BaseTool, call: ToolCall) -> StructuredTool:
+    """Devuelve una copia de `tool` cuya ejecución pasa por `call(tool, args)`"""
+    async def _coroutine(**kwargs):
+        return await call(tool, kwargs)
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        coroutine=_coroutine,
+        return_direct=tool.return_direct,
+        metadata=tool.metadata,
+    )
+
+def wrap_tools(tools: Iterable[BaseTool], call: ToolCall) -> List[StructuredTool]:
+    return [wrap_tool(tool, call) for tool in tools]
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Arranque en caliente y salud de las conexiones MCP
+Al arrancar el proceso se abren las sesiones MCP (una persistente por servidor,
+sin spawn + handshake por llamada), se descubren las herramientas, se construye
+el agente y, opcionalmente, se hace una llamada mínima al LLM para dejar la
+conexión HTTP abierta. /readyz solo responde 200 cuando todo esto ha terminado.
+Un bucle de salud hace ping a la sesión y la reabre si se ha caído.
+
+Variables de entorno:
+    MCP_WARMUP              0 = inicialización perezosa en la primera petición (1)
+    MCP_PERSISTENT_SESSION  0 = una sesión por llamada, como langchain-mcp-adapters por defecto (1)
+    MCP_WARMUP_LLM          1 = llamada mínima al LLM durante el arranque (0)
+    MCP_HEALTH_INTERVAL     segundos entre pings a la sesión; 0 = sin bucle de salud (15)
+    MCP_HEALTH_TIMEOUT      timeout de cada ping (5)
+    MCP_WARMUP_RETRY_MAX    espera máxima entre reintentos del arranque; 0 = sin reintentos (30)
+"""
+
+import asyncio
+import contextlib
+import functools
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.tools import load_mcp_tools
+
+logger = logging.getLogger(__name__)
+
+# ===============================================
+# CONFIGURACIÓN (VARIABLES DE ENTORNO)
+# ===============================================
+def warmup_enabled() -> bool:
+    return os.getenv("MCP_WARMUP", "1") == "1"
+
+def persistent_sessions_enabled() -> bool:
+    return os.getenv("MCP_PERSISTENT_SESSION", "1") == "1"
+
+def warmup_llm_enabled() -> bool:
+    return os.getenv("MCP_WARMUP_LLM") == "1"
+
+def health_interval() -> float:
+    return float(os.getenv("MCP_HEALTH_INTERVAL", "15"))
+
+def health_timeout() -> float:
+    return float(os.getenv("MCP_HEALTH_TIMEOUT", "5"))
+
+def warmup_retry_max() -> float:
+    return float(os.getenv("MCP_WARMUP_RETRY_MAX", "30"))
+
+# ===============================================
+# SESIÓN MCP PERSISTENTE
+# ===============================================
+class PersistentSession:
+    """Sesión MCP abierta durante la vida del proceso.
+
+    El context manager de `client.session()` debe entrar y salir en la misma
+    tarea (cancel scopes de anyio), así que vive en una tarea propia que
+    espera hasta `aclose()`.
+    """
+
+    def __init__(self, client, server_name: str, connect_timeout: float = 30.0):
+        self.client = client
+        self.server_name = server_name
+        self.connect_timeout = connect_timeout
+        self.session = None
+        self._task: Optional[asyncio.Task] = None
+        self._opened: Optional[asyncio.Event] = None
+        self._closing: Optional[asyncio.Event] = None
+        self._error: Optional[BaseException] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    @property
+    def dead(self) -> bool:
+        """Se abrió y se ha caído (False si nunca se abrió, p. ej. en modo replay)"""
+        return self._task is not None and not self.alive
+
+    async def _run(self):
+        try:
+            async with self.client.session(self.server_name) as session:
+                self.session = session
+                self._opened.set()
+                await self._closing.wait()
+        except Exception as e:
+            self._error = e
+            logger.warning("Sesión MCP '%s' cerrada con error: %s", self.server_name, e)
+        finally:
+            self.session = None
+            self._opened.set()
+
+    async def open(self):
+        """Abre la sesión (o la reabre si se cayó) y devuelve la ClientSession"""
+        async with self._lock:
+            if self.alive:
+                return self.session
+            await self._stop()
+            self._error = None
+            self._opened, self._closing = asyncio.Event(), asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name=f"mcp-session-{self.server_name}")
+            await asyncio.wait_for(self._opened.wait(), timeout=self.connect_timeout)
+            if self.session is None:
+                raise ConnectionError(f"No se pudo abrir la sesión MCP '{self.server_name}': {self._error}")
+            logger.info("Sesión MCP '%s' abierta", self.server_name)
+            return self.session
+
+    async def get_tools(self) -> List[BaseTool]:
+        """Herramientas ligadas a la sesión persistente (sin sesión nueva por llamada)"""
+        session = await self.open()
+        return await load_mcp_tools(session, server_name=self.server_name)
+
+    async def ping(self, timeout: Optional[float] = None) -> bool:
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=timeout or health_timeout())
+            return True
+        except Exception as e:
+            logger.warning("Ping a la sesión MCP '%s' fallido: %s", self.server_name, e)
+            return False
+
+    async def _stop(self):
+        if self._task is not None and not self._task.done():
+            self._closing.set()
+            try:
+                await asyncio.wait_for(self._task, timeout=5)
+            except (asyncio.TimeoutError, Exception):
+                self._task.cancel()
+        self._task = None
+        self.session = None
+
+    async def aclose(self):
+        async with self._lock:
+            await self._stop()
+
+def tool_loader(client, server_name: str):
+    """(get_tools, sesión persistente o None) según MCP_PERSISTENT_SESSION"""
+    if not persistent_sessions_enabled():
+        return functools.partial(client.get_tools, server_name=server_name), None
+    session = PersistentSession(client, server_name)
+    return session.get_tools, session
+
+# ===============================================
+# ESTADO DE ARRANQUE
+# ===============================================
+class WarmupState:
+    """cold -> warming -> ready | failed; `healthy` lo mantiene el bucle de salud"""
+
+    def __init__(self):
+        self.status = "cold"
+        self.error: Optional[str] = None
+        self.duration_ms: Optional[float] = None
+        self.healthy = True
+        self.last_health_check: Optional[float] = None
+        self.reconnects = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready" and self.healthy
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "ready": self.ready,
+            "healthy": self.healthy,
+            "error": self.error,
+            "duration_ms": self.duration_ms,
+            "last_health_check": self.last_health_check,
+            "reconnects": self.reconnects,
+        }
+
+async def warm_llm(llm):
+    """Llamada mínima al LLM (abre la conexión HTTP del cliente); los errores no bloquean el arranque"""
+    if not hasattr(llm, "ainvoke"):
+        return
+    try:
+        await llm.ainvoke("ping")
+    except Exception as e:
+        logger.warning("Llamada de calentamiento al LLM fallida: %s", e)
+
+async def warm_up(orchestrator) -> Dict[str, Any]:
+    """Inicializa `orchestrator` (sesiones, herramientas, agente) y arranca el bucle de salud.
+
+    Si falla (p. ej. el servidor de herramientas aún no ha arrancado) se
+    reintenta con backoff exponencial hasta que queda listo; sin reintentos
+    (MCP_WARMUP_RETRY_MAX=0) el estado queda en "failed" hasta que una
+    inicialización perezosa correcta lo marca listo (`mark_ready`).
+
+    El orquestador expone `warmup_state`, `initialize()` y, si tiene sesión
+    persistente, `session` (PersistentSession), `reset_connection()` y `reconnect()`.
+    """
+    state = orchestrator.warmup_state
+    if state.status in ("warming", "ready"):
+        return state.to_dict()
+    state.status, state.error = "warming", None
+    started = time.perf_counter()
+    delay = 1.0
+    while state.status != "ready":
+        try:
+            await orchestrator.initialize()
+            if warmup_llm_enabled():
+                await warm_llm(orchestrator.llm)
+            break
+        except Exception as e:
+            state.error = str(e)
+            retry_max = warmup_retry_max()
+            if retry_max <= 0:
+                state.status = "failed"
+                state.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+                logger.warning("Calentamiento de %s fallido: %s", type(orchestrator).__name__, e)
+                return state.to_dict()
+            logger.warning("Calentamiento de %s fallido: %s; reintento en %.1f s",
+                           type(orchestrator).__name__, e, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, retry_max)
+    mark_ready(orchestrator, started)
+    return state.to_dict()
+
+def mark_ready(orchestrator, started: Optional[float] = None):
+    """Marca el orquestador listo y arranca el bucle de salud (arranque o inicialización perezosa)"""
+    state = orchestrator.warmup_state
+    if state.status != "ready":
+        state.status, state.error = "ready", None
+        if started is not None:
+            state.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info("%s listo", type(orchestrator).__name__)
+
+    interval = health_interval()
+    session = getattr(orchestrator, "session", None)
+    if interval > 0 and session is not None and session.alive and \
+            getattr(orchestrator, "_health_task", None) is None:
+        orchestrator._health_task = asyncio.create_task(health_loop(orchestrator, interval))
+
+async def health_loop(orchestrator, interval: float):
+    """Ping periódico; si la sesión no responde se reabre y se reconstruye el agente"""
+    state = orchestrator.warmup_state
+    while True:
+        await asyncio.sleep(interval)
+        healthy = await orchestrator.session.ping()
+        state.last_health_check = time.time()
+        if healthy and state.status == "ready":
+            state.healthy = True
+            continue
+        state.healthy = False
+        logger.warning("Sesión MCP de %s no disponible; reconectando", type(orchestrator).__name__)
+        try:
+            # reconnect() toma el mismo candado que initialize(): las peticiones en curso
+            # esperan a la sesión nueva en lugar de abrir otra
+            await orchestrator.reconnect()
+            state.status, state.error, state.healthy = "ready", None, True
+            state.reconnects += 1
+        except Exception as e:
+            state.error = str(e)
+            logger.warning("Reconexión fallida: %s", e)
+
+# ===============================================
+# INTEGRACIÓN CON LOS SERVIDORES ASGI
+# ===============================================
+def warmup_lifespan(get_orchestrator: Callable[[], Any]):
+    """Lifespan ASGI: calienta el orquestador en segundo plano y cierra su sesión al parar.
+
+    El servidor acepta conexiones (y /healthz) mientras se calienta; /readyz
+    responde 503 hasta que termina. Con MCP_WARMUP=0 no hace nada.
+    """
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        if not warmup_enabled():
+            yield
+            return
+        orchestrator = get_orchestrator()
+        task = asyncio.create_task(orchestrator.warm_up()) if hasattr(orchestrator, "warm_up") else None
+        try:
+            yield
+        finally:
+            if task is not None and not task.done():
+                task.cancel()
+            if hasattr(orchestrator, "aclose"):
+                await orchestrator.aclose()
+
+    return lifespan
+
+def warmup_ready(get_orchestrator: Callable[[], Any]) -> bool:
+    """Readiness: con MCP_WARMUP=0 siempre listo (inicialización perezosa)"""
+    if not warmup_enabled():
+        return True
+    is_ready = getattr(get_orchestrator(), "is_ready", None)
+    return is_ready() if is_ready is not None else True